@@ -0,0 +1,80 @@
+"""
+Benchmark linking against plain and compressed libraries.
+
+Creates the same library with each compression method and reports its size, then times resolving the undefined symbols
+of a program against it and decoding the segment data of the pulled members. The files are read from the page cache,
+so the times are the cost of decompressing the pulled members, on a slow filesystem the smaller reads of a compressed
+library are the saving.
+"""
+
+import tempfile
+from pathlib import Path
+from random import Random
+from time import perf_counter
+
+import typer
+
+from linker.library import Compression, Library
+from linker.object import Object, Segment, Symbol
+
+from chapter_04.project_4_3 import create_symbol_table, iter_syms
+from chapter_06.project_6_3 import create_library
+from chapter_06.project_6_4 import resolve_undefined_symbols
+
+
+def make_members(nmembers: int, size: int, seed: int = 0) -> list[Object]:
+    """
+    Create members with text built from a small set of instruction words, so it compresses like code.
+    """
+    rng = Random(seed)
+    words = [rng.randbytes(4) for _ in range(256)]
+    objs: list[Object] = []
+    for i in range(nmembers):
+        text = Segment(".text", 0, size, "RP")
+        text.data = b"".join(rng.choices(words, k=size // 4))
+        refs = [Symbol(f"f{rng.randrange(nmembers)}", 0, 0, "U")] if rng.random() < 0.5 else []
+        objs.append(Object(f"m{i}", [text], [Symbol(f"f{i}", 0, 0, "D"), *refs], []))
+    return objs
+
+
+def link(path: Path, entry: list[str]) -> tuple[int, int, float]:
+    """
+    Pull the members needed for the entry symbols and decode their data, returning the number pulled, the number of
+    bytes decoded and the time.
+    """
+    start = perf_counter()
+    program = Object("program", [], [Symbol(name, 0, 0, "U") for name in entry], [])
+    symtab = create_symbol_table(iter_syms([program]))
+    decoded = 0
+    with Library(path) as lib:
+        objs = resolve_undefined_symbols(symtab, [lib])
+        for obj in objs:
+            for seg in obj.segs:
+                decoded += len(seg.data)
+    return len(objs), decoded, perf_counter() - start
+
+
+def main(members: int = 2_000, size: int = 4_096, entry: int = 20, hash_table: bool = True) -> None:
+    """
+    Report the size of each library and the time to link against it.
+    """
+    objs = make_members(members, size)
+    names = [f"f{i}" for i in Random(1).sample(range(members), entry)]
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = 0
+        for compression in Compression:
+            path = Path(tmp) / f"{compression.value}.lib"
+            created = perf_counter()
+            create_library(objs, path, hash_table, compression)
+            created = perf_counter() - created
+            disk = path.stat().st_size
+            plain = plain or disk
+            pulled, decoded, elapsed = link(path, names)
+            print(
+                f"{compression.value:5} {disk:14,} bytes ({disk / plain:5.1%})  create {created:7.3f}s  "
+                f"link {elapsed:7.3f}s ({pulled} members, {decoded:,} bytes)"
+            )
+
+
+if __name__ == "__main__":
+    typer.run(main)
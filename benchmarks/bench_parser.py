@@ -0,0 +1,79 @@
+"""
+Benchmark parsing the segment, symbol and relocation tables of a large object.
+
+Compares the reflection based `parse_item_from_str` (which inspects the data class fields for every line) with the
+precompiled decoders used by `parse_object_from_str`.
+"""
+
+from time import perf_counter
+from typing import Callable, Iterator
+
+import typer
+
+from linker.object import Object, Relocation, Segment, Symbol
+from linker.parser import (
+    line_iterator,
+    next_line,
+    parse_item_from_str,
+    parse_object_from_str,
+    validate_counts,
+    validate_magic_number,
+)
+from linker.writer import dump_object
+
+
+def make_object(nsegs: int, nsyms: int, nrels: int) -> Object:
+    """
+    Create a synthetic object with the given number of segments, symbols and relocations.
+    """
+    segs = [Segment(f".text{i}", i * 0x100, 0x100, "R") for i in range(nsegs)]
+    syms = [Symbol(f"sym{i}", i * 4, i % nsegs, "D" if i % 2 else "U") for i in range(nsyms)]
+    rels = [Relocation(i * 4, i % nsegs, i % nsyms, "A4") for i in range(nrels)]
+    return Object("bench", segs, syms, rels)
+
+
+def parse_object_by_reflection(s: str, name: str) -> Object:
+    """
+    Parse an object the way the parser did before the decoders were precompiled.
+    """
+    lines = line_iterator(s.splitlines())
+    validate_magic_number(next_line(lines, "expected magic number"))
+    nsegs, nsyms, nrels = validate_counts(next_line(lines, "expected counts"))
+    segs = [parse_item_from_str(next(lines).contents, Segment) for _ in range(nsegs)]
+    syms = [parse_item_from_str(next(lines).contents, Symbol) for _ in range(nsyms)]
+    rels = [parse_item_from_str(next(lines).contents, Relocation) for _ in range(nrels)]
+    return Object(name, segs, syms, rels)
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    """
+    Return the fastest time in seconds of `repeat` calls to `func`.
+    """
+
+    def timings() -> Iterator[float]:
+        for _ in range(repeat):
+            start = perf_counter()
+            func()
+            yield perf_counter() - start
+
+    return min(timings())
+
+
+def main(segments: int = 1000, symbols: int = 200_000, relocations: int = 500_000, repeat: int = 3) -> None:
+    """
+    Report the number of lines parsed per second before and after precompiling the decoders.
+    """
+    obj = make_object(segments, symbols, relocations)
+    contents = dump_object(obj)
+    assert parse_object_by_reflection(contents, obj.name) == parse_object_from_str(contents, obj.name) == obj
+    nlines = segments + symbols + relocations
+    before = best_of(repeat, lambda: parse_object_by_reflection(contents, obj.name))
+    after = best_of(repeat, lambda: parse_object_from_str(contents, obj.name))
+    print(f"lines:  {nlines}")
+    print(f"before: {nlines / before:12,.0f} lines/s ({before:.3f}s)")
+    print(f"after:  {nlines / after:12,.0f} lines/s ({after:.3f}s)")
+    print(f"speedup: {before / after:.2f}x")
+
+
+if __name__ == "__main__":
+    typer.run(main)
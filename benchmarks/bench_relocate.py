@@ -0,0 +1,69 @@
+"""
+Benchmark applying relocations to the linked segment data.
+
+Compares applying the relocations one at a time in Python with applying them in groups with NumPy, when it's installed.
+"""
+
+from random import Random
+from time import perf_counter
+
+import typer
+
+from linker.object import Object, RelocationTable, Segment, Symbol
+from linker.relocate import Endian, has_numpy, relocate
+from linker.symtab import SymbolTable
+
+from chapter_04.project_4_1 import link_segments
+
+TYPES = ["A4", "R4", "AS4", "RS4", "U2", "L2"]
+
+
+def make_link(nrels: int, nsyms: int, seed: int = 0) -> tuple[Object, list[Segment], SymbolTable]:
+    """
+    Create an object with a relocation in every word of its text, linked at 0x1000.
+    """
+    rng = Random(seed)
+    text = Segment(".text", 0, nrels * 4, "RP")
+    text.data = rng.randbytes(text.size)
+    syms = [Symbol(f"sym{i}", rng.randrange(text.size), 0, "D") for i in range(nsyms)]
+    rels = RelocationTable()
+    for i in range(nrels):
+        kind = TYPES[i % len(TYPES)]
+        rels.add(i * 4, 0, 0 if kind in ("A4", "R4") else i % nsyms, kind)
+    obj = Object("bench", [text], syms, rels)
+    out = link_segments({".text": [text]}, ".text", 0x1000, "RP", 0x4)
+    symtab = SymbolTable()
+    for sym in syms:
+        sym.value += 0x1000
+        symtab.add(sym)
+    return obj, [out], symtab
+
+
+def time_relocate(nrels: int, nsyms: int, use_numpy: bool, endian: Endian) -> tuple[float, bytes]:
+    """
+    Return the time in seconds to apply the relocations and the relocated data.
+    """
+    obj, segs, symtab = make_link(nrels, nsyms)
+    start = perf_counter()
+    relocate([obj], segs, symtab, use_numpy, endian)
+    return perf_counter() - start, bytes(segs[0].data)
+
+
+def main(relocations: int = 1_000_000, symbols: int = 10_000, endian: Endian = Endian.LITTLE) -> None:
+    """
+    Report the number of relocations applied per second.
+    """
+    python, expected = time_relocate(relocations, symbols, False, endian)
+    print(f"relocations: {relocations}")
+    print(f"python: {relocations / python:12,.0f} relocations/s ({python:.3f}s)")
+    if not has_numpy():
+        print("numpy:  not installed")
+        return
+    numpy, data = time_relocate(relocations, symbols, True, endian)
+    assert data == expected
+    print(f"numpy:  {relocations / numpy:12,.0f} relocations/s ({numpy:.3f}s)")
+    print(f"speedup: {python / numpy:.1f}x")
+
+
+if __name__ == "__main__":
+    typer.run(main)
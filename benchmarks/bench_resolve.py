@@ -0,0 +1,65 @@
+"""
+Benchmark resolving symbol values against the output segments.
+
+Compares looking up each symbol's output segment with a linear scan of the output segments against building a name to
+index map once (`index_segments`). The linear scan is timed on a sample of the symbols because it is quadratic.
+"""
+
+from time import perf_counter
+
+import typer
+
+from linker.object import Object, Segment, Symbol
+
+from chapter_05.project_5_2 import index_segments, resolve_symbols
+
+
+def make_objects(nsegs: int, nsyms: int) -> tuple[list[Object], list[Segment]]:
+    """
+    Create an object with a segment per function and the output segments it is linked in to.
+    """
+    segs = [Segment(f".text.f{i}", i * 0x10, 0x10, "RP") for i in range(nsegs)]
+    syms = [Symbol(f"f{i}", (i % nsegs) * 0x10, i % nsegs, "D") for i in range(nsyms)]
+    out = [Segment(seg.name, 0x1000 + seg.base, seg.size, seg.flags) for seg in segs]
+    for seg, out_seg in zip(segs, out):
+        seg.oldbase = seg.base
+        seg.base = out_seg.base
+    return [Object("bench", segs, syms, [])], out
+
+
+def resolve_linear(syms: list[Symbol], segs: list[Segment]) -> None:
+    """
+    Resolve the symbols the way `resolve_sym` did before the segments were indexed.
+    """
+    for sym in syms:
+        assert sym.obj is not None
+        seg = sym.obj.segs[sym.seg]
+        sym.value += seg.base - seg.oldbase
+        sym.seg = next((i for i, out in enumerate(segs) if out.name == seg.name), -1)
+
+
+def main(segments: int = 10_000, symbols: int = 100_000, sample: int = 2_000) -> None:
+    """
+    Report the number of symbols resolved per second before and after indexing the segments.
+    """
+    objs, out = make_objects(segments, symbols)
+    syms = objs[0].syms
+    start = perf_counter()
+    resolve_linear(syms[:sample], out)
+    before = (perf_counter() - start) / sample
+    resolved = [sym.seg for sym in syms[:sample]]
+    objs, out = make_objects(segments, symbols)
+    syms = objs[0].syms
+    start = perf_counter()
+    resolve_symbols(syms, out)
+    after = (perf_counter() - start) / symbols
+    assert [sym.seg for sym in syms[:sample]] == resolved
+    assert index_segments(out)[out[-1].name] == segments - 1
+    print(f"symbols:  {symbols} ({segments} segments)")
+    print(f"before:   {1 / before:12,.0f} symbols/s (estimated {before * symbols:.3f}s)")
+    print(f"after:    {1 / after:12,.0f} symbols/s ({after * symbols:.3f}s)")
+    print(f"speedup:  {before / after:.0f}x")
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -36,16 +36,40 @@ def link_segments(segments: dict[str, list[Segment]], name: str, base: int, flag
     :param base: the base address of the segment.
     :param flags: the segment flags.
     :param alignment: the alignment of the combined segments.
-    :return: the linked segment.
+    :return: the linked segment, with the combined data if "P" is in the flags.
     """
     result = Segment(name, base, 0, flags)
     for segment in segments[name]:
         result.size = roundup(result.size, alignment)
         segment.base = result.base + result.size
         result.size += segment.size
+    if "P" in flags:
+        result.data = assemble_segment_data(segments[name], result)
     return result
 
 
+def assemble_segment_data(segments: Iterable[Segment], result: Segment) -> bytearray:
+    """
+    Copy the data of the linked segments to their offsets in the output segment.
+
+    The output data is allocated once at its final size, so the padding between the segments (and any data missing
+    from an input segment) is zero filled.
+
+    :param segments: the segments that were linked, with their new base addresses.
+    :param result: the linked segment.
+    :return: the data of the linked segment.
+    """
+    buffer = bytearray(result.size)
+    view = memoryview(buffer)
+    for segment in segments:
+        data = segment.data
+        if data:
+            offset = segment.base - result.base
+            length = min(len(data), segment.size)
+            view[offset : offset + length] = memoryview(data)[:length]
+    return buffer
+
+
 def link(objects: list[Object], name: str) -> Object:
     """
     Link objects together.
@@ -4,14 +4,16 @@ Project 4.3
 
 from collections import defaultdict
 from itertools import chain
-from operator import attrgetter
 from pathlib import Path
-from typing import Iterable, Iterator, Literal
+from typing import Iterable, Iterator, Literal, Optional
+from typing_extensions import Annotated
 
 import typer
 
-from linker import Object, Segment, Symbol, read_object, write_object, roundup
+from linker import Object, Segment, Symbol, read_objects, write_object, roundup
+from linker.cache import ObjectCache
 from linker.errors import LinkError
+from linker.symtab import SymbolTable
 from linker.utils import SegmentGroup
 
 from .project_4_1 import link_segments
@@ -97,60 +99,6 @@ def group_segments_by_type(names: dict[str, list[Segment]], groups: SegmentGroup
     return groups
 
 
-def group_symbols_by_name(syms: Iterable[Symbol]) -> dict[str, list[Symbol]]:
-    """
-    Group symbols by name.
-    """
-    symtab = defaultdict(list)
-    for sym in syms:
-        symtab[sym.name].append(sym)
-    return symtab
-
-
-def partition_symbols(syms: Iterable[Symbol]) -> tuple[list[Symbol], list[Symbol]]:
-    """
-    Partition symbols in to defined and undefined.
-
-    :param syms: The list of symbols to partition.
-    :return: A tuple containing the defined and undefined symbols.
-    """
-    d, u = [], []
-    for sym in syms:
-        if "D" in sym.type:
-            d.append(sym)
-        else:
-            u.append(sym)
-    return d, u
-
-
-def reduce_symbol(syms: Iterable[Symbol]) -> Symbol:
-    """
-    Reduce a list of symbols to a single symbol.
-
-    :param syms: The list of symbols to reduce.
-    :return: The reduced symbol.
-    """
-    d, u = partition_symbols(syms)
-    if d:
-        if len(d) > 1:
-            raise LinkError("multiply defined symbol")
-        return d[0]
-    if u:
-        return max(u, key=attrgetter("value"))
-    raise LinkError("undefined symbol")
-
-
-def reduce_symbols(symtab: dict[str, list[Symbol]]) -> Iterator[tuple[str, Symbol]]:
-    """
-    Reduce a symbol table.
-
-    :param symtab: The symbol table to reduce.
-    :return: An iterator over the reduced symbols.
-    """
-    for name, syms in symtab.items():
-        yield name, reduce_symbol(syms)
-
-
 def create_common_segment(syms: Iterable[Symbol]) -> Segment:
     """
     Create a common segment from a list of symbols.
@@ -164,14 +112,18 @@ def create_common_segment(syms: Iterable[Symbol]) -> Segment:
     return Segment(".common", 0, size, "RW")
 
 
-def create_symbol_table(syms: Iterable[Symbol]) -> dict[str, Symbol]:
+def create_symbol_table(syms: Iterable[Symbol]) -> SymbolTable:
     """
-    Create a symbol table.
+    Create a symbol table, merging each symbol in to the table as it is seen.
 
-    :param syms: The list of symbols.
+    :param syms: The symbols, these can be produced lazily as the objects are read.
     :return: The symbol table.
+    :raises LinkError: If a symbol is multiply defined.
     """
-    return dict(reduce_symbols(group_symbols_by_name(syms)))
+    symtab = SymbolTable()
+    for sym in syms:
+        symtab.merge(sym)
+    return symtab
 
 
 def link_group(names: Iterable[str], segs: dict[str, list[Segment]], addr: int, flags: str) -> Iterator[Segment]:
@@ -211,15 +163,25 @@ def link(objs: list[Object], path: Path) -> Object:
 
 if __name__ == "__main__":  # pragma: no cover
 
-    def main(inputs: list[Path], output: Path) -> None:
+    def main(
+        inputs: list[Path],
+        output: Path,
+        jobs: Annotated[int, typer.Option(help="number of processes used to read the inputs")] = 1,
+        cache_dir: Annotated[Optional[Path], typer.Option(help="directory to cache parsed objects")] = None,
+    ) -> None:
         """
         Link a list of objects.
 
         :param inputs: The list of objects to link.
         :param output: The path to write the linked object to.
+        :param jobs: The number of processes used to read the inputs.
+        :param cache_dir: The directory to cache parsed objects.
         """
-        objs = map(read_object, inputs)
-        obj = link(list(objs), output)
+        cache = ObjectCache(cache_dir) if cache_dir else None
+        objs = read_objects(inputs, jobs, cache=cache)
+        obj = link(objs, output)
         write_object(obj, output)
+        if cache:
+            typer.echo(cache.summary(), err=True)
 
     typer.run(main)
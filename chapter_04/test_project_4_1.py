@@ -0,0 +1,27 @@
+from linker import Segment
+
+from .project_4_1 import link_segments
+
+
+def test_link_segments_data() -> None:
+    a = Segment(".text", 0, 3, "RP")
+    a.data = b"abc"
+    b = Segment(".text", 0, 2, "RP")
+    b.data = memoryview(b"de")
+    seg = link_segments({".text": [a, b]}, ".text", 0x1000, "RP", 0x4)
+    assert (a.base, b.base) == (0x1000, 0x1004)
+    assert seg.size == 6
+    assert seg.data == b"abc\0de"
+
+
+def test_link_segments_missing_data() -> None:
+    a = Segment(".data", 0, 4, "RWP")
+    a.data = b"\x01\x02"
+    seg = link_segments({".data": [a]}, ".data", 0x2000, "RWP", 0x4)
+    assert seg.data == b"\x01\x02\0\0"
+
+
+def test_link_segments_bss() -> None:
+    seg = link_segments({".bss": [Segment(".bss", 0, 0x1000, "RW")]}, ".bss", 0x3000, "RW", 0x4)
+    assert seg.size == 0x1000
+    assert seg.data == b""
@@ -13,9 +13,6 @@ from .project_4_3 import (
     get_group,
     group_segments_by_name,
     group_segments_by_type,
-    group_symbols_by_name,
-    partition_symbols,
-    reduce_symbol,
     create_common_segment,
     create_symbol_table,
     link,
@@ -123,54 +120,6 @@ def test_group_segments_by_type_nondefault() -> None:
     }
 
 
-def test_group_symbols_by_name(objs: list[Object]) -> None:
-    syms = group_symbols_by_name(iter_syms(objs))
-    assert syms == {
-        "main": [objs[0].syms[0]],
-        "ptr": [objs[0].syms[1]],
-        "items": [objs[0].syms[2]],
-    }
-
-
-def test_partition_symbols(main: Object) -> None:
-    d, u = partition_symbols(main.syms)
-    assert d == [main.syms[0], main.syms[1]]
-    assert u == [main.syms[2]]
-
-
-def test_reduce_symbol_multiply_defined() -> None:
-    syms = [
-        Symbol("main", 0, 0, "D"),
-        Symbol("main", 0, 0, "D"),
-        Symbol("main", 0, 0, "U"),
-    ]
-    with pytest.raises(LinkError, match=re.escape("multiply defined symbol")):
-        reduce_symbol(syms)
-
-
-def test_reduce_symbol_defined() -> None:
-    syms = [
-        Symbol("main", 0, 0, "U"),
-        Symbol("main", 0, 0, "D"),
-        Symbol("main", 0, 0, "U"),
-    ]
-    assert reduce_symbol(syms) == syms[1]
-
-
-def test_reduce_symbol_common() -> None:
-    syms = [
-        Symbol("main", 0x20, 0, "U"),
-        Symbol("main", 0x18, 0, "U"),
-        Symbol("main", 0xA, 0, "U"),
-    ]
-    assert reduce_symbol(syms) == syms[0]
-
-
-def test_reduce_symbol_undefined() -> None:
-    with pytest.raises(LinkError, match=re.escape("undefined symbol")):
-        reduce_symbol([])
-
-
 def test_create_common_segment(objs: list[Object]) -> None:
     seg = create_common_segment(iter_syms(objs))
     assert seg == Segment(".common", 0, 0xA, "RW")
@@ -183,13 +132,35 @@ def test_create_symbol_table(objs: list[Object]) -> None:
         "ptr": objs[0].syms[1],
         "items": objs[0].syms[2],
     }
+    assert syms.lookup(Symbol("ptr", 0, 0, "U")) is objs[0].syms[1]
+
+
+def test_create_symbol_table_merges_symbols() -> None:
+    a = Object("a", [], [Symbol("x", 0, 0, "U"), Symbol("blk", 8, 0, "U")], [])
+    b = Object("b", [], [Symbol("blk", 0x10, 0, "U"), Symbol("x", 4, 1, "D")], [])
+    c = Object("c", [], [Symbol("blk", 0xC, 0, "U")], [])
+    symtab = create_symbol_table(iter_syms([a, b, c]))
+    assert list(symtab) == ["x", "blk"]
+    assert symtab["x"] is b.syms[1]
+    assert symtab["blk"] is b.syms[0]
+
+
+def test_create_symbol_table_multiply_defined() -> None:
+    a = Object("a", [], [Symbol("x", 0, 1, "D")], [])
+    b = Object("b", [], [Symbol("x", 4, 1, "D")], [])
+    with pytest.raises(LinkError, match=re.escape("multiply defined symbol: x (defined in a, b)")):
+        create_symbol_table(iter_syms([a, b]))
 
 
 def test_link(objs: list[Object]) -> None:
     obj = link(objs, Path("out.lk"))
+    text = Segment(".text", 0x1000, 2, "RP")
+    text.data = b"hi"
+    data = Segment(".data", 0x2000, 1, "RWP")
+    data.data = b"y"
     assert obj.segs == [
-        Segment(".text", 0x1000, 2, "RP"),
-        Segment(".data", 0x2000, 1, "RWP"),
+        text,
+        data,
         Segment(".bss", 0x2004, 3, "RW"),
         Segment(".common", 0x2008, 0xA, "RW"),
     ]
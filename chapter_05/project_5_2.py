@@ -4,10 +4,12 @@ Project 5.2
 
 from itertools import chain
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Mapping, Optional
+from typing_extensions import Annotated
 
 import typer
-from linker import Object, Segment, Symbol, read_object, roundup, write_object
+from linker import Object, Segment, Symbol, read_objects, roundup, write_object
+from linker.cache import ObjectCache
 
 from chapter_04.project_4_3 import (
     create_common_segment,
@@ -21,43 +23,46 @@ from chapter_04.project_4_3 import (
 )
 
 
-def find_seg_index(segs: Iterable[Segment], name: str) -> int:
+def index_segments(segs: Iterable[Segment]) -> dict[str, int]:
     """
-    Find the index of a segment by name.
+    Map the segment names to their index.
 
     :param segs: The segments.
-    :param name: The name of the segment.
-    :return: The index of the segment.
+    :return: The index of the first segment with each name.
     """
+    index: dict[str, int] = {}
     for idx, seg in enumerate(segs):
-        if seg.name == name:
-            return idx
-    return -1
+        index.setdefault(seg.name, idx)
+    return index
 
 
-def resolve_sym(sym: Symbol, segs: list[Segment]) -> None:
+def resolve_sym(sym: Symbol, index: Mapping[str, int]) -> None:
     """
     Resolve a symbol.
 
     :param sym: The symbol to resolve.
-    :param segs: The segments.
+    :param index: The index of each output segment by name.
     """
     assert sym.obj is not None
     seg = sym.obj.segs[sym.seg]
     offset = seg.base - seg.oldbase
     sym.value += offset
-    sym.seg = find_seg_index(segs, seg.name)
+    sym.seg = index.get(seg.name, -1)
 
 
-def resolve_symbols(syms: Iterable[Symbol], segs: list[Segment]) -> None:
+def resolve_symbols(syms: Iterable[Symbol], segs: list[Segment], index: Optional[Mapping[str, int]] = None) -> None:
     """
     Resolve all the symbols.
 
     :param syms: The symbols.
     :param segs: The segments.
+    :param index: The index of each output segment by name, built from `segs` if not given.
     """
-    for sym in filter(lambda sym: "D" in sym.type, syms):
-        resolve_sym(sym, segs)
+    if index is None:
+        index = index_segments(segs)
+    for sym in syms:
+        if "D" in sym.type:
+            resolve_sym(sym, index)
 
 
 def link(objs: list[Object], path: Path) -> Object:
@@ -81,15 +86,25 @@ def link(objs: list[Object], path: Path) -> Object:
 
 if __name__ == "__main__":  # pragma: no cover
 
-    def main(inputs: list[Path], output: Path) -> None:
+    def main(
+        inputs: list[Path],
+        output: Path,
+        jobs: Annotated[int, typer.Option(help="number of processes used to read the inputs")] = 1,
+        cache_dir: Annotated[Optional[Path], typer.Option(help="directory to cache parsed objects")] = None,
+    ) -> None:
         """
         Link a list of objects.
 
         :param inputs: The list of objects to link.
         :param output: The path to write the linked object to.
+        :param jobs: The number of processes used to read the inputs.
+        :param cache_dir: The directory to cache parsed objects.
         """
-        objs = map(read_object, inputs)
-        obj = link(list(objs), output)
+        cache = ObjectCache(cache_dir) if cache_dir else None
+        objs = read_objects(inputs, jobs, cache=cache)
+        obj = link(objs, output)
         write_object(obj, output)
+        if cache:
+            typer.echo(cache.summary(), err=True)
 
     typer.run(main)
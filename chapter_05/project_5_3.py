@@ -4,10 +4,12 @@ Project 5.3
 
 from itertools import chain
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional
+from typing_extensions import Annotated
 
 import typer
-from linker import Object, Segment, Symbol, read_object, roundup, write_object
+from linker import Object, Segment, Symbol, read_objects, roundup, write_object
+from linker.cache import ObjectCache
 
 from chapter_04.project_4_3 import (
     create_common_segment,
@@ -19,7 +21,7 @@ from chapter_04.project_4_3 import (
     link_group,
     make_default_groups,
 )
-from .project_5_2 import find_seg_index, resolve_symbols
+from .project_5_2 import index_segments, resolve_symbols
 
 
 def resolve_common_symbols(syms: Iterable[Symbol], seg: Segment, index: int) -> None:
@@ -27,13 +29,14 @@ def resolve_common_symbols(syms: Iterable[Symbol], seg: Segment, index: int) ->
     Resolve common symbols.
 
     This function will resolve common symbols by assigning them to the next available address in the common segment.
+    Undefined symbols with a value of zero are references rather than common blocks, and stay undefined.
 
     :param syms: An iterable of symbols.
     :param seg: The common segment.
     :param index: The index of the common segment.
     """
     addr = seg.base
-    for sym in filter(lambda sym: "U" in sym.type, syms):
+    for sym in filter(lambda sym: "U" in sym.type and sym.value, syms):
         size = sym.value
         sym.value = roundup(addr, 0x4)
         sym.seg = index
@@ -58,22 +61,33 @@ def link(objs: list[Object], path: Path) -> Object:
     segs.extend(link_group(types["text"], names, 0x1000, "RP"))
     segs.extend(link_group(types["data"], names, roundup(segs[-1].end, 0x1000), "RWP"))
     segs.extend(link_group(types["bss"], names, segs[-1].end, "RW"))
-    resolve_symbols(symtab.values(), segs)
-    resolve_common_symbols(symtab.values(), common_seg, find_seg_index(segs, common_seg.name))
+    index = index_segments(segs)
+    resolve_symbols(symtab.values(), segs, index)
+    resolve_common_symbols(symtab.values(), common_seg, index[common_seg.name])
     return Object(path.stem, segs, list(symtab.values()), [])
 
 
 if __name__ == "__main__":  # pragma: no cover
 
-    def main(inputs: list[Path], output: Path) -> None:
+    def main(
+        inputs: list[Path],
+        output: Path,
+        jobs: Annotated[int, typer.Option(help="number of processes used to read the inputs")] = 1,
+        cache_dir: Annotated[Optional[Path], typer.Option(help="directory to cache parsed objects")] = None,
+    ) -> None:
         """
         Link a list of objects.
 
         :param inputs: The list of objects to link.
         :param output: The path to write the linked object to.
+        :param jobs: The number of processes used to read the inputs.
+        :param cache_dir: The directory to cache parsed objects.
         """
-        objs = map(read_object, inputs)
-        obj = link(list(objs), output)
+        cache = ObjectCache(cache_dir) if cache_dir else None
+        objs = read_objects(inputs, jobs, cache=cache)
+        obj = link(objs, output)
         write_object(obj, output)
+        if cache:
+            typer.echo(cache.summary(), err=True)
 
     typer.run(main)
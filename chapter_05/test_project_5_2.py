@@ -4,7 +4,7 @@ import pytest
 
 from linker import Object, Segment, Symbol
 
-from .project_5_2 import link
+from .project_5_2 import index_segments, link
 
 
 @pytest.fixture
@@ -56,3 +56,8 @@ def test_link(main: Object, mass: Object) -> None:
     assert obj.syms[3].name == "g_name"
     assert obj.syms[3].value == 0x236D
     assert obj.syms[3].seg == 1
+
+
+def test_index_segments() -> None:
+    segs = [Segment(".text", 0, 0, "RP"), Segment(".data", 0, 0, "RWP"), Segment(".text", 0, 0, "RP")]
+    assert index_segments(segs) == {".text": 0, ".data": 1}
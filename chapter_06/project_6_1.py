@@ -2,14 +2,17 @@
 Project 6.1
 """
 
+import os
 import sys
+from functools import partial
 from pathlib import Path
-from typing import Iterator
+from typing import Iterable, Iterator
 from typing_extensions import Annotated
 
 import typer
 from linker import Object, Symbol, read_object, write_object
 from linker.errors import LinkError
+from linker.utils import map_ordered
 
 
 def defined_syms(obj: Object) -> Iterator[Symbol]:
@@ -57,24 +60,197 @@ def create_library(objs: list[Object], path: Path) -> None:
         fh.write("\n".join(map_lines))
 
 
+def copy_member(output: Path, path: Path) -> tuple[str, list[str]]:
+    """
+    Read an object file and write it to a library, this runs in the worker processes.
+
+    :param output: The directory of the library.
+    :param path: The object file.
+    :return: The name of the member and the symbols it defines.
+    """
+    obj = read_object(path)
+    write_object(obj, output / obj.name)
+    return obj.name, [sym.name for sym in defined_syms(obj)]
+
+
+def build_library(inputs: list[Path], output: Path, jobs: int = 1) -> None:
+    """
+    Build a library from object files.
+
+    The object files are parsed and written by `jobs` worker processes, the map is written in the order of the inputs
+    once all of the members are written.
+
+    :param inputs: The object files.
+    :param output: The directory of the library.
+    :param jobs: The number of processes parsing and writing the objects.
+    :raises LinkError: If two objects have the same name or a symbol is multiply defined.
+    """
+    names: set[str] = set()
+    for path in inputs:
+        if path.stem in names:
+            raise LinkError(f"duplicate member: {path.stem}")
+        names.add(path.stem)
+    modules: dict[str, list[str]] = {}
+    try:
+        for name, syms in map_ordered(partial(copy_member, output), inputs, jobs):
+            modules[name] = syms
+        check_symbols(modules)
+    except BaseException:
+        for name in names:
+            (output / name).unlink(missing_ok=True)
+        raise
+    write_map(output, modules)
+
+
+def read_map(path: Path) -> dict[str, list[str]]:
+    """
+    Read the map of a library.
+
+    :param path: The directory of the library.
+    :return: The symbols defined by each member, in the order of the map.
+    """
+    modules: dict[str, list[str]] = {}
+    with open(path / "MAP", mode="r", encoding="ascii") as fh:
+        for line in fh:
+            parts = line.split()
+            if parts:
+                modules[parts[0]] = parts[1:]
+    return modules
+
+
+def write_map(path: Path, modules: dict[str, list[str]]) -> None:
+    """
+    Write the map of a library.
+
+    The map is written to a temporary file that replaces the map, so the library is never left with a partial map.
+
+    :param path: The directory of the library.
+    :param modules: The symbols defined by each member.
+    """
+    tmp = path / "MAP.tmp"
+    with open(tmp, mode="w", encoding="ascii") as fh:
+        fh.write("\n".join(" ".join([name, *syms]) for name, syms in modules.items()))
+    os.replace(tmp, path / "MAP")
+
+
+def check_symbols(modules: dict[str, list[str]]) -> None:
+    """
+    Check that each symbol is defined by only one member.
+
+    :param modules: The symbols defined by each member.
+    :raises LinkError: If a symbol is multiply defined.
+    """
+    syms: set[str] = set()
+    for names in modules.values():
+        for name in names:
+            if name in syms:
+                raise LinkError(f"multiply defined symbol: {name}")
+            syms.add(name)
+
+
+def update_library(objs: list[Object], path: Path, replace_existing: bool = False) -> None:
+    """
+    Add the objects to a library, or replace the members with the same names.
+
+    Only the members that change and the map are written.
+
+    :param objs: The objects to add.
+    :param path: The directory of the library.
+    :param replace_existing: Replace existing members rather than adding new ones.
+    :raises LinkError: If a member exists when adding or doesn't when replacing, or if a symbol is multiply defined.
+    """
+    modules = read_map(path)
+    for obj in objs:
+        if replace_existing and obj.name not in modules:
+            raise LinkError(f"no such member: {obj.name}")
+        if not replace_existing and obj.name in modules:
+            raise LinkError(f"member already exists: {obj.name}")
+        modules[obj.name] = [sym.name for sym in defined_syms(obj)]
+    check_symbols(modules)
+    for obj in objs:
+        write_object(obj, path / obj.name)
+    write_map(path, modules)
+
+
+def delete_members(names: Iterable[str], path: Path) -> None:
+    """
+    Delete members from a library.
+
+    :param names: The names of the members.
+    :param path: The directory of the library.
+    :raises LinkError: If a member doesn't exist.
+    """
+    modules = read_map(path)
+    names = list(names)
+    for name in names:
+        if modules.pop(name, None) is None:
+            raise LinkError(f"no such member: {name}")
+    write_map(path, modules)
+    for name in names:
+        (path / name).unlink(missing_ok=True)
+
+
 if __name__ == "__main__":
+    app = typer.Typer()
 
-    def main(
+    @app.command()
+    def create(
         inputs: list[Path],
         output: Annotated[Path, typer.Option(help="output directory path")],
+        jobs: Annotated[int, typer.Option(help="number of processes used to read the inputs")] = 1,
     ) -> None:
         """
         Link the input objects into a library.
 
         :param inputs: The input objects.
         :param output: The output directory.
+        :param jobs: The number of processes used to read and write the inputs.
         """
         try:
             if output.exists():
                 raise LinkError("directory already exists")
             output.mkdir()
-            create_library(list(map(read_object, inputs)), output)
+            build_library(inputs, output, jobs)
+        except LinkError as err:
+            sys.exit(f"error: {err}")
+
+    @app.command()
+    def add(library: Path, inputs: list[Path]) -> None:
+        """
+        Add the input objects to a library.
+
+        :param library: The library directory.
+        :param inputs: The input objects.
+        """
+        try:
+            update_library(list(map(read_object, inputs)), library)
+        except LinkError as err:
+            sys.exit(f"error: {err}")
+
+    @app.command()
+    def replace(library: Path, inputs: list[Path]) -> None:
+        """
+        Replace the members of a library with the input objects of the same names.
+
+        :param library: The library directory.
+        :param inputs: The input objects.
+        """
+        try:
+            update_library(list(map(read_object, inputs)), library, replace_existing=True)
+        except LinkError as err:
+            sys.exit(f"error: {err}")
+
+    @app.command()
+    def delete(library: Path, members: list[str]) -> None:
+        """
+        Delete members from a library.
+
+        :param library: The library directory.
+        :param members: The names of the members.
+        """
+        try:
+            delete_members(members, library)
         except LinkError as err:
             sys.exit(f"error: {err}")
 
-    typer.run(main)
+    app()
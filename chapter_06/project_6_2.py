@@ -1,12 +1,17 @@
+from collections import deque
 from dataclasses import dataclass
+from functools import partial
 from itertools import chain
 from pathlib import Path
 from typing_extensions import Annotated
-from typing import Iterator, Iterable
+from typing import Iterator, Iterable, Optional
 
 import typer
-from linker import Object, Segment, write_object, Symbol, read_object, roundup
-from linker.errors import LinkError
+from linker import Object, Segment, write_object, Symbol, read_object, read_objects, roundup
+from linker.cache import ObjectCache
+from linker.names import NAMES
+from linker.session import LinkSession
+from linker.symtab import SymbolTable
 
 from chapter_04.project_4_3 import (
     create_common_segment,
@@ -33,33 +38,22 @@ def iter_undefined_symbols(symbols: Iterable[Symbol]) -> Iterator[Symbol]:
 
 
 def split_objects_and_libraries(
-    paths: Iterable[Path],
+    paths: Iterable[Path], jobs: int = 1, cache: Optional[ObjectCache] = None
 ) -> tuple[list[Object], list[Path]]:
-    objects: list[Object] = []
+    objects: list[Path] = []
     directories: list[Path] = []
     for path in paths:
         if path.is_dir():
             directories.append(path)
         else:
-            objects.append(read_object(path))
-    return objects, directories
-
-
-def add_symbols(symtab: dict[str, Symbol], symbols: Iterable[Symbol]) -> None:
-    for symbol in symbols:
-        existing_symbol = symtab.get(symbol.name)
-        if existing_symbol:
-            if is_defined_symbol(existing_symbol):
-                if is_defined_symbol(symbol):
-                    raise LinkError(f"multiply defined symbol: {symbol.name}")
-            elif is_defined_symbol(symbol):
-                symtab[symbol.name] = symbol
+            objects.append(path)
+    return read_objects(objects, jobs, lazy=True, cache=cache), directories
 
 
 @dataclass
 class Module:
     name: str
-    symbols: list[str]
+    symbols: list[int]
 
 
 def read_map(library: Path) -> list[Module]:
@@ -67,41 +61,101 @@ def read_map(library: Path) -> list[Module]:
     with open(library / "MAP", mode="r", encoding="ascii") as fh:
         for line in fh:
             parts = line.split()
-            modules.append(Module(parts[0], parts[1:]))
+            modules.append(Module(parts[0], [NAMES.intern(name) for name in parts[1:]]))
     return modules
 
 
-def resolve_undefined_symbols(symtab: dict[str, Symbol], libs: Iterable[Path]) -> list[Object]:
+def index_libraries(libs: Iterable[Path], session: Optional[LinkSession] = None) -> dict[int, tuple[Path, Module]]:
+    """
+    Index the library members by the symbols they define.
+
+    :param libs: The libraries in the order they are searched.
+    :param session: The session keeping the maps read by earlier links.
+    :return: The library and member defining each symbol, by the id of its name, the first definition wins.
+    """
+    index: dict[int, tuple[Path, Module]] = {}
+    for lib in libs:
+        modules = session.index(lib / "MAP", partial(read_map, lib)) if session else read_map(lib)
+        for module in modules:
+            for symbol in module.symbols:
+                index.setdefault(symbol, (lib, module))
+    return index
+
+
+def merge_symbols(symtab: SymbolTable, symbols: Iterable[Symbol]) -> Iterator[int]:
+    """
+    Merge the symbols of a library member in to the symbol table.
+
+    :param symtab: The symbol table.
+    :param symbols: The symbols of the member.
+    :return: An iterator over the ids of the names that are referenced for the first time.
+    :raises LinkError: If a symbol is multiply defined.
+    """
+    for symbol in symbols:
+        is_new = symtab.lookup(symbol) is None
+        symtab.merge(symbol)
+        if is_new and is_undefined_symbol(symbol):
+            yield symbol.id
+
+
+def resolve_undefined_symbols(
+    symtab: SymbolTable,
+    libs: Iterable[Path],
+    cache: Optional[ObjectCache] = None,
+    session: Optional[LinkSession] = None,
+) -> list[Object]:
+    """
+    Pull in the library members that define the undefined symbols.
+
+    The directories are indexed once, then a worklist of the undefined names is processed so each member is read at
+    most once, including the members needed by the members that are pulled in.
+
+    :param symtab: The symbol table.
+    :param libs: The libraries in the order they are searched.
+    :param cache: The cache of parsed objects.
+    :param session: The session caching the maps and parsed members.
+    :return: The library members pulled in.
+    """
+    index = index_libraries(libs, session)
+    worklist = deque(symbol.id for symbol in symtab.values() if is_undefined_symbol(symbol))
+    pulled: set[Path] = set()
     objects: list[Object] = []
-    while True:
-        added = False
-        for lib in libs:
-            modules = read_map(lib)
-            for module in modules:
-                for symbol in module.symbols:
-                    existing_symbol = symtab.get(symbol)
-                    if existing_symbol and is_undefined_symbol(existing_symbol):
-                        path = lib / module.name
-                        obj = read_object(path)
-                        add_symbols(symtab, obj.syms)
-                        objects.append(obj)
-                        added = True
-                        break
-        if not added:
-            break
+    while worklist:
+        name_id = worklist.popleft()
+        existing_symbol = symtab.by_id(name_id)
+        entry = index.get(name_id)
+        if existing_symbol is None or not is_undefined_symbol(existing_symbol) or entry is None:
+            continue
+        lib, module = entry
+        path = lib / module.name
+        if path in pulled:
+            continue
+        pulled.add(path)
+        obj = session.read_object(path) if session else read_object(path, lazy=True, cache=cache)
+        worklist.extend(merge_symbols(symtab, obj.syms))
+        objects.append(obj)
     return objects
 
 
-def link(inputs: Iterable[Path], path: Path) -> Object:
-    objs, libs = split_objects_and_libraries(inputs)
+def link(
+    inputs: Iterable[Path],
+    path: Path,
+    jobs: int = 1,
+    cache: Optional[ObjectCache] = None,
+    session: Optional[LinkSession] = None,
+) -> Object:
+    objs, libs = split_objects_and_libraries(inputs, jobs, cache)
     symtab = create_symbol_table(iter_syms(objs))
-    objs.extend(resolve_undefined_symbols(symtab, libs))
+    objs.extend(resolve_undefined_symbols(symtab, libs, cache, session))
     common_seg = create_common_segment(symtab.values())
     names = group_segments_by_name(chain(iter_segs(objs), [common_seg]))
     types = group_segments_by_type(names, make_default_groups())
     segs: list[Segment] = []
     segs.extend(link_group(types["text"], names, 0x1000, "RP"))
     segs.extend(link_group(types["data"], names, roundup(segs[-1].end, 0x1000), "RWP"))
+    if cache is not None:
+        # The inputs are read lazily, so they are only cached now their data has been loaded.
+        cache.flush()
     return Object(path.stem, segs, list(symtab.values()), [])
 
 
@@ -110,13 +164,20 @@ if __name__ == "__main__":  # pragma: no cover
     def main(
         inputs: list[Path],
         output: Annotated[Path, typer.Option(help="output object file")],
+        jobs: Annotated[int, typer.Option(help="number of processes used to read the inputs")] = 1,
+        cache_dir: Annotated[Optional[Path], typer.Option(help="directory to cache parsed objects")] = None,
     ) -> None:
         """
         Link a list of objects and libraries.
 
         :param inputs: The list of objects/libraries to link.
         :param output: The path to write the linked object to.
+        :param jobs: The number of processes used to read the inputs.
+        :param cache_dir: The directory to cache parsed objects.
         """
-        write_object(link(inputs, output), output)
+        cache = ObjectCache(cache_dir) if cache_dir else None
+        write_object(link(inputs, output, jobs, cache), output)
+        if cache:
+            typer.echo(cache.summary(), err=True)
 
     typer.run(main)
@@ -1,74 +1,453 @@
+import io
+import os
 import sys
 from pathlib import Path
-from typing import Iterator
+from functools import partial
+from itertools import chain
+from typing import AbstractSet, BinaryIO, Iterable, Iterator, NamedTuple, Optional, Sequence
 from typing_extensions import Annotated
 
 import typer
 from linker import Object, Symbol, read_object
-from linker.writer import dump_object
+from linker.library import (
+    COMPRESSORS,
+    Compression,
+    Library,
+    Member,
+    dump_dependencies,
+    dump_directory_entry,
+    dump_hash_table,
+)
+from linker.utils import map_ordered
+from linker.writer import dump_object_chunked
 from linker.errors import LinkError
 
 
-def update_symbol_table(symbol_table: dict[str, Symbol], obj: Object) -> None:
-    for sym in obj.syms:
-        if "D" in sym.type:
-            assert sym.name not in symbol_table
-            symbol_table[sym.name] = sym
-
-
 def iter_defined_symbols(obj: Object) -> Iterator[Symbol]:
     for sym in obj.syms:
         if "D" in sym.type:
             yield sym
 
 
-def dump_module(offsets: dict[str, tuple[int, int]], obj: Object) -> str:
-    offset = offsets[obj.name]
-    parts = [str(offset[0]), str(offset[1])]
-    for sym in iter_defined_symbols(obj):
-        parts.append(sym.name)
-    return " ".join(parts) + "\n"
+def referenced_names(obj: Object) -> list[str]:
+    return [sym.name for sym in obj.syms if "U" in sym.type]
 
 
-def create_library(objects: list[Object], output: Path) -> None:
-    lines = [f"LIBRARY {len(objects)} {0:08x}\n"]
-    offset = len(lines[0])
-    symbol_table: dict[str, Symbol] = {}
-    module_offsets: dict[str, tuple[int, int]] = {}
-    for obj in objects:
-        update_symbol_table(symbol_table, obj)
-        obj_str = dump_object(obj) + "\n"
-        module_offsets[obj.name] = (offset, len(obj_str))
-        offset += len(obj_str)
-        lines.append(obj_str)
+def library_header(count: int, offset: int) -> str:
+    return f"LIBRARY {count} {offset:08x}\n"
+
+
+class SerializedMember(NamedTuple):
+    """
+    An object dumped as a library member, with the symbols it defines and references.
+    """
+
+    contents: bytes
+    compression: Compression
+    size: int
+    symbols: list[str]
+    references: list[str]
+
+
+def serialize_object(obj: Object, compression: Compression = Compression.NONE) -> SerializedMember:
+    """
+    Dump an object as a library member.
+
+    :param obj: The object.
+    :param compression: How to store the object.
+    :return: The member.
+    """
+    chunks = [chunk.encode("ascii") for chunk in chain(dump_object_chunked(obj), ["\n"])]
+    size = sum(map(len, chunks))
+    if compression is Compression.NONE:
+        contents = b"".join(chunks)
+    else:
+        compressor = COMPRESSORS[compression]()
+        contents = b"".join([*map(compressor.compress, chunks), compressor.flush()])
+    symbols = [sym.name for sym in iter_defined_symbols(obj)]
+    return SerializedMember(contents, compression, size, symbols, referenced_names(obj))
 
-    lines[0] = f"LIBRARY {len(objects)} {offset:08x}\n"
+
+def serialize_file(compression: Compression, path: Path) -> SerializedMember:
+    """
+    Read an object file and dump it as a library member, this runs in the worker processes.
+
+    :param compression: How to store the object.
+    :param path: The object file.
+    :return: The member.
+    """
+    return serialize_object(read_object(path), compression)
+
+
+def write_serialized(fh: BinaryIO, member: SerializedMember, offset: int) -> Member:
+    length = fh.write(member.contents)
+    if member.compression is Compression.NONE:
+        return Member(offset, length, member.symbols)
+    return Member(offset, length, member.symbols, member.compression, member.size)
+
+
+def write_members(
+    fh: BinaryIO, objects: Iterable[Object], offset: int, compression: Compression = Compression.NONE
+) -> Iterator[Member]:
     for obj in objects:
-        mod_str = dump_module(module_offsets, obj)
-        offset += len(mod_str)
-        lines.append(mod_str)
+        member = write_serialized(fh, serialize_object(obj, compression), offset)
+        offset += member.length
+        yield member
+
+
+def write_directory(
+    fh: BinaryIO,
+    members: list[Member],
+    offset: int,
+    header_size: int,
+    hash_table: bool,
+    references: Optional[list[list[str]]] = None,
+) -> None:
+    """
+    Write the dependencies, hash table and directory at the end of the library, then point the header at the directory.
+
+    :param fh: The library, positioned at `offset`.
+    :param members: The directory entries.
+    :param offset: The offset of the end of the members.
+    :param header_size: The size of the header, which is rewritten in place.
+    :param hash_table: Write a hash table of the symbols before the directory.
+    :param references: The symbols referenced by each member, to write the dependencies of the members.
+    :raises LinkError: If the header would change size.
+    """
+    if references is not None:
+        offset += fh.write(dump_dependencies(members, references, offset).encode("ascii"))
+    if hash_table:
+        offset += fh.write(dump_hash_table(members, offset).encode("ascii"))
+    header = library_header(len(members), offset)
+    if len(header) != header_size:
+        raise LinkError("library is too large")
+    for member in members:
+        fh.write(dump_directory_entry(member).encode("ascii"))
+    fh.truncate()
+    fh.seek(0)
+    fh.write(header.encode("ascii"))
+
+
+def write_library(
+    output: Path,
+    serialized: Iterable[SerializedMember],
+    count: int,
+    hash_table: bool = False,
+    dependencies: bool = False,
+) -> None:
+    """
+    Write a library from members as they are dumped.
+
+    Each member is written as soon as it is available, only its directory entry is kept until the directory is written
+    at the end. The library is written to a temporary file that replaces `output` once it is complete.
+
+    :param output: The library.
+    :param serialized: The members, in order.
+    :param count: The number of members.
+    :param hash_table: Write a hash table of the symbols.
+    :param dependencies: Write the dependencies of the members.
+    :raises LinkError: If a symbol is multiply defined.
+    """
+    tmp = output.with_name(output.name + ".tmp")
+    try:
+        with open(tmp, mode="wb") as fh:
+            # The directory offset isn't known until the modules are written, the header has a fixed width so it can
+            # be rewritten in place.
+            offset = header_size = fh.write(library_header(count, 0).encode("ascii"))
+            members: list[Member] = []
+            references: list[list[str]] = []
+            symbols: set[str] = set()
+            for member in serialized:
+                for name in member.symbols:
+                    if name in symbols:
+                        raise LinkError(f"multiply defined symbol: {name}")
+                    symbols.add(name)
+                members.append(write_serialized(fh, member, offset))
+                references.append(member.references)
+                offset += members[-1].length
+            write_directory(fh, members, offset, header_size, hash_table, references if dependencies else None)
+        os.replace(tmp, output)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def create_library(
+    objects: list[Object],
+    output: Path,
+    hash_table: bool = False,
+    compression: Compression = Compression.NONE,
+    dependencies: bool = False,
+) -> None:
+    serialized = (serialize_object(obj, compression) for obj in objects)
+    write_library(output, serialized, len(objects), hash_table, dependencies)
+
+
+def build_library(
+    inputs: list[Path],
+    output: Path,
+    jobs: int = 1,
+    hash_table: bool = False,
+    compression: Compression = Compression.NONE,
+    dependencies: bool = False,
+) -> None:
+    """
+    Build a library from object files.
+
+    The object files are parsed and dumped by `jobs` worker processes and the members are written in the order of the
+    inputs as they are finished, so only a few members are held in memory at a time.
+
+    :param inputs: The object files.
+    :param output: The library.
+    :param jobs: The number of processes parsing and dumping the objects.
+    :param hash_table: Write a hash table of the symbols.
+    :param compression: How to store the members.
+    :param dependencies: Write the dependencies of the members.
+    :raises LinkError: If an object can't be parsed or a symbol is multiply defined.
+    """
+    serialized = map_ordered(partial(serialize_file, compression), inputs, jobs)
+    write_library(output, serialized, len(inputs), hash_table, dependencies)
+
+
+def live_references(lib: Library, objects: Iterable[Object], deleted: AbstractSet[int]) -> Optional[list[list[str]]]:
+    """
+    Return the symbols referenced by each member of a library after an update, if the library records them.
+
+    :param lib: The library.
+    :param objects: The objects appended to the library.
+    :param deleted: The indices of the members dropped from the library.
+    :return: The symbols referenced by each member, or `None` if the library doesn't record its dependencies.
+    """
+    references: list[list[str]] = []
+    for index in range(len(lib)):
+        dependencies = lib.dependencies(index)
+        if dependencies is None:
+            return None
+        if index not in deleted:
+            references.append([dependency.name for dependency in dependencies])
+    references.extend(map(referenced_names, objects))
+    return references
+
+
+def check_symbols(members: Iterable[Member]) -> None:
+    """
+    Check that each symbol is defined by only one member.
+
+    :param members: The directory entries.
+    :raises LinkError: If a symbol is multiply defined.
+    """
+    symbols: set[str] = set()
+    for member in members:
+        for name in member.symbols:
+            if name in symbols:
+                raise LinkError(f"multiply defined symbol: {name}")
+            symbols.add(name)
+
+
+def update_library(
+    path: Path,
+    objects: Sequence[Object],
+    deleted: AbstractSet[int] = frozenset(),
+    compression: Compression = Compression.NONE,
+) -> None:
+    """
+    Append objects to a library and drop members from its directory.
+
+    The new members, dependencies, hash table and directory are appended to the library and the header is rewritten to point at the
+    new directory, so the existing members are never moved and the old directory is only replaced once the new one is
+    complete. The space of deleted members and old directories is reclaimed by `compact_library`. If the number of
+    members no longer fits in the header the library is compacted instead.
+
+    :param path: The library.
+    :param objects: The objects to append.
+    :param deleted: The indices of the members to drop.
+    :param compression: How to store the objects.
+    :raises LinkError: If the library is invalid or a symbol is multiply defined.
+    """
+    with Library(path) as lib:
+        members = [member for index, member in enumerate(lib.members) if index not in deleted]
+        header_size = len(library_header(len(lib), lib.directory))
+        hash_table = lib.hash_table is not None
+        references = live_references(lib, objects, deleted)
+    check_symbols([*members, *(Member(0, 0, [sym.name for sym in iter_defined_symbols(obj)]) for obj in objects)])
+    if len(library_header(len(members) + len(objects), 0)) != header_size:
+        compact_library(path, objects, deleted, compression)
+        return
+    with open(path, mode="r+b") as fh:
+        offset = fh.seek(0, io.SEEK_END)
+        members.extend(write_members(fh, objects, offset, compression))
+        offset = fh.tell()
+        write_directory(fh, members, offset, header_size, hash_table, references)
+
+
+def compact_library(
+    path: Path,
+    objects: Sequence[Object] = (),
+    deleted: AbstractSet[int] = frozenset(),
+    compression: Compression = Compression.NONE,
+) -> None:
+    """
+    Rewrite a library with only its live members, reclaiming the space left by updates.
+
+    The members are copied without being parsed or decompressed and the library is replaced once the copy is complete.
 
-    with open(output, mode="w", encoding="ascii") as fh:
-        fh.writelines(lines)
+    :param path: The library.
+    :param objects: Objects to append to the library.
+    :param deleted: The indices of members to drop.
+    :param compression: How to store the objects.
+    :raises LinkError: If the library is invalid.
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    with Library(path) as lib:
+        live = [member for index, member in enumerate(lib.members) if index not in deleted]
+        count = len(live) + len(objects)
+        with open(tmp, mode="wb") as fh:
+            header_size = fh.write(library_header(count, 0).encode("ascii"))
+            members: list[Member] = []
+            offset = header_size
+            for member in live:
+                fh.write(lib.view[member.offset : member.offset + member.length])
+                members.append(member._replace(offset=offset))
+                offset += member.length
+            members.extend(write_members(fh, objects, offset, compression))
+            offset = fh.tell()
+            references = live_references(lib, objects, deleted)
+            write_directory(fh, members, offset, header_size, lib.hash_table is not None, references)
+    os.replace(tmp, path)
+
+
+def member_indices(lib: Library, names: Iterable[str]) -> Iterator[int]:
+    for name in names:
+        index = lib.lookup(name)
+        if index is not None:
+            yield index
+
+
+def replace_members(path: Path, objects: list[Object], compression: Compression = Compression.NONE) -> None:
+    """
+    Replace the members of a library that define any of the symbols defined by the objects.
+
+    Members of a file format library don't have names, so they are identified by the symbols they define.
+
+    :param path: The library.
+    :param objects: The objects to replace the members with.
+    :param compression: How to store the objects.
+    :raises LinkError: If no member defines the symbols of an object.
+    """
+    deleted: set[int] = set()
+    with Library(path) as lib:
+        for obj in objects:
+            indices = set(member_indices(lib, (sym.name for sym in iter_defined_symbols(obj))))
+            if not indices:
+                raise LinkError(f"no member to replace with {obj.name}")
+            deleted |= indices
+    update_library(path, objects, deleted, compression)
+
+
+def delete_members(path: Path, symbols: list[str]) -> None:
+    """
+    Delete the members of a library that define the symbols.
+
+    :param path: The library.
+    :param symbols: The symbols.
+    :raises LinkError: If a symbol isn't defined by the library.
+    """
+    with Library(path) as lib:
+        for name in symbols:
+            if lib.lookup(name) is None:
+                raise LinkError(f"no member defines {name}")
+        deleted = set(member_indices(lib, symbols))
+    update_library(path, [], deleted)
 
 
 if __name__ == "__main__":
+    app = typer.Typer()
 
-    def main(
+    @app.command()
+    def create(
         inputs: list[Path],
         output: Annotated[Path, typer.Option(help="output directory path")],
+        hash_table: Annotated[bool, typer.Option(help="add a hash table of the symbols to the library")] = False,
+        compress: Annotated[Compression, typer.Option(help="how to compress the members")] = Compression.NONE,
+        dependencies: Annotated[bool, typer.Option(help="record the dependencies of the members")] = False,
+        jobs: Annotated[int, typer.Option(help="number of processes used to read the inputs")] = 1,
     ) -> None:
         """
         Link the input objects into a library.
 
         :param inputs: The input objects.
         :param output: The output directory.
+        :param hash_table: Add a hash table of the symbols, so they can be looked up without reading the directory.
+        :param compress: How to compress the members.
+        :param dependencies: Record the symbols each member references and the members that define them.
+        :param jobs: The number of processes used to read and dump the inputs.
         """
         try:
             if output.exists():
                 raise LinkError("library already exists")
-            create_library(list(map(read_object, inputs)), output)
+            build_library(inputs, output, jobs, hash_table, compress, dependencies)
+        except LinkError as err:
+            sys.exit(f"error: {err}")
+
+    @app.command()
+    def add(
+        library: Path,
+        inputs: list[Path],
+        compress: Annotated[Compression, typer.Option(help="how to compress the members")] = Compression.NONE,
+    ) -> None:
+        """
+        Append the input objects to a library.
+
+        :param library: The library.
+        :param inputs: The input objects.
+        :param compress: How to compress the members.
+        """
+        try:
+            update_library(library, list(map(read_object, inputs)), compression=compress)
+        except LinkError as err:
+            sys.exit(f"error: {err}")
+
+    @app.command()
+    def replace(
+        library: Path,
+        inputs: list[Path],
+        compress: Annotated[Compression, typer.Option(help="how to compress the members")] = Compression.NONE,
+    ) -> None:
+        """
+        Replace the members of a library that define the symbols of the input objects.
+
+        :param library: The library.
+        :param inputs: The input objects.
+        :param compress: How to compress the members.
+        """
+        try:
+            replace_members(library, list(map(read_object, inputs)), compress)
+        except LinkError as err:
+            sys.exit(f"error: {err}")
+
+    @app.command()
+    def delete(library: Path, symbols: list[str]) -> None:
+        """
+        Delete the members of a library that define the symbols.
+
+        :param library: The library.
+        :param symbols: The symbols.
+        """
+        try:
+            delete_members(library, symbols)
+        except LinkError as err:
+            sys.exit(f"error: {err}")
+
+    @app.command()
+    def compact(library: Path) -> None:
+        """
+        Rewrite a library without the space left by deleted and replaced members.
+
+        :param library: The library.
+        """
+        try:
+            compact_library(library)
         except LinkError as err:
             sys.exit(f"error: {err}")
 
-    typer.run(main)
+    app()
@@ -1,14 +1,17 @@
-from dataclasses import dataclass
-import io
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from itertools import chain
 from pathlib import Path
 from typing_extensions import Annotated
-from typing import Iterator, Iterable
+from typing import Callable, Iterator, Iterable, NamedTuple, Optional
 
 import typer
-from linker import Object, Segment, write_object, Symbol, read_object, roundup
-from linker.parser import parse_object_from_str
-from linker.errors import LinkError
+from linker import Object, Segment, write_object, Symbol, read_objects, roundup
+from linker.cache import ObjectCache
+from linker.library import Library
+from linker.names import NAMES
+from linker.session import LinkSession
+from linker.symtab import SymbolTable
 
 from chapter_04.project_4_3 import (
     create_common_segment,
@@ -34,84 +37,183 @@ def iter_undefined_symbols(symbols: Iterable[Symbol]) -> Iterator[Symbol]:
     return filter(is_undefined_symbol, symbols)
 
 
-def read_lib(path: Path) -> str:
-    with open(path, mode="r", encoding="ascii") as fh:
-        return fh.read()
-
-
 def split_objects_and_libraries(
-    paths: Iterable[Path],
-) -> tuple[list[Object], list[str]]:
-    objects: list[Object] = []
-    libraries: list[str] = []
+    paths: Iterable[Path], jobs: int = 1, cache: Optional[ObjectCache] = None, session: Optional[LinkSession] = None
+) -> tuple[list[Object], list[Library]]:
+    objects: list[Path] = []
+    libraries: list[Library] = []
     for path in paths:
         if path.suffix == ".lib":
-            libraries.append(read_lib(path))
+            libraries.append(session.library(path) if session else Library(path))
+        else:
+            objects.append(path)
+    return read_objects(objects, jobs, cache=cache), libraries
+
+
+def find_member(libs: Iterable[Library], name: str) -> Optional[tuple[Library, int]]:
+    """
+    Find the library member that defines a symbol.
+
+    :param libs: The libraries in the order they are searched.
+    :param name: The symbol name.
+    :return: The library and member index of the first definition, or `None` if no library defines the symbol.
+    """
+    for lib in libs:
+        index = lib.lookup(name)
+        if index is not None:
+            return lib, index
+    return None
+
+
+# A library and the index of one of its members.
+Entry = tuple[Library, int]
+
+
+class Pull(NamedTuple):
+    """
+    A library member to pull in, with the member if it had to be read to find its references.
+    """
+
+    lib: Library
+    index: int
+    obj: Optional[Object]
+
+
+def plan_pulls(
+    symtab: SymbolTable, libs: list[Library], read_member: Callable[[Library, int], Object] = Library.read_member
+) -> list[Pull]:
+    """
+    Find the library members that define the undefined symbols, without reading the members of libraries that record
+    their dependencies, or their directory if they have a hash table.
+
+    A worklist of the undefined names is processed in the same order the members would be merged, a name is
+    looked up in the libraries unless a member of the same library references it and no earlier library defines it, then
+    the member recorded in the dependencies is pulled in without a lookup. The members of libraries that don't record
+    their dependencies are read to find the names they reference.
+
+    :param symtab: The symbol table.
+    :param libs: The libraries in the order they are searched.
+    :param read_member: The function used to read a member.
+    :return: The members to pull in, in the order they are merged.
+    """
+    positions = {lib: position for position, lib in enumerate(libs)}
+    known = {symbol.id for symbol in symtab.values()}
+    defined = {symbol.id for symbol in symtab.values() if not is_undefined_symbol(symbol)}
+    worklist: deque[tuple[int, Optional[Entry]]] = deque(
+        (symbol.id, None) for symbol in symtab.values() if is_undefined_symbol(symbol)
+    )
+    pulled: set[Entry] = set()
+    pulls: list[Pull] = []
+    while worklist:
+        name_id, hint = worklist.popleft()
+        if name_id in defined:
+            continue
+        if hint is not None and find_member(libs[: positions[hint[0]]], NAMES[name_id]) is None:
+            entry: Optional[Entry] = hint
+        else:
+            entry = find_member(libs, NAMES[name_id])
+        if entry is None or entry in pulled:
+            continue
+        pulled.add(entry)
+        lib, member_index = entry
+        dependencies = lib.member_dependencies(member_index)
+        obj = None
+        definitions: list[int]
+        references: list[tuple[int, Optional[Entry]]]
+        if dependencies is None:
+            obj = read_member(lib, member_index)
+            definitions = [symbol.id for symbol in obj.syms if is_defined_symbol(symbol)]
+            references = [(symbol.id, None) for symbol in obj.syms if is_undefined_symbol(symbol)]
         else:
-            objects.append(read_object(path))
-    return objects, libraries
-
-
-def add_symbols(symtab: dict[str, Symbol], symbols: Iterable[Symbol]) -> None:
-    for symbol in symbols:
-        existing_symbol = symtab.get(symbol.name)
-        if existing_symbol:
-            if is_defined_symbol(existing_symbol):
-                if is_defined_symbol(symbol):
-                    raise LinkError(f"multiply defined symbol: {symbol.name}")
-            elif is_defined_symbol(symbol):
-                symtab[symbol.name] = symbol
-
-
-@dataclass
-class Module:
-    offset: int
-    length: int
-    symbols: list[str]
-
-
-def read_map(library: str) -> list[Module]:
-    modules: list[Module] = []
-    buffer = io.StringIO(library)
-    directory_offset = int(buffer.readline().strip().split()[2], base=16)
-    directory_data = library[directory_offset:]
-    for line in directory_data.splitlines():
-        parts = line.strip().split()
-        modules.append(Module(int(parts[0]), int(parts[1]), parts[2:]))
-    return modules
-
-
-def resolve_undefined_symbols(symtab: dict[str, Symbol], libs: Iterable[str]) -> list[Object]:
-    objects: list[Object] = []
-    while True:
-        added = False
-        for lib in libs:
-            modules = read_map(lib)
-            for module in modules:
-                for symbol in module.symbols:
-                    existing_symbol = symtab.get(symbol)
-                    if existing_symbol and is_undefined_symbol(existing_symbol):
-                        obj_str = lib[module.offset : module.offset + module.length]
-                        obj = parse_object_from_str(obj_str, "")
-                        add_symbols(symtab, obj.syms)
-                        objects.append(obj)
-                        added = True
-                        break
-        if not added:
-            break
+            definitions = [NAMES.intern(name) for name in dependencies.symbols]
+            references = [
+                (NAMES.intern(dependency.name), None if dependency.member is None else (lib, dependency.member))
+                for dependency in dependencies.references
+            ]
+        defined.update(definitions)
+        known.update(definitions)
+        for reference in references:
+            if reference[0] not in known:
+                known.add(reference[0])
+                worklist.append(reference)
+        pulls.append(Pull(lib, member_index, obj))
+    return pulls
+
+
+def read_pulls(
+    pulls: list[Pull], jobs: int = 1, read_member: Callable[[Library, int], Object] = Library.read_member
+) -> list[Object]:
+    """
+    Read the library members to pull in.
+
+    The operating system is asked to start reading all of the members first, then the members are decompressed and
+    parsed by `jobs` threads.
+
+    :param pulls: The members to pull in.
+    :param jobs: The number of threads reading members.
+    :param read_member: The function used to read a member.
+    :return: The members in the same order.
+    """
+    for pull in pulls:
+        if pull.obj is None:
+            pull.lib.prefetch([pull.index])
+
+    def read(pull: Pull) -> Object:
+        return pull.obj if pull.obj is not None else read_member(pull.lib, pull.index)
+
+    if jobs <= 1 or len(pulls) <= 1:
+        return list(map(read, pulls))
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        return list(executor.map(read, pulls))
+
+
+def resolve_undefined_symbols(
+    symtab: SymbolTable, libs: Iterable[Library], jobs: int = 1, session: Optional[LinkSession] = None
+) -> list[Object]:
+    """
+    Pull in the library members that define the undefined symbols.
+
+    The members are found by `plan_pulls`, using the dependencies recorded in the libraries so a member is pulled in
+    with the members it needs in one step, then read together and merged in to the symbol table in order. Each member
+    is parsed at most once.
+
+    :param symtab: The symbol table.
+    :param libs: The libraries in the order they are searched.
+    :param jobs: The number of threads reading members.
+    :param session: The session caching the parsed members.
+    :return: The library members pulled in.
+    :raises LinkError: If a symbol is multiply defined.
+    """
+    read_member = session.read_member if session else Library.read_member
+    objects = read_pulls(plan_pulls(symtab, list(libs), read_member), jobs, read_member)
+    for obj in objects:
+        for symbol in obj.syms:
+            symtab.merge(symbol)
     return objects
 
 
-def link(inputs: Iterable[Path], path: Path) -> Object:
-    objs, libs = split_objects_and_libraries(inputs)
-    symtab = create_symbol_table(iter_syms(objs))
-    objs.extend(resolve_undefined_symbols(symtab, libs))
-    common_seg = create_common_segment(symtab.values())
-    names = group_segments_by_name(chain(iter_segs(objs), [common_seg]))
-    types = group_segments_by_type(names, make_default_groups())
-    segs: list[Segment] = []
-    segs.extend(link_group(types["text"], names, 0x1000, "RP"))
-    segs.extend(link_group(types["data"], names, roundup(segs[-1].end, 0x1000), "RWP"))
+def link(
+    inputs: Iterable[Path],
+    path: Path,
+    jobs: int = 1,
+    cache: Optional[ObjectCache] = None,
+    session: Optional[LinkSession] = None,
+) -> Object:
+    objs, libs = split_objects_and_libraries(inputs, jobs, cache, session)
+    try:
+        symtab = create_symbol_table(iter_syms(objs))
+        objs.extend(resolve_undefined_symbols(symtab, libs, jobs, session))
+        common_seg = create_common_segment(symtab.values())
+        names = group_segments_by_name(chain(iter_segs(objs), [common_seg]))
+        types = group_segments_by_type(names, make_default_groups())
+        segs: list[Segment] = []
+        segs.extend(link_group(types["text"], names, 0x1000, "RP"))
+        segs.extend(link_group(types["data"], names, roundup(segs[-1].end, 0x1000), "RWP"))
+    finally:
+        # The libraries of a session are kept open for the next link.
+        if session is None:
+            for lib in libs:
+                lib.close()
     return Object(path.stem, segs, list(symtab.values()), [])
 
 
@@ -120,13 +222,20 @@ if __name__ == "__main__":  # pragma: no cover
     def main(
         inputs: list[Path],
         output: Annotated[Path, typer.Option(help="output object file")],
+        jobs: Annotated[int, typer.Option(help="number of processes reading objects and threads reading members")] = 1,
+        cache_dir: Annotated[Optional[Path], typer.Option(help="directory to cache parsed objects")] = None,
     ) -> None:
         """
         Link a list of objects and libraries.
 
         :param inputs: The list of objects/libraries to link.
         :param output: The path to write the linked object to.
+        :param jobs: The number of processes reading the objects and threads reading the library members.
+        :param cache_dir: The directory to cache parsed objects.
         """
-        write_object(link(inputs, output), output)
+        cache = ObjectCache(cache_dir) if cache_dir else None
+        write_object(link(inputs, output, jobs, cache), output)
+        if cache:
+            typer.echo(cache.summary(), err=True)
 
     typer.run(main)
@@ -0,0 +1,75 @@
+from pathlib import Path
+
+import pytest
+
+from linker import Object, Segment, Symbol, read_object, write_object
+from linker.errors import LinkError
+
+from .project_6_1 import build_library, create_library, delete_members, read_map, update_library
+
+
+def make_object(name: str, symbols: list[str], data: bytes = b"x") -> Object:
+    obj = Object(name, [Segment(".text", 0, len(data), "RP")], [Symbol(sym, 0, 0, "D") for sym in symbols], [])
+    obj.segs[0].data = data
+    return obj
+
+
+@pytest.fixture
+def lib(tmp_path: Path) -> Path:
+    path = tmp_path / "lib"
+    path.mkdir()
+    create_library([make_object("a", ["main"]), make_object("b", ["foo", "bar"])], path)
+    return path
+
+
+def test_add_members(lib: Path) -> None:
+    update_library([make_object("c", ["baz"])], lib)
+    assert read_map(lib) == {"a": ["main"], "b": ["foo", "bar"], "c": ["baz"]}
+    assert read_object(lib / "c").syms[0].name == "baz"
+    with pytest.raises(LinkError, match="member already exists: c"):
+        update_library([make_object("c", ["qux"])], lib)
+    with pytest.raises(LinkError, match="multiply defined symbol: foo"):
+        update_library([make_object("d", ["foo"])], lib)
+    assert not (lib / "d").exists()
+
+
+def test_replace_members(lib: Path) -> None:
+    update_library([make_object("b", ["foo"], b"y")], lib, replace_existing=True)
+    assert read_map(lib) == {"a": ["main"], "b": ["foo"]}
+    assert read_object(lib / "b").segs[0].data == b"y"
+    with pytest.raises(LinkError, match="no such member: c"):
+        update_library([make_object("c", ["baz"])], lib, replace_existing=True)
+
+
+def test_delete_members(lib: Path) -> None:
+    delete_members(["a"], lib)
+    assert read_map(lib) == {"b": ["foo", "bar"]}
+    assert not (lib / "a").exists()
+    with pytest.raises(LinkError, match="no such member: a"):
+        delete_members(["a"], lib)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_build_library(tmp_path: Path, jobs: int) -> None:
+    inputs = []
+    for i in range(6):
+        inputs.append(tmp_path / f"m{i}.lk")
+        write_object(make_object(f"m{i}", [f"s{i}"], bytes([i])), inputs[-1])
+    output = tmp_path / "lib"
+    output.mkdir()
+    build_library(inputs, output, jobs)
+    assert read_map(output) == {f"m{i}": [f"s{i}"] for i in range(6)}
+    assert read_object(output / "m5").segs[0].data == b"\x05"
+
+
+def test_build_library_errors(tmp_path: Path) -> None:
+    inputs = [tmp_path / "a.lk", tmp_path / "b.lk"]
+    write_object(make_object("a", ["foo"]), inputs[0])
+    write_object(make_object("b", ["foo"]), inputs[1])
+    output = tmp_path / "lib"
+    output.mkdir()
+    with pytest.raises(LinkError, match="multiply defined symbol: foo"):
+        build_library(inputs, output, jobs=2)
+    assert list(output.iterdir()) == []
+    with pytest.raises(LinkError, match="duplicate member: a"):
+        build_library([inputs[0], inputs[0]], output)
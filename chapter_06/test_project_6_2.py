@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import pytest
+
+from linker import Object, Segment, Symbol, write_object
+from linker.cache import ObjectCache
+from linker.session import LinkSession
+
+from chapter_04.project_4_3 import create_symbol_table, iter_syms
+from .project_6_1 import create_library
+from .project_6_2 import link, resolve_undefined_symbols
+
+
+def make_object(name: str, defs: list[str], refs: list[str]) -> Object:
+    seg = Segment(".text", 0, 4, "RP")
+    seg.data = bytes(4)
+    syms = [Symbol(sym, 0, 0, "D") for sym in defs] + [Symbol(sym, 0, 0, "U") for sym in refs]
+    return Object(name, [seg], syms, [])
+
+
+@pytest.fixture
+def libs(tmp_path: Path) -> list[Path]:
+    lib1 = tmp_path / "lib1"
+    lib1.mkdir()
+    create_library(
+        [
+            make_object("z", ["z"], []),
+            make_object("a", ["a"], ["b"]),
+            make_object("b", ["b"], ["c"]),
+            make_object("c", ["c"], []),
+        ],
+        lib1,
+    )
+    lib2 = tmp_path / "lib2"
+    lib2.mkdir()
+    create_library([make_object("b2", ["b"], [])], lib2)
+    return [lib1, lib2]
+
+
+def test_resolve_undefined_symbols(libs: list[Path]) -> None:
+    symtab = create_symbol_table(iter_syms([make_object("main", ["main"], ["a"])]))
+    objs = resolve_undefined_symbols(symtab, libs)
+    assert [obj.name for obj in objs] == ["a", "b", "c"]
+    assert all("D" in sym.type for sym in symtab.values())
+
+
+def test_resolve_undefined_symbols_first_library_wins(libs: list[Path]) -> None:
+    symtab = create_symbol_table(iter_syms([make_object("main", ["main"], ["a", "b"])]))
+    objs = resolve_undefined_symbols(symtab, libs[::-1])
+    assert [obj.name for obj in objs] == ["a", "b2"]
+    assert "c" not in symtab
+
+
+def test_link(tmp_path: Path, libs: list[Path]) -> None:
+    main = tmp_path / "main.lk"
+    write_object(make_object("main", ["main"], ["a"]), main)
+    obj = link([main, *libs], tmp_path / "out.lk")
+    assert [sym.name for sym in obj.syms] == ["main", "a", "b", "c"]
+    assert obj.segs[0].size == 16
+
+
+def test_link_cache(tmp_path: Path, libs: list[Path]) -> None:
+    main = tmp_path / "main.lk"
+    write_object(make_object("main", ["main"], ["a"]), main)
+    first = link([main, *libs], tmp_path / "out.lk", cache=ObjectCache(tmp_path / "cache"))
+    cache = ObjectCache(tmp_path / "cache")
+    second = link([main, *libs], tmp_path / "out.lk", cache=cache)
+    assert first == second
+    assert (cache.hits, cache.misses) == (4, 0)
+
+
+def test_link_session(tmp_path: Path, libs: list[Path]) -> None:
+    main = tmp_path / "main.lk"
+    write_object(make_object("main", ["main"], ["a"]), main)
+    with LinkSession() as session:
+        first = link([main, *libs], tmp_path / "out.lk", session=session)
+        second = link([main, *libs], tmp_path / "out.lk", session=session)
+        assert first == second
+        assert [sym.name for sym in second.syms] == ["main", "a", "b", "c"]
+        assert (session.hits, session.misses) == (3, 3)
@@ -0,0 +1,190 @@
+from pathlib import Path
+
+import pytest
+
+from linker import Object, Segment, Symbol, write_object
+from linker.errors import LinkError
+from linker import library
+from linker.library import Compression, Library, Member
+
+from .project_6_3 import build_library, compact_library, create_library, delete_members, replace_members, update_library
+
+
+@pytest.fixture
+def objs() -> list[Object]:
+    a = Object("a", [Segment(".text", 0, 2, "RP")], [Symbol("main", 0, 0, "D"), Symbol("foo", 0, 0, "U")], [])
+    a.segs[0].data = b"hi"
+    b = Object(
+        "b",
+        [Segment(".text", 0, 4, "RP"), Segment(".bss", 4, 10, "RW")],
+        [Symbol("foo", 0, 0, "D"), Symbol("bar", 2, 0, "D")],
+        [],
+    )
+    b.segs[0].data = b"\x00\x01\x02\x03"
+    return [a, b]
+
+
+def test_create_library(tmp_path: Path, objs: list[Object]) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path)
+    assert path.read_text() == (
+        "LIBRARY 2 00000086\n"
+        "LINK\n1 2 0\n.text 0 2 RP\nmain 0 0 D\nfoo 0 0 U\n6869\n"
+        "LINK\n2 2 0\n.text 0 4 RP\n.bss 4 a RW\nfoo 0 0 D\nbar 2 0 D\n00010203\n"
+        "19 50 main\n"
+        "69 65 foo bar\n"
+    )
+
+
+def test_create_library_hash_table(tmp_path: Path, objs: list[Object], monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, hash_table=True)
+    reads: list[int] = []
+    parse = library.parse_library_directory
+
+    def count_reads(directory: bytes, size: int) -> list[Member]:
+        reads.append(size)
+        return parse(directory, size)
+
+    # Lookups and reads go through the hash table without reading the directory.
+    monkeypatch.setattr(library, "parse_library_directory", count_reads)
+    contents = path.read_text()
+    # Readers that don't know about the hash table go straight to the directory.
+    directory = int(contents.splitlines()[0].split()[2], base=16)
+    assert contents[directory:] == "19 50 main\n69 65 foo bar\n"
+    with Library(path) as lib:
+        assert [lib.lookup(name) for name in ["main", "foo", "bar", "baz"]] == [0, 1, 1, None]
+        assert lib.read_member(1).syms == objs[1].syms
+        assert reads == []
+
+
+def make_object(name: str, symbol: str, data: bytes = b"x") -> Object:
+    obj = Object(name, [Segment(".text", 0, len(data), "RP")], [Symbol(symbol, 0, 0, "D")], [])
+    obj.segs[0].data = data
+    return obj
+
+
+def library_symbols(path: Path) -> list[list[str]]:
+    with Library(path) as lib:
+        return [member.symbols for member in lib.members]
+
+
+@pytest.mark.parametrize("hash_table", [False, True])
+def test_update_library(tmp_path: Path, objs: list[Object], hash_table: bool) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, hash_table)
+    contents = path.read_bytes()
+    size = len(contents)
+    update_library(path, [make_object("c", "baz", b"c")])
+    # The existing members aren't moved.
+    assert path.read_bytes()[19:size] == contents[19:]
+    assert library_symbols(path) == [["main"], ["foo", "bar"], ["baz"]]
+    with Library(path) as lib:
+        assert (lib.hash_table is not None) == hash_table
+        assert lib.lookup("baz") == 2
+        assert lib.read_member(2).segs[0].data == b"c"
+        assert lib.read_member(1).syms == objs[1].syms
+
+
+def test_update_library_multiply_defined(tmp_path: Path, objs: list[Object]) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path)
+    contents = path.read_bytes()
+    with pytest.raises(LinkError, match="multiply defined symbol: foo"):
+        update_library(path, [make_object("c", "foo")])
+    assert path.read_bytes() == contents
+
+
+@pytest.mark.parametrize("hash_table", [False, True])
+def test_replace_members(tmp_path: Path, objs: list[Object], hash_table: bool) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, hash_table)
+    replace_members(path, [make_object("b2", "foo", b"new")])
+    assert library_symbols(path) == [["main"], ["foo"]]
+    with Library(path) as lib:
+        assert lib.lookup("bar") is None
+        assert lib.read_member(lib.lookup("foo")).segs[0].data == b"new"
+    with pytest.raises(LinkError, match="no member to replace with c"):
+        replace_members(path, [make_object("c", "baz")])
+
+
+def test_delete_members(tmp_path: Path, objs: list[Object]) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path)
+    delete_members(path, ["bar"])
+    assert library_symbols(path) == [["main"]]
+    with pytest.raises(LinkError, match="no member defines bar"):
+        delete_members(path, ["bar"])
+
+
+@pytest.mark.parametrize("hash_table", [False, True])
+def test_compact_library(tmp_path: Path, objs: list[Object], hash_table: bool) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, hash_table)
+    contents = path.read_bytes()
+    update_library(path, [make_object("c", "baz", b"c")])
+    delete_members(path, ["baz"])
+    assert path.stat().st_size > len(contents)
+    compact_library(path)
+    assert path.read_bytes() == contents
+
+
+def test_update_library_header_grows(tmp_path: Path) -> None:
+    path = tmp_path / "many.lib"
+    create_library([make_object(f"o{i}", f"s{i}") for i in range(9)], path)
+    update_library(path, [make_object("o9", "s9")])
+    expected = tmp_path / "expected.lib"
+    create_library([make_object(f"o{i}", f"s{i}") for i in range(10)], expected)
+    assert path.read_bytes() == expected.read_bytes()
+
+
+@pytest.mark.parametrize("compression", [Compression.ZLIB, Compression.LZMA])
+def test_create_library_compressed(tmp_path: Path, objs: list[Object], compression: Compression) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, compression=compression)
+    update_library(path, [make_object("c", "baz", b"c")], compression=compression)
+    delete_members(path, ["main"])
+    compact_library(path)
+    with Library(path) as lib:
+        assert [member.compression for member in lib.members] == [compression, compression]
+        assert lib.read_member(0).syms == objs[1].syms
+        assert lib.read_member(1).segs[0].data == b"c"
+
+
+def test_update_library_dependencies(tmp_path: Path, objs: list[Object]) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, hash_table=True, dependencies=True)
+    with Library(path) as lib:
+        assert [lib.dependencies(i) for i in range(2)] == [[("foo", 1)], []]
+    c = make_object("c", "baz")
+    c.syms.append(Symbol("main", 0, 0, "U"))
+    update_library(path, [c])
+    delete_members(path, ["bar"])
+    with Library(path) as lib:
+        assert [lib.dependencies(i) for i in range(2)] == [[("foo", None)], [("main", 0)]]
+    compact_library(path)
+    with Library(path) as lib:
+        assert [lib.dependencies(i) for i in range(2)] == [[("foo", None)], [("main", 0)]]
+        assert lib.lookup("baz") == 1
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+@pytest.mark.parametrize("compression", [Compression.NONE, Compression.ZLIB])
+def test_build_library(tmp_path: Path, jobs: int, compression: Compression) -> None:
+    objs = [make_object(f"m{i}", f"s{i}", bytes([i])) for i in range(12)]
+    inputs = []
+    for obj in objs:
+        inputs.append(tmp_path / f"{obj.name}.lk")
+        write_object(obj, inputs[-1])
+    create_library(objs, tmp_path / "expected.lib", True, compression, True)
+    build_library(inputs, tmp_path / "built.lib", jobs, True, compression, True)
+    assert (tmp_path / "built.lib").read_bytes() == (tmp_path / "expected.lib").read_bytes()
+
+
+def test_build_library_multiply_defined(tmp_path: Path) -> None:
+    inputs = [tmp_path / "a.lk", tmp_path / "b.lk"]
+    write_object(make_object("a", "foo"), inputs[0])
+    write_object(make_object("b", "foo"), inputs[1])
+    with pytest.raises(LinkError, match="multiply defined symbol: foo"):
+        build_library(inputs, tmp_path / "ab.lib", jobs=2)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["a.lk", "b.lk"]
@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import pytest
+
+from linker import Object, Segment, Symbol, write_object
+from linker.session import LinkSession
+from linker import library
+from linker.library import Compression, Library, Member
+
+from chapter_04.project_4_3 import create_symbol_table, iter_syms
+from .project_6_3 import create_library
+from .project_6_4 import link, plan_pulls, resolve_undefined_symbols
+
+
+def make_object(name: str, defs: list[str], refs: list[str]) -> Object:
+    seg = Segment(".text", 0, 4, "RP")
+    seg.data = bytes(4)
+    syms = [Symbol(sym, 0, 0, "D") for sym in defs] + [Symbol(sym, 0, 0, "U") for sym in refs]
+    return Object(name, [seg], syms, [])
+
+
+@pytest.fixture(
+    params=[
+        (False, Compression.NONE, False),
+        (True, Compression.NONE, False),
+        (False, Compression.ZLIB, False),
+        (True, Compression.LZMA, False),
+        (False, Compression.NONE, True),
+        (True, Compression.ZLIB, True),
+    ],
+    ids=["directory", "hash_table", "zlib", "lzma_hash_table", "dependencies", "zlib_hash_table_dependencies"],
+)
+def libs(tmp_path: Path, request: pytest.FixtureRequest) -> list[Path]:
+    lib1 = tmp_path / "lib1.lib"
+    create_library(
+        [
+            make_object("z", ["z"], []),
+            make_object("a", ["a"], ["b"]),
+            make_object("b", ["b"], ["c"]),
+            make_object("c", ["c"], []),
+        ],
+        lib1,
+        *request.param,
+    )
+    lib2 = tmp_path / "lib2.lib"
+    create_library([make_object("b2", ["b"], [])], lib2, *request.param)
+    return [lib1, lib2]
+
+
+def test_resolve_undefined_symbols(libs: list[Path]) -> None:
+    symtab = create_symbol_table(iter_syms([make_object("main", ["main"], ["a"])]))
+    objs = resolve_undefined_symbols(symtab, [Library(lib) for lib in libs])
+    assert [[sym.name for sym in obj.syms if "D" in sym.type] for obj in objs] == [["a"], ["b"], ["c"]]
+    assert all("D" in sym.type for sym in symtab.values())
+
+
+def test_resolve_undefined_symbols_first_library_wins(libs: list[Path]) -> None:
+    symtab = create_symbol_table(iter_syms([make_object("main", ["main"], ["a", "b"])]))
+    objs = resolve_undefined_symbols(symtab, [Library(lib) for lib in libs[::-1]])
+    assert [[sym.name for sym in obj.syms if "D" in sym.type] for obj in objs] == [["a"], ["b"]]
+    assert not objs[1].syms[1:]
+    assert "c" not in symtab
+
+
+def test_link(tmp_path: Path, libs: list[Path]) -> None:
+    main = tmp_path / "main.lk"
+    write_object(make_object("main", ["main"], ["a"]), main)
+    obj = link([main, *libs], tmp_path / "out.lk")
+    assert [sym.name for sym in obj.syms] == ["main", "a", "b", "c"]
+    assert obj.segs[0].size == 16
+
+
+def test_resolve_undefined_symbols_jobs(libs: list[Path]) -> None:
+    symtab = create_symbol_table(iter_syms([make_object("main", ["main"], ["a", "z"])]))
+    objs = resolve_undefined_symbols(symtab, [Library(lib) for lib in libs], jobs=4)
+    assert [[sym.name for sym in obj.syms if "D" in sym.type] for obj in objs] == [["a"], ["z"], ["b"], ["c"]]
+
+
+def test_plan_pulls_dependencies(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = tmp_path / "lib.lib"
+    objs = [make_object("a", ["a"], ["b", "printf"]), make_object("b", ["b"], ["c"]), make_object("c", ["c"], [])]
+    create_library(objs, path, hash_table=True, dependencies=True)
+    symtab = create_symbol_table(iter_syms([make_object("main", ["main", "c"], ["a"])]))
+    reads: list[int] = []
+    parse = library.parse_library_directory
+
+    def count_reads(directory: bytes, size: int) -> list[Member]:
+        reads.append(size)
+        return parse(directory, size)
+
+    monkeypatch.setattr(library, "parse_library_directory", count_reads)
+    with Library(path) as lib:
+        pulls = plan_pulls(symtab, [lib])
+        # The members are found from the dependencies and the hash table without reading them or the directory.
+        assert [(pull.index, pull.obj) for pull in pulls] == [(0, None), (1, None)]
+        assert lib.member_dependencies(0) == (["a"], [("b", 1), ("printf", None)])
+        assert reads == []
+
+
+def test_link_session(tmp_path: Path, libs: list[Path]) -> None:
+    main = tmp_path / "main.lk"
+    write_object(make_object("main", ["main"], ["a"]), main)
+    with LinkSession() as session:
+        first = link([main, *libs], tmp_path / "out.lk", session=session)
+        second = link([main, *libs], tmp_path / "out.lk", session=session)
+        assert first == second
+        assert [sym.name for sym in second.syms] == ["main", "a", "b", "c"]
+        assert (session.hits, session.misses) == (3, 3)
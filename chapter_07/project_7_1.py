@@ -0,0 +1,81 @@
+"""
+Project 7.1
+"""
+
+from itertools import chain
+from pathlib import Path
+from typing import Optional
+from typing_extensions import Annotated
+
+import typer
+from linker import Object, Segment, read_objects, roundup, write_object
+from linker.cache import ObjectCache
+from linker.relocate import Endian, relocate
+
+from chapter_04.project_4_3 import (
+    create_common_segment,
+    create_symbol_table,
+    group_segments_by_name,
+    group_segments_by_type,
+    iter_segs,
+    iter_syms,
+    link_group,
+    make_default_groups,
+)
+from chapter_05.project_5_2 import index_segments, resolve_symbols
+from chapter_05.project_5_3 import resolve_common_symbols
+
+
+def link(
+    objs: list[Object], path: Path, use_numpy: Optional[bool] = None, endian: Endian = Endian.LITTLE
+) -> Object:
+    """
+    Link a list of objects, applying their relocations.
+
+    :param objs: The list of objects to link.
+    :param path: The path to write the linked object to.
+    :param use_numpy: Apply the relocations with NumPy, by default NumPy is used if it's installed.
+    :param endian: The byte order of the target.
+    :return: The linked object.
+    """
+    symtab = create_symbol_table(iter_syms(objs))
+    common_seg = create_common_segment(symtab.values())
+    names = group_segments_by_name(chain(iter_segs(objs), [common_seg]))
+    types = group_segments_by_type(names, make_default_groups())
+    segs: list[Segment] = []
+    segs.extend(link_group(types["text"], names, 0x1000, "RP"))
+    segs.extend(link_group(types["data"], names, roundup(segs[-1].end, 0x1000), "RWP"))
+    segs.extend(link_group(types["bss"], names, segs[-1].end, "RW"))
+    index = index_segments(segs)
+    resolve_symbols(symtab.values(), segs, index)
+    resolve_common_symbols(symtab.values(), common_seg, index[common_seg.name])
+    relocate(objs, segs, symtab, use_numpy, endian)
+    return Object(path.stem, segs, list(symtab.values()), [])
+
+
+if __name__ == "__main__":  # pragma: no cover
+
+    def main(
+        inputs: list[Path],
+        output: Path,
+        jobs: Annotated[int, typer.Option(help="number of processes used to read the inputs")] = 1,
+        cache_dir: Annotated[Optional[Path], typer.Option(help="directory to cache parsed objects")] = None,
+        endian: Annotated[Endian, typer.Option(help="byte order of the target")] = Endian.LITTLE,
+    ) -> None:
+        """
+        Link a list of objects.
+
+        :param inputs: The list of objects to link.
+        :param output: The path to write the linked object to.
+        :param jobs: The number of processes used to read the inputs.
+        :param cache_dir: The directory to cache parsed objects.
+        :param endian: The byte order of the target.
+        """
+        cache = ObjectCache(cache_dir) if cache_dir else None
+        objs = read_objects(inputs, jobs, cache=cache)
+        obj = link(objs, output, endian=endian)
+        write_object(obj, output)
+        if cache:
+            typer.echo(cache.summary(), err=True)
+
+    typer.run(main)
@@ -0,0 +1,55 @@
+"""
+Project 7.2
+"""
+
+from pathlib import Path
+from typing import Optional
+from typing_extensions import Annotated
+
+import typer
+from linker import Object, read_objects, write_object
+from linker.cache import ObjectCache
+from linker.relocate import Endian
+
+from . import project_7_1
+
+
+def link(objs: list[Object], path: Path, use_numpy: Optional[bool] = None, endian: Endian = Endian.BIG) -> Object:
+    """
+    Link a list of objects for a big-endian target, applying their relocations.
+
+    :param objs: The list of objects to link.
+    :param path: The path to write the linked object to.
+    :param use_numpy: Apply the relocations with NumPy, by default NumPy is used if it's installed.
+    :param endian: The byte order of the target.
+    :return: The linked object.
+    """
+    return project_7_1.link(objs, path, use_numpy, endian)
+
+
+if __name__ == "__main__":  # pragma: no cover
+
+    def main(
+        inputs: list[Path],
+        output: Path,
+        jobs: Annotated[int, typer.Option(help="number of processes used to read the inputs")] = 1,
+        cache_dir: Annotated[Optional[Path], typer.Option(help="directory to cache parsed objects")] = None,
+        endian: Annotated[Endian, typer.Option(help="byte order of the target")] = Endian.BIG,
+    ) -> None:
+        """
+        Link a list of objects.
+
+        :param inputs: The list of objects to link.
+        :param output: The path to write the linked object to.
+        :param jobs: The number of processes used to read the inputs.
+        :param cache_dir: The directory to cache parsed objects.
+        :param endian: The byte order of the target.
+        """
+        cache = ObjectCache(cache_dir) if cache_dir else None
+        objs = read_objects(inputs, jobs, cache=cache)
+        obj = link(objs, output, endian=endian)
+        write_object(obj, output)
+        if cache:
+            typer.echo(cache.summary(), err=True)
+
+    typer.run(main)
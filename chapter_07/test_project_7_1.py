@@ -0,0 +1,138 @@
+import copy
+import random
+import re
+from pathlib import Path
+from struct import pack, unpack_from
+
+import pytest
+
+from linker import Object, Segment, Symbol
+from linker.errors import LinkError
+from linker.object import Relocation
+from linker.relocate import PREFIXES, Endian, has_numpy
+
+from .project_7_1 import link
+
+BACKENDS = [
+    pytest.param(False, id="python"),
+    pytest.param(True, id="numpy", marks=pytest.mark.skipif(not has_numpy(), reason="NumPy isn't installed")),
+]
+
+
+def make_segment(name: str, base: int, flags: str, data: bytes) -> Segment:
+    seg = Segment(name, base, len(data), flags)
+    seg.data = data
+    return seg
+
+
+@pytest.fixture(params=list(Endian))
+def endian(request: pytest.FixtureRequest) -> Endian:
+    return request.param
+
+
+@pytest.fixture
+def main(endian: Endian) -> Object:
+    text = pack(f"{PREFIXES[endian]}IIIIHH", 0x1000, 0x1000 - 8, 2, 0, 0, 0)
+    return Object(
+        "main",
+        [make_segment(".text", 0, "RP", text), make_segment(".data", 0x1000, "RWP", bytes(4))],
+        [Symbol("f", 0, 0, "U")],
+        [
+            Relocation(0, 0, 1, "A4"),
+            Relocation(4, 0, 1, "R4"),
+            Relocation(8, 0, 0, "AS4"),
+            Relocation(12, 0, 0, "RS4"),
+            Relocation(16, 0, 0, "U2"),
+            Relocation(18, 0, 0, "L2"),
+        ],
+    )
+
+
+@pytest.fixture
+def lib() -> Object:
+    return Object("lib", [make_segment(".text", 0, "RP", bytes(8))], [Symbol("f", 4, 0, "D")], [])
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_link_relocations(main: Object, lib: Object, use_numpy: bool, endian: Endian) -> None:
+    obj = link([main, lib], Path("a.lk"), use_numpy, endian)
+    assert obj.segs[0].base == 0x1000
+    assert obj.syms[0].value == 0x1018
+    assert unpack_from(f"{PREFIXES[endian]}IIIIHH", obj.segs[0].data) == (0x2000, 0xFF8, 0x101A, 8, 0, 0x1018)
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_link_undefined_symbol(main: Object, use_numpy: bool) -> None:
+    with pytest.raises(LinkError, match=re.escape("main: undefined symbol: f")):
+        link([main], Path("a.lk"), use_numpy)
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_link_relocation_out_of_range(main: Object, lib: Object, use_numpy: bool) -> None:
+    main.rels.add(18, 0, 1, "A4")
+    with pytest.raises(LinkError, match=re.escape("main: relocation out of range: 12")):
+        link([main, lib], Path("a.lk"), use_numpy)
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_link_unknown_relocation(main: Object, lib: Object, use_numpy: bool) -> None:
+    main.rels.add(0, 0, 1, "X8")
+    with pytest.raises(LinkError, match=re.escape("unknown relocation type: X8")):
+        link([main, lib], Path("a.lk"), use_numpy)
+
+
+def make_random_objects(seed: int, overlap: bool = False) -> list[Object]:
+    rng = random.Random(seed)
+    objs: list[Object] = []
+    for i in range(4):
+        text = make_segment(".text", 0, "RP", rng.randbytes(rng.randrange(8, 64)))
+        data = make_segment(".data", 0x1000, "RWP", rng.randbytes(rng.randrange(8, 64)))
+        syms = [Symbol(f"s{i}", rng.randrange(text.size), 0, "D"), Symbol(f"s{(i + 1) % 4}", 0, 0, "U")]
+        rels = []
+        # Unless they should overlap, each relocation gets its own word.
+        for seg_index, seg in enumerate([text, data]):
+            if overlap:
+                offsets = [rng.randrange(seg.size - 3) for _ in range(seg.size // 4)]
+            else:
+                offsets = [slot * 4 for slot in rng.sample(range(seg.size // 4), seg.size // 8)]
+            for offset in offsets:
+                kind = rng.choice(["A4", "R4", "AS4", "RS4", "U2", "L2"])
+                rels.append(Relocation(seg.base + offset, seg_index, rng.randrange(2), kind))
+        rng.shuffle(rels)
+        objs.append(Object(f"obj{i}", [text, data], syms, rels))
+    return objs
+
+
+@pytest.mark.skipif(not has_numpy(), reason="NumPy isn't installed")
+@pytest.mark.parametrize("seed", range(5))
+def test_link_backends_agree(seed: int, endian: Endian) -> None:
+    python = link(make_random_objects(seed), Path("a.lk"), use_numpy=False, endian=endian)
+    numpy = link(make_random_objects(seed), Path("a.lk"), use_numpy=True, endian=endian)
+    assert python.segs == numpy.segs
+
+
+@pytest.mark.skipif(not has_numpy(), reason="NumPy isn't installed")
+@pytest.mark.parametrize("seed", range(5))
+def test_link_backends_agree_with_overlaps(seed: int, endian: Endian) -> None:
+    python = link(make_random_objects(seed, overlap=True), Path("a.lk"), use_numpy=False, endian=endian)
+    numpy = link(make_random_objects(seed, overlap=True), Path("a.lk"), use_numpy=True, endian=endian)
+    assert python.segs == numpy.segs
+
+
+@pytest.mark.skipif(not has_numpy(), reason="NumPy isn't installed")
+def test_link_duplicate_relocations(main: Object, lib: Object, endian: Endian) -> None:
+    # Applied one at a time, the duplicate relocations each add their target to the word.
+    main.rels.add(0, 0, 1, "A4")
+    main.rels.add(8, 0, 0, "AS4")
+    objs = [main, lib]
+    numpy = link(copy.deepcopy(objs), Path("a.lk"), use_numpy=True, endian=endian)
+    python = link(objs, Path("a.lk"), use_numpy=False, endian=endian)
+    assert unpack_from(f"{PREFIXES[endian]}III", python.segs[0].data) == (0x3000, 0xFF8, 0x2032)
+    assert numpy.segs == python.segs
+
+
+@pytest.mark.parametrize("use_numpy", BACKENDS)
+def test_link_endians_differ(use_numpy: bool) -> None:
+    little = link(make_random_objects(0), Path("a.lk"), use_numpy, Endian.LITTLE)
+    big = link(make_random_objects(0), Path("a.lk"), use_numpy, Endian.BIG)
+    assert little.segs[0].data != big.segs[0].data
@@ -0,0 +1,15 @@
+from pathlib import Path
+from struct import unpack_from
+
+from linker import Object, Segment, Symbol
+from linker.object import Relocation
+
+from .project_7_2 import link
+
+
+def test_link_big_endian() -> None:
+    text = Segment(".text", 0, 8, "RP")
+    text.data = bytes.fromhex("00000004 00000000")
+    main = Object("main", [text], [Symbol("f", 4, 0, "D")], [Relocation(0, 0, 0, "A4"), Relocation(4, 0, 0, "AS4")])
+    obj = link([main], Path("a.lk"))
+    assert unpack_from(">II", obj.segs[0].data) == (0x1004, 0x1004)
@@ -0,0 +1,708 @@
+"""
+Project 11.1
+"""
+
+from collections import defaultdict
+from itertools import chain
+from pathlib import Path
+from typing import Iterable, Iterator, Mapping, NamedTuple, Optional, Union
+from typing_extensions import Annotated
+
+import typer
+from linker import Object, Segment, read_objects, roundup, write_object
+from linker.cache import ObjectCache
+from linker.errors import LinkError
+from linker.object import RelocationTable
+from linker.relocate import Endian, output_segments, relocate, relocation_type
+from linker.symtab import SymbolTable
+
+from chapter_04.project_4_3 import (
+    create_common_segment,
+    create_symbol_table,
+    get_group,
+    group_segments_by_name,
+    group_segments_by_type,
+    iter_syms,
+    link_group,
+    make_default_groups,
+)
+from chapter_05.project_5_2 import index_segments, resolve_symbols
+from chapter_05.project_5_3 import resolve_common_symbols
+
+# The segments of all the objects are numbered consecutively, an object's segments start at its base.
+Bases = dict[int, int]
+
+
+class Collection(NamedTuple):
+    """
+    The result of collecting the unreferenced segments.
+    """
+
+    live: list[Segment]
+    segments: int
+    size: int
+
+    def summary(self) -> str:
+        """
+        Return a summary of what was removed.
+
+        :return: the number of segments and bytes removed.
+        """
+        return f"gc-sections: removed {self.segments} segments, {self.size} bytes"
+
+
+def segment_bases(objs: Iterable[Object]) -> Bases:
+    """
+    Number the segments of the objects.
+
+    :param objs: the objects.
+    :return: the number of the first segment of each object, keyed by the id of the object.
+    """
+    bases: Bases = {}
+    count = 0
+    for obj in objs:
+        bases[id(obj)] = count
+        count += len(obj.segs)
+    return bases
+
+
+def definition_segment(name_id: int, symtab: SymbolTable, bases: Bases) -> Optional[int]:
+    """
+    Return the number of the segment that defines a symbol.
+
+    :param name_id: the id of the symbol's name.
+    :param symtab: the symbol table.
+    :param bases: the number of the first segment of each object.
+    :return: the segment number, or `None` if the symbol isn't defined in a segment of the objects.
+    """
+    sym = symtab.by_id(name_id)
+    if sym is None or "D" not in sym.type or sym.obj is None or id(sym.obj) not in bases:
+        return None
+    if not 0 <= sym.seg < len(sym.obj.segs):
+        return None
+    return bases[id(sym.obj)] + sym.seg
+
+
+def build_reference_graph(objs: list[Object], symtab: SymbolTable, bases: Bases) -> list[set[int]]:
+    """
+    Build the segment reference graph from the symbol table and relocations.
+
+    A relocation in a segment references the segment defining its symbol, or for segment relocations, a segment of the
+    same object. An object without relocations can't say where its references are, so each of its segments is taken
+    to reference every symbol the object uses.
+
+    :param objs: the objects.
+    :param symtab: the resolved symbol table.
+    :param bases: the number of the first segment of each object.
+    :return: the numbers of the segments referenced by each segment.
+    :raises LinkError: if a relocation type isn't supported.
+    """
+    graph: list[set[int]] = [set() for obj in objs for _ in obj.segs]
+    for obj in objs:
+        base = bases[id(obj)]
+        nsegs = len(obj.segs)
+        if not obj.rels:
+            used = {definition_segment(sym.id, symtab, bases) for sym in obj.syms if "U" in sym.type}
+            used.discard(None)
+            for seg in range(nsegs):
+                graph[base + seg] |= used
+            continue
+        symbolic = [relocation_type(name).symbolic for name in obj.rels.type_names]
+        for seg, ref, code in zip(obj.rels.segs, obj.rels.refs, obj.rels.types):
+            if seg >= nsegs:
+                continue
+            if not symbolic[code]:
+                if ref < nsegs:
+                    graph[base + seg].add(base + ref)
+            elif ref < len(obj.syms) and (target := definition_segment(obj.syms[ref].id, symtab, bases)) is not None:
+                graph[base + seg].add(target)
+    return graph
+
+
+def gc_roots(objs: list[Object], symtab: SymbolTable, bases: Bases, keep: Iterable[str]) -> list[int]:
+    """
+    Return the segments that are always kept.
+
+    Only text segments are collected, so data and bss segments are roots along with the segments defining the kept
+    symbols.
+
+    :param objs: the objects.
+    :param symtab: the resolved symbol table.
+    :param bases: the number of the first segment of each object.
+    :param keep: the names of the symbols to keep, such as the startup stub.
+    :return: the numbers of the root segments.
+    :raises LinkError: if there are no symbols to keep or a kept symbol isn't defined.
+    """
+    roots: list[int] = []
+    for name in keep:
+        sym = symtab.get(name)
+        target = None if sym is None else definition_segment(sym.id, symtab, bases)
+        if target is None:
+            raise LinkError(f"undefined symbol: {name}")
+        roots.append(target)
+    if not roots:
+        raise LinkError("no symbols to keep, everything would be collected")
+    for obj in objs:
+        base = bases[id(obj)]
+        roots.extend(base + i for i, seg in enumerate(obj.segs) if get_group(seg.flags) != "text")
+    return roots
+
+
+def mark_live(graph: list[set[int]], roots: Iterable[int]) -> bytearray:
+    """
+    Mark the segments reachable from the roots.
+
+    Each segment is visited once, so this is linear in the size of the graph. It keeps the same segments as
+    repeatedly deleting unreferenced segments until nothing more is deleted, except that it also deletes groups of
+    segments that only reference each other.
+
+    :param graph: the numbers of the segments referenced by each segment.
+    :param roots: the numbers of the root segments.
+    :return: a flag for each segment, set if the segment is live.
+    """
+    live = bytearray(len(graph))
+    worklist = list(roots)
+    while worklist:
+        seg = worklist.pop()
+        if live[seg]:
+            continue
+        live[seg] = 1
+        worklist.extend(ref for ref in graph[seg] if not live[ref])
+    return live
+
+
+def live_relocations(rels: RelocationTable, live: bytearray) -> RelocationTable:
+    """
+    Return the relocations in the live segments of an object.
+
+    Relocations in segments the object doesn't have are kept, so they are reported when relocating.
+
+    :param rels: the relocations of the object.
+    :param live: the live flag of each segment of the object.
+    :return: a new table of the relocations in live segments.
+    """
+    kept = RelocationTable()
+    for loc, seg, ref, code in zip(rels.locs, rels.segs, rels.refs, rels.types):
+        if seg >= len(live) or live[seg]:
+            kept.add(loc, seg, ref, rels.type_names[code])
+    return kept
+
+
+def collect_garbage(objs: list[Object], symtab: SymbolTable, keep: Iterable[str]) -> Collection:
+    """
+    Remove the text segments that can't be reached from the kept symbols.
+
+    The reference graph is built once and walked once. The symbols defined in the removed segments are removed from the
+    symbol table, and their relocations from the objects.
+
+    :param objs: the objects, their relocations are replaced if a segment is removed.
+    :param symtab: the resolved symbol table.
+    :param keep: the names of the symbols to keep.
+    :return: the live segments and the number and size of the segments removed.
+    :raises LinkError: if a kept symbol isn't defined.
+    """
+    bases = segment_bases(objs)
+    graph = build_reference_graph(objs, symtab, bases)
+    live = mark_live(graph, gc_roots(objs, symtab, bases, keep))
+    segs: list[Segment] = []
+    segments = size = 0
+    for obj in objs:
+        base = bases[id(obj)]
+        dead = {i for i in range(len(obj.segs)) if not live[base + i]}
+        segs.extend(seg for i, seg in enumerate(obj.segs) if live[base + i])
+        if not dead:
+            continue
+        segments += len(dead)
+        size += sum(obj.segs[i].size for i in dead)
+        obj.rels = live_relocations(obj.rels, live[base : base + len(obj.segs)])
+        for sym in obj.syms:
+            if "D" in sym.type and sym.seg in dead and symtab.lookup(sym) is sym:
+                del symtab[sym.name]
+    return Collection(segs, segments, size)
+
+
+class Folding(NamedTuple):
+    """
+    The result of folding identical segments.
+    """
+
+    live: list[Segment]
+    folds: list[tuple[Segment, Segment]]
+
+    @property
+    def size(self) -> int:
+        """
+        Return the number of bytes folded.
+        """
+        return sum(dup.size for dup, _ in self.folds)
+
+    def summary(self) -> str:
+        """
+        Return a summary of what was folded.
+
+        :return: the number of segments and bytes folded.
+        """
+        return f"icf: folded {len(self.folds)} segments, {self.size} bytes"
+
+
+# Where a relocation points, the number of a segment (or `None` for a symbol that isn't defined in a segment) and
+# what distinguishes it from other references to the same segment.
+RelocationTarget = tuple[Optional[int], int]
+
+
+def relocation_targets(
+    obj: Object, symtab: SymbolTable, bases: Bases
+) -> Iterator[tuple[int, int, str, RelocationTarget]]:
+    """
+    Yield where each relocation of an object points.
+
+    A symbol relocation points at the offset of the symbol in the segment that defines it, or at the name of a symbol
+    that isn't defined in a segment. The value a segment relocation stores depends on where the segments started in
+    the object, so it points at the segment and the offset between the segments.
+
+    :param obj: the object.
+    :param symtab: the resolved symbol table.
+    :param bases: the number of the first segment of each object.
+    :return: an iterator over the segment, offset, type and target of each relocation.
+    :raises LinkError: if a relocation type isn't supported.
+    """
+    base = bases[id(obj)]
+    symbolic = [relocation_type(name).symbolic for name in obj.rels.type_names]
+    for loc, seg, ref, code in zip(obj.rels.locs, obj.rels.segs, obj.rels.refs, obj.rels.types):
+        if seg >= len(obj.segs):
+            continue
+        oldbase = obj.segs[seg].oldbase
+        target: RelocationTarget
+        if not symbolic[code]:
+            target = (base + ref, obj.segs[ref].oldbase - oldbase) if ref < len(obj.segs) else (None, -1 - ref)
+        elif ref >= len(obj.syms):
+            target = (None, -1 - ref)
+        elif (defn := definition_segment(obj.syms[ref].id, symtab, bases)) is not None:
+            sym = symtab.by_id(obj.syms[ref].id)
+            assert sym is not None and sym.obj is not None
+            target = (defn, sym.value - sym.obj.segs[sym.seg].oldbase)
+        else:
+            target = (None, obj.syms[ref].id)
+        yield seg, loc - oldbase, obj.rels.type_names[code], target
+
+
+def fold_candidates(objs: list[Object], live: Iterable[Segment], bases: Bases) -> list[int]:
+    """
+    Return the segments that can be folded.
+
+    Live text segments with data can be folded, except those of an object that uses symbols without relocations as
+    its references can't be compared.
+
+    :param objs: the objects.
+    :param live: the live segments.
+    :param bases: the number of the first segment of each object.
+    :return: the numbers of the segments in link order.
+    """
+    live_ids = {id(seg) for seg in live}
+    candidates: list[int] = []
+    for obj in objs:
+        if not obj.rels and any("U" in sym.type for sym in obj.syms):
+            continue
+        base = bases[id(obj)]
+        candidates.extend(
+            base + i
+            for i, seg in enumerate(obj.segs)
+            if id(seg) in live_ids and get_group(seg.flags) == "text" and seg.size > 0
+        )
+    return candidates
+
+
+def fold_identical_segments(objs: list[Object], symtab: SymbolTable, live: list[Segment]) -> Folding:
+    """
+    Fold the live text segments with the same data and relocations in to one representative.
+
+    The segments are first grouped by their data and the offsets and types of their relocations. The groups are then
+    split by where the relocations point, with the segments numbered by their group, until no group is split. This
+    folds the segments that become identical once the segments they reference are folded, including segments that
+    reference each other, without repeating the comparison of the data.
+
+    The symbols defined in a folded segment are moved to its representative and its relocations are dropped, the first
+    segment of each group in link order is kept.
+
+    :param objs: the objects, their symbols and relocations are updated.
+    :param symtab: the resolved symbol table.
+    :param live: the live segments.
+    :return: the segments that are still live and each folded segment with its representative.
+    :raises LinkError: if a relocation type isn't supported.
+    """
+    bases = segment_bases(objs)
+    owners = [(obj, i) for obj in objs for i in range(len(obj.segs))]
+    candidates = fold_candidates(objs, live, bases)
+    relocations: dict[int, list[tuple[int, str, RelocationTarget]]] = {n: [] for n in candidates}
+    for obj in objs:
+        base = bases[id(obj)]
+        for seg, offset, type_name, target in relocation_targets(obj, symtab, bases):
+            if base + seg in relocations:
+                relocations[base + seg].append((offset, type_name, target))
+    for rels in relocations.values():
+        rels.sort()
+    # Segments that can't be folded are in a group of their own, numbered by the segment.
+    groups = list(range(len(owners)))
+    keys: dict[object, int] = {}
+    for n in candidates:
+        obj, i = owners[n]
+        shape = tuple((offset, type_name) for offset, type_name, _ in relocations[n])
+        groups[n] = len(owners) + keys.setdefault((bytes(obj.segs[i].data), shape), len(keys))
+    count = len(keys)
+    while True:
+        keys = {}
+        refined = groups.copy()
+        for n in candidates:
+            refs = tuple((None if seg is None else groups[seg], extra) for _, _, (seg, extra) in relocations[n])
+            refined[n] = len(owners) + keys.setdefault((groups[n], refs), len(keys))
+        groups = refined
+        if len(keys) == count:
+            break
+        count = len(keys)
+    representatives: dict[int, int] = {}
+    folded: dict[int, int] = {}
+    for n in candidates:
+        rep = representatives.setdefault(groups[n], n)
+        if rep != n:
+            folded[n] = rep
+    folds: list[tuple[Segment, Segment]] = []
+    for n, rep in folded.items():
+        (obj, i), (rep_obj, rep_i) = owners[n], owners[rep]
+        folds.append((obj.segs[i], rep_obj.segs[rep_i]))
+        offset = rep_obj.segs[rep_i].oldbase - obj.segs[i].oldbase
+        for sym in obj.syms:
+            if "D" in sym.type and sym.obj is obj and sym.seg == i:
+                sym.obj, sym.seg = rep_obj, rep_i
+                sym.value += offset
+    for obj in objs:
+        base = bases[id(obj)]
+        flags = bytearray(base + i not in folded for i in range(len(obj.segs)))
+        if not all(flags):
+            obj.rels = live_relocations(obj.rels, flags)
+    dropped = {id(dup) for dup, _ in folds}
+    return Folding([seg for seg in live if id(seg) not in dropped], folds)
+
+
+def place_folded_segments(folding: Folding) -> None:
+    """
+    Give each folded segment the address of its representative, once the live segments have been placed.
+
+    :param folding: the folded segments.
+    """
+    for dup, rep in folding.folds:
+        dup.base = rep.base
+
+
+PAGE_SIZE = 0x1000
+
+
+class ProfileEdge(NamedTuple):
+    """
+    The number of calls from one function to another in a profile.
+    """
+
+    caller: str
+    callee: str
+    count: int
+
+
+def read_profile(path: Path) -> list[ProfileEdge]:
+    """
+    Read a profile, each line has the name of the caller, the name of the callee and the number of calls.
+
+    Blank lines and lines starting with "#" are ignored.
+
+    :param path: path to the profile.
+    :return: the edges of the call graph.
+    :raises LinkError: if a line is invalid.
+    """
+    edges: list[ProfileEdge] = []
+    with open(path, mode="r", encoding="ascii") as fh:
+        for lineno, line in enumerate(fh, 1):
+            parts = line.split()
+            if not parts or parts[0].startswith("#"):
+                continue
+            try:
+                caller, callee, count = parts
+                edges.append(ProfileEdge(caller, callee, int(count)))
+            except ValueError:
+                raise LinkError(f"{path}:{lineno}: error: invalid profile entry: {line.strip()}") from None
+    return edges
+
+
+class Ordering(NamedTuple):
+    """
+    The result of ordering the text segments by a profile.
+    """
+
+    live: list[Segment]
+    outputs: dict[str, str]
+    hot: int
+    size: int
+    pages_before: int
+    pages_after: int
+
+    def summary(self) -> str:
+        """
+        Return a summary of the pages used by the hot segments.
+
+        :return: the number and size of the hot segments and the pages they span before and after ordering.
+        """
+        return (
+            f"profile: {self.hot} hot segments, {self.size} bytes, "
+            f"{self.pages_before} pages before, {self.pages_after} pages after"
+        )
+
+
+def hot_pages(segs: Iterable[Segment], hot: set[int], addr: int = 0x1000) -> int:
+    """
+    Return the number of pages spanned by the hot segments when the segments are placed in order.
+
+    The segments are placed as `link_group` places them, each aligned to four bytes.
+
+    :param segs: the segments in the order they are placed.
+    :param hot: the ids of the hot segments.
+    :param addr: the address of the first segment.
+    :return: the number of pages containing part of a hot segment.
+    """
+    pages: set[int] = set()
+    for seg in segs:
+        addr = roundup(addr, 0x4)
+        if id(seg) in hot and seg.size:
+            pages.update(range(addr // PAGE_SIZE, (addr + seg.size - 1) // PAGE_SIZE + 1))
+        addr += seg.size
+    return len(pages)
+
+
+def call_graph(objs: list[Object], symtab: SymbolTable, profile: Iterable[ProfileEdge]) -> dict[tuple[int, int], int]:
+    """
+    Return the number of calls between the segments.
+
+    Functions that aren't defined in a segment of the objects, or were removed, are ignored so an old profile can
+    still be used.
+
+    :param objs: the objects.
+    :param symtab: the resolved symbol table.
+    :param profile: the edges of the call graph.
+    :return: the number of calls from a segment to another, keyed by the numbers of the segments.
+    """
+    bases = segment_bases(objs)
+    weights: dict[tuple[int, int], int] = defaultdict(int)
+    for caller, callee, count in profile:
+        caller_sym, callee_sym = symtab.get(caller), symtab.get(callee)
+        if caller_sym is None or callee_sym is None:
+            continue
+        src = definition_segment(caller_sym.id, symtab, bases)
+        dst = definition_segment(callee_sym.id, symtab, bases)
+        if src is not None and dst is not None and src != dst and count > 0:
+            weights[src, dst] += count
+    return weights
+
+
+def merge_chains(a: list[int], b: list[int], src: int, dst: int) -> list[int]:
+    """
+    Merge the chains of a caller and a callee so the two segments are as close as possible.
+
+    As in Pettis and Hansen's algorithm, the chains are joined at the ends holding the caller and the callee, reversing
+    a chain if that makes them adjacent. If either segment is in the middle of its chain, the chain of the callee is
+    appended to the chain of the caller.
+
+    :param a: the chain of the caller.
+    :param b: the chain of the callee.
+    :param src: the number of the segment of the caller.
+    :param dst: the number of the segment of the callee.
+    :return: the merged chain.
+    """
+    if a[-1] == src and b[0] == dst:
+        return a + b
+    if b[-1] == dst and a[0] == src:
+        return b + a
+    if a[-1] == src and b[-1] == dst:
+        return a + b[::-1]
+    if a[0] == src and b[0] == dst:
+        return b[::-1] + a
+    return a + b
+
+
+def order_segments(objs: list[Object], symtab: SymbolTable, live: list[Segment], profile: Iterable[ProfileEdge]) -> Ordering:
+    """
+    Order the live text segments so the segments that call each other most are adjacent.
+
+    Each segment starts as a chain of its own. The edges of the call graph are taken heaviest first, and the chains of
+    the caller and the callee are merged by `merge_chains`. The chains are then placed by the number of calls per byte,
+    so the hot code is packed in to as few pages as possible, followed by the segments without calls in link order.
+
+    All the text segments are placed in the `.text` output segment, as segments with different names can't otherwise
+    be interleaved, and the other segments are placed as before. The segments keep their names, the output segment of
+    each name is recorded in the ordering instead.
+
+    :param objs: the objects.
+    :param symtab: the resolved symbol table.
+    :param live: the live segments.
+    :param profile: the edges of the call graph.
+    :return: the live segments in their new order, the output segment of each text segment name, and the pages spanned
+        by the hot segments before and after.
+    """
+    owners = [seg for obj in objs for seg in obj.segs]
+    texts = [seg for seg in live if get_group(seg.flags) == "text"]
+    text_ids = {id(seg) for seg in texts}
+    names = group_segments_by_name(texts)
+    before = [seg for name in group_segments_by_type(names, make_default_groups())["text"] for seg in names[name]]
+    weights = call_graph(objs, symtab, profile)
+    heat: dict[int, int] = defaultdict(int)
+    chains: dict[int, list[int]] = {}
+    chain_of: dict[int, int] = {}
+    for (src, dst), count in sorted(weights.items(), key=lambda item: -item[1]):
+        if id(owners[src]) not in text_ids or id(owners[dst]) not in text_ids:
+            continue
+        heat[src] += count
+        heat[dst] += count
+        for n in (src, dst):
+            if n not in chain_of:
+                chain_of[n] = n
+                chains[n] = [n]
+        head, tail = chain_of[src], chain_of[dst]
+        if head == tail:
+            continue
+        for n in chains[tail]:
+            chain_of[n] = head
+        chains[head] = merge_chains(chains[head], chains.pop(tail), src, dst)
+
+    def density(run: list[int]) -> float:
+        return sum(heat[n] for n in run) / max(sum(owners[n].size for n in run), 1)
+
+    ordered = [owners[n] for run in sorted(chains.values(), key=density, reverse=True) for n in run]
+    hot = {id(seg) for seg in ordered}
+    after = ordered + [seg for seg in before if id(seg) not in hot]
+    return Ordering(
+        after + [seg for seg in live if get_group(seg.flags) != "text"],
+        {name: ".text" for name in names if name != ".text"},
+        len(ordered),
+        sum(seg.size for seg in ordered),
+        hot_pages(before, hot),
+        hot_pages(after, hot),
+    )
+
+
+def group_segments_by_output(segs: Iterable[Segment], outputs: Mapping[str, str]) -> dict[str, list[Segment]]:
+    """
+    Group segments by the name of the output segment they are placed in.
+
+    :param segs: the segments.
+    :param outputs: the output segment of the segment names that are placed in another output segment.
+    :return: the segments placed in each output segment, in order.
+    """
+    names = defaultdict(list)
+    for seg in segs:
+        names[outputs.get(seg.name, seg.name)].append(seg)
+    return names
+
+
+# What a pass over the segments did, reported after linking.
+Report = Union[Collection, Folding, Ordering]
+
+
+class LinkOptions(NamedTuple):
+    """
+    The passes to run over the segments and how to apply the relocations.
+
+    - `gc_sections`: remove the text segments that can't be reached from the `keep` symbols.
+    - `icf`: fold identical text segments.
+    - `profile`: the call graph used to order the text segments.
+    - `use_numpy`: apply the relocations with NumPy, by default NumPy is used if it's installed.
+    - `endian`: the byte order of the target.
+    """
+
+    gc_sections: bool = False
+    keep: Iterable[str] = ()
+    icf: bool = False
+    profile: Optional[Iterable[ProfileEdge]] = None
+    use_numpy: Optional[bool] = None
+    endian: Endian = Endian.LITTLE
+
+
+def link(objs: list[Object], path: Path, options: LinkOptions = LinkOptions()) -> tuple[Object, list[Report]]:
+    """
+    Link a list of objects, optionally removing the unreferenced text segments, folding identical ones and ordering
+    them by a profile first.
+
+    :param objs: The list of objects to link.
+    :param path: The path to write the linked object to.
+    :param options: The passes to run and how to apply the relocations.
+    :return: The linked object, and what each pass that ran did.
+    :raises LinkError: If a kept symbol isn't defined or a relocation is invalid.
+    """
+    symtab = create_symbol_table(iter_syms(objs))
+    reports: list[Report] = []
+    live = [seg for obj in objs for seg in obj.segs]
+    if options.gc_sections:
+        collection = collect_garbage(objs, symtab, options.keep)
+        reports.append(collection)
+        live = collection.live
+    folding = None
+    outputs: dict[str, str] = {}
+    if options.icf:
+        folding = fold_identical_segments(objs, symtab, live)
+        reports.append(folding)
+        live = folding.live
+    if options.profile is not None:
+        ordering = order_segments(objs, symtab, live, options.profile)
+        reports.append(ordering)
+        live = ordering.live
+        outputs = ordering.outputs
+    common_seg = create_common_segment(symtab.values())
+    names = group_segments_by_output(chain(live, [common_seg]), outputs)
+    types = group_segments_by_type(names, make_default_groups())
+    segs: list[Segment] = []
+    segs.extend(link_group(types["text"], names, 0x1000, "RP"))
+    segs.extend(link_group(types["data"], names, roundup(segs[-1].end, 0x1000), "RWP"))
+    segs.extend(link_group(types["bss"], names, segs[-1].end, "RW"))
+    if folding:
+        place_folded_segments(folding)
+    index = index_segments(segs)
+    index.update((name, index[out]) for name, out in outputs.items())
+    resolve_symbols(symtab.values(), segs, index)
+    resolve_common_symbols(symtab.values(), common_seg, index[common_seg.name])
+    by_name = output_segments(segs)
+    by_name.update((name, by_name[out]) for name, out in outputs.items())
+    relocate(objs, segs, symtab, options.use_numpy, options.endian, by_name)
+    return Object(path.stem, segs, list(symtab.values()), []), reports
+
+
+if __name__ == "__main__":  # pragma: no cover
+
+    def main(
+        inputs: list[Path],
+        output: Path,
+        gc_sections: Annotated[bool, typer.Option(help="remove unreferenced text segments")] = False,
+        keep: Annotated[Optional[list[str]], typer.Option(help="symbol to keep when removing segments")] = None,
+        icf: Annotated[bool, typer.Option(help="fold identical text segments")] = False,
+        profile: Annotated[Optional[Path], typer.Option(help="call graph profile used to order the text segments")] = None,
+        jobs: Annotated[int, typer.Option(help="number of processes used to read the inputs")] = 1,
+        cache_dir: Annotated[Optional[Path], typer.Option(help="directory to cache parsed objects")] = None,
+        endian: Annotated[Endian, typer.Option(help="byte order of the target")] = Endian.LITTLE,
+    ) -> None:
+        """
+        Link a list of objects.
+
+        :param inputs: The list of objects to link.
+        :param output: The path to write the linked object to.
+        :param gc_sections: Remove the text segments that can't be reached from the kept symbols.
+        :param keep: The symbols to keep, such as the startup stub.
+        :param icf: Fold identical text segments.
+        :param profile: The call graph profile used to order the text segments.
+        :param jobs: The number of processes used to read the inputs.
+        :param cache_dir: The directory to cache parsed objects.
+        :param endian: The byte order of the target.
+        """
+        cache = ObjectCache(cache_dir) if cache_dir else None
+        objs = read_objects(inputs, jobs, cache=cache)
+        edges = read_profile(profile) if profile else None
+        obj, reports = link(objs, output, LinkOptions(gc_sections, keep or (), icf, edges, endian=endian))
+        write_object(obj, output)
+        for report in reports:
+            typer.echo(report.summary(), err=True)
+        if cache:
+            typer.echo(cache.summary(), err=True)
+
+    typer.run(main)
@@ -0,0 +1,240 @@
+import re
+from pathlib import Path
+from struct import pack, unpack_from
+
+import pytest
+
+from linker import Object, Segment, Symbol
+from linker.errors import LinkError
+from linker.object import Relocation
+
+from .project_11_1 import LinkOptions, ProfileEdge, link, merge_chains, read_profile
+
+
+def make_segment(name: str, base: int, flags: str, data: bytes) -> Segment:
+    seg = Segment(name, base, len(data), flags)
+    seg.data = data
+    return seg
+
+
+@pytest.fixture
+def main() -> Object:
+    return Object(
+        "main",
+        [
+            make_segment(".text1", 0, "RP", pack("<II", 0, 0)),
+            make_segment(".text2", 8, "RP", pack("<II", 0, 0)),
+            make_segment(".data", 0x1000, "RWP", pack("<I", 0)),
+        ],
+        [Symbol("start", 0, 0, "D"), Symbol("unused", 8, 1, "D"), Symbol("f", 0, 0, "U"), Symbol("g", 0, 0, "U")],
+        [Relocation(0, 0, 2, "AS4"), Relocation(8, 1, 3, "AS4"), Relocation(0x1000, 2, 0, "A4")],
+    )
+
+
+@pytest.fixture
+def lib() -> Object:
+    return Object(
+        "lib",
+        [make_segment(".text1", 0, "RP", bytes(12)), make_segment(".text2", 12, "RP", bytes(16))],
+        [Symbol("f", 0, 0, "D"), Symbol("g", 12, 1, "D")],
+        [],
+    )
+
+
+def test_link_keeps_everything_without_gc(main: Object, lib: Object) -> None:
+    obj, reports = link([main, lib], Path("a.lk"))
+    assert reports == []
+    assert [(seg.name, seg.size) for seg in obj.segs] == [
+        (".text", 0),
+        (".text1", 20),
+        (".text2", 24),
+        (".data", 4),
+        (".bss", 0),
+        (".common", 0),
+    ]
+
+
+def test_link_gc_sections(main: Object, lib: Object) -> None:
+    obj, (collection,) = link([main, lib], Path("a.lk"), LinkOptions(gc_sections=True, keep=["start"]))
+    assert (collection.segments, collection.size) == (2, 24)
+    assert collection.summary() == "gc-sections: removed 2 segments, 24 bytes"
+    assert [(seg.name, seg.base, seg.size) for seg in obj.segs] == [
+        (".text", 0x1000, 0),
+        (".text1", 0x1000, 20),
+        (".data", 0x2000, 4),
+        (".bss", 0x2004, 0),
+        (".common", 0x2004, 0),
+    ]
+    assert {sym.name for sym in obj.syms} == {"start", "f"}
+    assert unpack_from("<I", obj.segs[1].data) == (0x1008,)
+    assert unpack_from("<I", obj.segs[2].data) == (0x1000,)
+    assert len(main.rels) == 2
+
+
+def test_link_gc_sections_follows_references(main: Object, lib: Object) -> None:
+    obj, (collection,) = link([main, lib], Path("a.lk"), LinkOptions(gc_sections=True, keep=["start", "unused"]))
+    assert (collection.segments, collection.size) == (0, 0)
+    assert {sym.name for sym in obj.syms} == {"start", "unused", "f", "g"}
+
+
+def test_link_gc_sections_removes_cycles(main: Object, lib: Object) -> None:
+    # .text2 of main and of lib reference each other, but nothing else references them.
+    lib.rels.add(12, 1, 2, "AS4")
+    lib.syms.append(Symbol("unused", 0, 0, "U"))
+    lib.rels.add(0, 0, 0, "A4")
+    obj, (collection,) = link([main, lib], Path("a.lk"), LinkOptions(gc_sections=True, keep=["start"]))
+    assert (collection.segments, collection.size) == (2, 24)
+    assert "unused" not in {sym.name for sym in obj.syms}
+
+
+def test_link_gc_sections_without_relocations(main: Object, lib: Object) -> None:
+    # Without relocations every segment of an object is taken to use all the symbols the object references.
+    main.rels = type(main.rels)()
+    obj, (collection,) = link([main, lib], Path("a.lk"), LinkOptions(gc_sections=True, keep=["start"]))
+    assert (collection.segments, collection.size) == (1, 8)
+    assert {sym.name for sym in obj.syms} == {"start", "f", "g"}
+
+
+@pytest.mark.parametrize("name", ["missing", "f"])
+def test_link_gc_sections_undefined_keep(main: Object, name: str) -> None:
+    with pytest.raises(LinkError, match=re.escape(f"undefined symbol: {name}")):
+        link([main], Path("a.lk"), LinkOptions(gc_sections=True, keep=["start", name]))
+
+
+def test_link_gc_sections_nothing_kept(main: Object, lib: Object) -> None:
+    with pytest.raises(LinkError, match="no symbols to keep"):
+        link([main, lib], Path("a.lk"), LinkOptions(gc_sections=True))
+
+
+def make_function(name: str, defines: list[str], uses: list[str], data: bytes = bytes(8)) -> Object:
+    syms = [Symbol(sym, 4 * i, 0, "D") for i, sym in enumerate(defines)] + [Symbol(sym, 0, 0, "U") for sym in uses]
+    rels = [Relocation(4 * i, 0, len(defines) + i, "AS4") for i in range(len(uses))]
+    return Object(name, [make_segment(".text1", 0, "RP", data)], syms, rels)
+
+
+def test_link_icf() -> None:
+    start = make_function("start", ["start"], ["a", "b"])
+    a = make_function("a", ["a"], ["h"])
+    b = make_function("b", ["b"], ["h"])
+    h = make_function("h", ["h"], [], pack("<II", 1, 2))
+    obj, (folding,) = link([start, a, b, h], Path("a.lk"), LinkOptions(icf=True))
+    assert folding.summary() == "icf: folded 1 segments, 8 bytes"
+    assert [(seg.name, seg.size) for seg in obj.segs][1] == (".text1", 24)
+    addrs = {sym.name: sym.value for sym in obj.syms}
+    assert addrs == {"start": 0x1000, "a": 0x1008, "b": 0x1008, "h": 0x1010}
+    assert unpack_from("<IIII", obj.segs[1].data) == (0x1008, 0x1008, 0x1010, 0)
+
+
+def test_link_icf_different_targets() -> None:
+    start = make_function("start", ["start"], ["a", "b"])
+    a = make_function("a", ["a"], ["g"])
+    b = make_function("b", ["b"], ["h"])
+    g = make_function("g", ["g"], [], pack("<II", 1, 2))
+    h = make_function("h", ["h"], [], pack("<II", 1, 3))
+    obj, (folding,) = link([start, a, b, g, h], Path("a.lk"), LinkOptions(icf=True))
+    assert folding.folds == []
+    assert len({sym.value for sym in obj.syms}) == 5
+
+
+def test_link_icf_iterates() -> None:
+    # a and b become identical once g and h are folded, and the pairs c, d and e, f call each other.
+    start = make_function("start", ["start"], ["a", "b", "c", "d"], bytes(16))
+    a = make_function("a", ["a"], ["g"])
+    b = make_function("b", ["b"], ["h"])
+    g = make_function("g", ["g"], [], pack("<II", 1, 2))
+    h = make_function("h", ["h"], [], pack("<II", 1, 2))
+    c = make_function("c", ["c"], ["e"])
+    d = make_function("d", ["d"], ["f"])
+    e = make_function("e", ["e"], ["c"], pack("<II", 0, 1))
+    f = make_function("f", ["f"], ["d"], pack("<II", 0, 1))
+    obj, (folding,) = link([start, a, b, g, h, c, d, e, f], Path("a.lk"), LinkOptions(icf=True))
+    assert folding.summary() == "icf: folded 4 segments, 32 bytes"
+    addrs = {sym.name: sym.value for sym in obj.syms}
+    assert (addrs["a"], addrs["g"], addrs["c"], addrs["e"]) == (addrs["b"], addrs["h"], addrs["d"], addrs["f"])
+    assert len(set(addrs.values())) == 5
+
+
+def test_link_icf_segment_relocations() -> None:
+    # The segment relocations store the address of .data, which is at a different offset in each object.
+    start = make_function("start", ["start"], ["a", "b"])
+    a = make_function("a", ["a"], [])
+    a.segs.append(make_segment(".data", 0x100, "RWP", bytes(4)))
+    a.rels.add(0, 0, 1, "A4")
+    b = make_function("b", ["b"], [])
+    b.segs.append(make_segment(".data", 0x200, "RWP", bytes(4)))
+    b.rels.add(0, 0, 1, "A4")
+    _, (folding,) = link([start, a, b], Path("a.lk"), LinkOptions(icf=True))
+    assert folding.folds == []
+
+
+def test_link_gc_sections_and_icf(main: Object, lib: Object) -> None:
+    lib.segs[1] = make_segment(".text2", 12, "RP", bytes(12))
+    obj, (collection, folding) = link([main, lib], Path("a.lk"), LinkOptions(gc_sections=True, keep=["start", "unused"], icf=True))
+    assert collection.summary() == "gc-sections: removed 0 segments, 0 bytes"
+    # Once f and g are folded, the segments of main that reference them are identical too.
+    assert folding.summary() == "icf: folded 2 segments, 20 bytes"
+    addrs = {sym.name: sym.value for sym in obj.syms}
+    assert (addrs["start"], addrs["f"]) == (addrs["unused"], addrs["g"])
+
+
+def test_link_profile() -> None:
+    a = make_function("a", ["a"], ["d"], bytes(0x800))
+    b = make_function("b", ["b"], [], bytes(0x1000))
+    c = make_function("c", ["c"], [], bytes(0x1000))
+    d = make_function("d", ["d"], [], bytes(0x800))
+    for i, obj in enumerate([b, c, d], 2):
+        obj.segs[0].name = f".text{i}"
+    d.segs.append(make_segment(".data", 0x800, "RWP", bytes(4)))
+    d.syms.append(Symbol("x", 0x800, 1, "D"))
+    profile = [ProfileEdge("a", "d", 100), ProfileEdge("a", "missing", 10), ProfileEdge("a", "x", 5), ProfileEdge("b", "c", 1)]
+    obj, (ordering,) = link([a, b, c, d], Path("a.lk"), LinkOptions(profile=profile))
+    assert ordering.summary() == "profile: 4 hot segments, 12288 bytes, 3 pages before, 3 pages after"
+    addrs = {sym.name: sym.value for sym in obj.syms}
+    assert addrs == {"a": 0x1000, "d": 0x1800, "b": 0x2000, "c": 0x3000, "x": 0x4000}
+    assert [(seg.name, seg.size) for seg in obj.segs[:2]] == [(".text", 0x3000), (".data", 4)]
+    assert unpack_from("<I", obj.segs[0].data) == (0x1800,)
+    assert [seg.name for seg in (a.segs[0], b.segs[0], c.segs[0], d.segs[0])] == [".text1", ".text2", ".text3", ".text4"]
+    assert ordering.outputs == {".text1": ".text", ".text2": ".text", ".text3": ".text", ".text4": ".text"}
+
+
+def test_link_profile_packs_hot_segments() -> None:
+    a = make_function("a", ["a"], ["d"], bytes(0x800))
+    b = make_function("b", ["b"], [], bytes(0x1000))
+    c = make_function("c", ["c"], [], bytes(0x1000))
+    d = make_function("d", ["d"], [], bytes(0x800))
+    obj, (ordering,) = link([a, b, c, d], Path("a.lk"), LinkOptions(profile=[ProfileEdge("a", "d", 100)]))
+    assert (ordering.hot, ordering.pages_before, ordering.pages_after) == (2, 2, 1)
+    assert [sym.value for sym in obj.syms] == [0x1000, 0x1800, 0x2000, 0x3000]
+
+
+@pytest.mark.parametrize(
+    "a, b, src, dst, merged",
+    [
+        ([0, 1], [2, 3], 1, 2, [0, 1, 2, 3]),
+        ([0, 1], [2, 3], 0, 3, [2, 3, 0, 1]),
+        ([0, 1], [2, 3], 1, 3, [0, 1, 3, 2]),
+        ([0, 1], [2, 3], 0, 2, [3, 2, 0, 1]),
+        ([0, 1, 2], [3], 1, 3, [0, 1, 2, 3]),
+    ],
+)
+def test_merge_chains(a: list[int], b: list[int], src: int, dst: int, merged: list[int]) -> None:
+    assert merge_chains(a, b, src, dst) == merged
+
+
+def test_link_profile_merges_chains_by_their_ends() -> None:
+    # a is the head of the chain a, b when a calls c, so c is placed before a rather than after b.
+    a = make_function("a", ["a"], ["b", "c"], bytes(0x100))
+    b = make_function("b", ["b"], [], bytes(0x100))
+    c = make_function("c", ["c"], [], bytes(0x100))
+    obj, _ = link([a, b, c], Path("a.lk"), LinkOptions(profile=[ProfileEdge("a", "b", 100), ProfileEdge("a", "c", 50)]))
+    addrs = {sym.name: sym.value for sym in obj.syms}
+    assert addrs == {"c": 0x1000, "a": 0x1100, "b": 0x1200}
+
+
+def test_read_profile(tmp_path: Path) -> None:
+    path = tmp_path / "profile"
+    path.write_text("# caller callee count\n\nmain f 10\nf g 3\n")
+    assert read_profile(path) == [ProfileEdge("main", "f", 10), ProfileEdge("f", "g", 3)]
+    path.write_text("main f 10\nf g\n")
+    with pytest.raises(LinkError, match=re.escape(f"{path}:2: error: invalid profile entry: f g")):
+        read_profile(path)
@@ -3,6 +3,6 @@ Functions for parsing and dumping `Object`s.
 """
 
 from .object import Object, Segment, Symbol
-from .utils import read_object, write_object, roundup
+from .utils import read_object, read_objects, write_object, roundup
 
-__all__ = ("Object", "Segment", "Symbol", "read_object", "write_object", "roundup")
+__all__ = ("Object", "Segment", "Symbol", "read_object", "read_objects", "write_object", "roundup")
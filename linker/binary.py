@@ -0,0 +1,203 @@
+"""
+Compact binary LINK object format.
+
+The binary format stores the same information as the text format, but the tables are fixed-width little-endian records
+and the segment data is stored as raw bytes so an object can be read with `struct.unpack_from` over a buffer.
+
+    header   magic, nsegs, nsyms, nrels, string table size
+    segments name, base, size, flags, data offset, data length
+    symbols  name, value, seg, type
+    rels     loc, seg, ref, type
+    strings  NUL separated names, flags and types, referenced by index from the tables
+    data     raw segment data
+"""
+
+from functools import partial
+from struct import Struct, error as StructError
+from typing import BinaryIO, Callable, Optional
+
+from .errors import LinkError
+from .object import Object, Segment, Symbol, RelocationTable, BINARY_MAGIC_NUMBER
+
+HEADER = Struct(f"<{len(BINARY_MAGIC_NUMBER)}sIIII")
+SEGMENT = Struct("<IQQIQQ")
+SYMBOL = Struct("<IQII")
+RELOCATION = Struct("<QIII")
+
+
+class StringTable:
+    """
+    Collects the strings referenced by the tables, each distinct string is stored once.
+    """
+
+    def __init__(self) -> None:
+        self.indices: dict[str, int] = {}
+
+    def add(self, s: str) -> int:
+        """
+        Add a string to the table.
+
+        :param s: the string to add.
+        :return: the index of the string.
+        """
+        return self.indices.setdefault(s, len(self.indices))
+
+    def dump(self) -> bytes:
+        """
+        Dump the strings.
+
+        :return: the NUL separated strings.
+        """
+        return "\0".join(self.indices).encode("ascii")
+
+
+def is_binary_object(buffer: bytes) -> bool:
+    """
+    Return `True` if the buffer starts with the binary magic number.
+
+    :param buffer: the start of the object file.
+    :return: `True` if the buffer contains a binary object.
+    """
+    return buffer[: len(BINARY_MAGIC_NUMBER)] == BINARY_MAGIC_NUMBER
+
+
+def has_data(seg: Segment) -> bool:
+    """
+    Return `True` if the segment data is stored in the object.
+
+    :param seg: the segment to check.
+    :return: `True` if the segment has data present.
+    """
+    return "P" in seg.flags and seg.size > 0
+
+
+def tables_size(nsegs: int, nsyms: int, nrels: int, strtab_size: int) -> int:
+    """
+    Return the size of the header, tables and strings, the segment data is stored after them.
+
+    :param nsegs: the number of segments.
+    :param nsyms: the number of symbols.
+    :param nrels: the number of relocations.
+    :param strtab_size: the size of the string table.
+    :return: the offset of the segment data.
+    """
+    return HEADER.size + nsegs * SEGMENT.size + nsyms * SYMBOL.size + nrels * RELOCATION.size + strtab_size
+
+
+def read_binary_tables(file: BinaryIO) -> bytes:
+    """
+    Read the header, tables and strings of a binary object, leaving the segment data in the file.
+
+    :param file: the object file.
+    :return: the start of the object file up to the segment data.
+    :raises LinkError: if the file is truncated.
+    """
+    header = file.read(HEADER.size)
+    try:
+        _, nsegs, nsyms, nrels, strtab_size = HEADER.unpack(header)
+    except StructError as err:
+        raise LinkError(f"truncated or corrupt binary object: {err}") from err
+    return header + file.read(tables_size(nsegs, nsyms, nrels, strtab_size) - HEADER.size)
+
+
+def dump_binary_object(obj: Object) -> bytes:
+    """
+    Dump an object to the binary format.
+
+    :param obj: the object to dump.
+    :return: the binary representation of the object.
+    :raises LinkError: if a value doesn't fit in the binary format.
+    """
+    strings = StringTable()
+    datas = [seg.data if has_data(seg) else b"" for seg in obj.segs]
+    try:
+        syms = b"".join(SYMBOL.pack(strings.add(s.name), s.value, s.seg, strings.add(s.type)) for s in obj.syms)
+        types = [strings.add(name) for name in obj.rels.type_names]
+        rels = b"".join(
+            RELOCATION.pack(loc, seg, ref, types[code])
+            for loc, seg, ref, code in zip(obj.rels.locs, obj.rels.segs, obj.rels.refs, obj.rels.types)
+        )
+        seg_names = [(strings.add(seg.name), strings.add(seg.flags)) for seg in obj.segs]
+        strtab = strings.dump()
+        offset = tables_size(len(obj.segs), len(obj.syms), len(obj.rels), len(strtab))
+        segs: list[bytes] = []
+        for seg, (name, flags), data in zip(obj.segs, seg_names, datas):
+            segs.append(SEGMENT.pack(name, seg.base, seg.size, flags, offset, len(data)))
+            offset += len(data)
+        header = HEADER.pack(BINARY_MAGIC_NUMBER, len(obj.segs), len(obj.syms), len(obj.rels), len(strtab))
+    except StructError as err:
+        raise LinkError(f"value out of range for binary format: {err}") from err
+    return b"".join([header, *segs, syms, rels, strtab, *datas])
+
+
+def copy_data(buffer: bytes | memoryview, seg: Segment, offset: int, length: int) -> None:
+    """
+    Copy the segment data out of the buffer.
+
+    :param buffer: the buffer containing the object file.
+    :param seg: the segment.
+    :param offset: the offset of the data within the buffer.
+    :param length: the length of the data.
+    """
+    data = bytes(buffer[offset : offset + length])
+    if len(data) != length:
+        raise LinkError(f"truncated data for '{seg.name}'")
+    seg.data = data
+
+
+def share_data(buffer: memoryview, seg: Segment, offset: int, length: int) -> None:
+    """
+    Share the segment data with the buffer, without copying it.
+
+    :param buffer: the buffer containing the object file.
+    :param seg: the segment.
+    :param offset: the offset of the data within the buffer.
+    :param length: the length of the data.
+    """
+    data = buffer[offset : offset + length]
+    if len(data) != length:
+        raise LinkError(f"truncated data for '{seg.name}'")
+    seg.data = data
+
+
+def parse_binary_object(
+    buffer: bytes | memoryview,
+    name: str,
+    data_parser: Optional[Callable[[Segment, int, int], None]] = None,
+) -> Object:
+    """
+    Parse an object in the binary format.
+
+    :param buffer: the buffer containing the object, the segment data isn't needed if `data_parser` doesn't use it.
+    :param name: the name of the object file.
+    :param data_parser: the function used to set the data of a segment from its offset and length in the file, by
+        default the data is copied out of `buffer`.
+    :return: the parsed object.
+    :raises LinkError: if the buffer doesn't contain a valid binary object.
+    """
+    try:
+        magic, nsegs, nsyms, nrels, strtab_size = HEADER.unpack_from(buffer)
+        if magic != BINARY_MAGIC_NUMBER:
+            raise LinkError("invalid magic number (expected binary object)")
+        if len(buffer) < tables_size(nsegs, nsyms, nrels, strtab_size):
+            raise LinkError("truncated binary object")
+        offset = HEADER.size
+        seg_entries = list(SEGMENT.iter_unpack(buffer[offset : offset + nsegs * SEGMENT.size]))
+        offset += nsegs * SEGMENT.size
+        sym_entries = SYMBOL.iter_unpack(buffer[offset : offset + nsyms * SYMBOL.size])
+        offset += nsyms * SYMBOL.size
+        rel_entries = RELOCATION.iter_unpack(buffer[offset : offset + nrels * RELOCATION.size])
+        offset += nrels * RELOCATION.size
+        strings = bytes(buffer[offset : offset + strtab_size]).decode("ascii").split("\0")
+        segs = [Segment(strings[i], base, size, strings[flags]) for i, base, size, flags, _, _ in seg_entries]
+        syms = [Symbol(strings[i], value, seg, strings[kind]) for i, value, seg, kind in sym_entries]
+        rels = RelocationTable()
+        for loc, seg, ref, kind in rel_entries:
+            rels.add(loc, seg, ref, strings[kind])
+        parse_data = data_parser or partial(copy_data, buffer)
+        for seg, (_, _, _, _, data_offset, data_length) in zip(segs, seg_entries):
+            if data_length:
+                parse_data(seg, data_offset, data_length)
+    except (StructError, IndexError, UnicodeDecodeError) as err:
+        raise LinkError(f"truncated or corrupt binary object: {err}") from err
+    return Object(name, segs, syms, rels)
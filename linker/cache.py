@@ -0,0 +1,176 @@
+"""
+On-disk cache of parsed objects.
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Callable, Optional
+
+from .binary import dump_binary_object, parse_binary_object
+from .errors import LinkError
+from .object import Object
+
+# Increment when a change to the parser or binary format would make existing cache entries invalid.
+PARSER_VERSION = 1
+
+ENTRY_SUFFIX = ".lkb"
+
+
+class ObjectCache:
+    """
+    A size bounded cache of parsed objects.
+
+    Entries are stored in the binary object format and keyed by the path, size, modification time and contents of the
+    object file as well as the parser version. The least recently used entries are evicted when the total size of the
+    cache exceeds `max_size` bytes. The total is scanned from the directory once and then kept up to date as entries
+    are stored, so the directory is only scanned again to evict entries.
+
+    Objects read lazily aren't stored when they are read, as that would load all their segment data. They are kept
+    until `flush` is called once the link has loaded the data it needs.
+    """
+
+    def __init__(self, directory: Path, max_size: int = 1 << 30) -> None:
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.pending: list[tuple[str, Object]] = []
+        directory.mkdir(parents=True, exist_ok=True)
+        self.size = sum(size for _, size, _ in self.entries())
+
+    def key(self, path: Path) -> str:
+        """
+        Return the cache key for an object file.
+
+        :param path: path to the object file.
+        :return: the cache key.
+        :raises FileNotFoundError: if the path doesn't exist.
+        """
+        stat = path.stat()
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        key = f"{path.resolve()}\0{stat.st_size}\0{stat.st_mtime_ns}\0{digest}\0{PARSER_VERSION}"
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def entry(self, key: str) -> Path:
+        """
+        Return the path of a cache entry.
+
+        :param key: the cache key.
+        :return: the path of the entry.
+        """
+        return (self.directory / key).with_suffix(ENTRY_SUFFIX)
+
+    def lookup(self, path: Path) -> tuple[str, Optional[Object]]:
+        """
+        Look up an object file in the cache.
+
+        :param path: path to the object file.
+        :return: the cache key and the cached object, or `None` if it isn't cached.
+        :raises FileNotFoundError: if the path doesn't exist.
+        """
+        key = self.key(path)
+        entry = self.entry(key)
+        try:
+            obj = parse_binary_object(entry.read_bytes(), path.stem)
+        except (FileNotFoundError, LinkError):
+            self.misses += 1
+            return key, None
+        self.hits += 1
+        # The modification time of an entry records when it was last used.
+        os.utime(entry)
+        return key, obj
+
+    def store(self, key: str, obj: Object) -> None:
+        """
+        Store an object in the cache, the cache may be larger than `max_size` until `evict` is called.
+
+        :param key: the cache key.
+        :param obj: the parsed object, with its segment data loaded.
+        :raises LinkError: if the object can't be stored in the binary format.
+        """
+        buffer = dump_binary_object(obj)
+        # Write to a temporary file first, so concurrent links never see a partial entry.
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, mode="wb") as file:
+            file.write(buffer)
+        os.replace(tmp, self.entry(key))
+        self.size += len(buffer)
+
+    def entries(self) -> list[tuple[int, int, Path]]:
+        """
+        Return the entries in the cache directory.
+
+        :return: the modification time, size and path of each entry.
+        """
+        entries = []
+        for entry in self.directory.glob(f"*{ENTRY_SUFFIX}"):
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, entry))
+        return entries
+
+    def evict(self) -> None:
+        """
+        Evict the least recently used entries until the cache is no larger than `max_size`.
+        """
+        entries = self.entries()
+        self.size = sum(entry_size for _, entry_size, _ in entries)
+        for _, entry_size, entry in sorted(entries):
+            if self.size <= self.max_size:
+                break
+            entry.unlink(missing_ok=True)
+            self.size -= entry_size
+            self.evictions += 1
+
+    def read_all(self, paths: list[Path], reader: Callable[[list[Path]], list[Object]], lazy: bool = False) -> list[Object]:
+        """
+        Read object files through the cache, evicting entries once they have been stored if the cache is too large.
+
+        :param paths: paths to the object files.
+        :param reader: the function used to read the object files that aren't cached.
+        :param lazy: the reader defers loading the segment data, the objects that weren't cached are stored by `flush`
+            instead of now.
+        :return: the objects in the same order as `paths`.
+        :raises LinkError: if an object can't be stored in the binary format.
+        """
+        lookups = [self.lookup(path) for path in paths]
+        loaded = iter(reader([path for path, (_, obj) in zip(paths, lookups) if obj is None]))
+        objs: list[Object] = []
+        for key, obj in lookups:
+            if obj is None:
+                obj = next(loaded)
+                if lazy:
+                    self.pending.append((key, obj))
+                else:
+                    self.store(key, obj)
+            objs.append(obj)
+        if self.size > self.max_size:
+            self.evict()
+        return objs
+
+    def flush(self) -> None:
+        """
+        Store the objects that were read lazily, then evict entries if the cache is too large.
+
+        Call this once the segment data the link needs has been loaded, any data that wasn't is loaded now.
+
+        :raises LinkError: if an object can't be stored in the binary format or its segment data can't be loaded.
+        """
+        pending, self.pending = self.pending, []
+        for key, obj in pending:
+            self.store(key, obj)
+        if self.size > self.max_size:
+            self.evict()
+
+    def summary(self) -> str:
+        """
+        Return a summary of the cache statistics.
+
+        :return: the number of hits, misses and evictions.
+        """
+        return f"cache: {self.hits} hits, {self.misses} misses, {self.evictions} evictions"
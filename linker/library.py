@@ -0,0 +1,670 @@
+"""
+Reader for file format libraries.
+
+A file format library is a header, the members and a directory of the symbols each member defines:
+
+    LIBRARY nmembers directory-offset
+    members
+    offset length symbols...
+
+A library can also have a hash table of the symbols between the members and the directory, so a symbol can be found
+without reading the directory. Readers that don't know about the hash table skip it as they go straight to the
+directory. The hash table is made of fixed-width hexadecimal records, so any record can be read from its index:
+
+    HASHTAB nmembers nbuckets nsymbols
+    members  offset, length, compression method and uncompressed length of each member
+    buckets  index of the first symbol in each bucket, and the number of symbols
+    symbols  hash, member index, name offset, name length, sorted by bucket
+    names    the names of the symbols
+    HASHTAB  offset of the hash table, immediately before the directory
+
+A library can also record the dependencies of its members, before the hash table if there is one. Each member has a
+line of the symbols it defines, then the symbols it references in order, a symbol defined by a member of the same
+library is followed by the index of the first member defining it. So the members a member needs, and the symbols it
+brings in, can be found without reading the member or the directory:
+
+    DEPENDS nmembers
+    symbol... : symbol[=index]..., of each member
+    DEPENDS  offset of the dependencies, immediately before the hash table or directory
+
+A member can be stored compressed with zlib or lzma, its directory entry then records the method and uncompressed
+length after the stored length:
+
+    offset length:method:size symbols...
+
+The hash table records the method and uncompressed length too, so compressed members can be read through the hash
+table without the directory. A member is only decompressed when it is read, and its length is checked against the
+recorded length.
+"""
+
+import io
+import lzma
+import mmap
+import zlib
+from enum import Enum
+from functools import partial
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional
+
+from .binary import is_binary_object, parse_binary_object, share_data
+from .errors import LinkError
+from .object import Object
+from .parser import binary_line_iterator, parse_object_from_iter
+from .utils import defer_mapped_data, map_file, parse_object_file
+
+LIBRARY_MAGIC = "LIBRARY"
+HASH_MAGIC = "HASHTAB"
+HASH_HEADER_SIZE = len(f"{HASH_MAGIC} {0:08x} {0:08x} {0:08x}\n")
+HASH_MEMBER_SIZE = len(f"{0:016x} {0:016x} none {0:016x}\n")
+HASH_BUCKET_SIZE = len(f"{0:08x}\n")
+HASH_SYMBOL_SIZE = len(f"{0:08x} {0:08x} {0:08x} {0:08x}\n")
+HASH_TRAILER_SIZE = len(f"{HASH_MAGIC} {0:016x}\n")
+DEPENDS_MAGIC = "DEPENDS"
+DEPENDS_TRAILER_SIZE = len(f"{DEPENDS_MAGIC} {0:016x}\n")
+
+
+class Compression(str, Enum):
+    """
+    How a member is stored.
+    """
+
+    NONE = "none"
+    ZLIB = "zlib"
+    LZMA = "lzma"
+
+
+# The compressors are created per member and have `compress` and `flush` methods, so a member can be compressed as it
+# is written.
+COMPRESSORS: dict[Compression, Callable[[], Any]] = {
+    Compression.ZLIB: zlib.compressobj,
+    Compression.LZMA: lzma.LZMACompressor,
+}
+DECOMPRESSORS: dict[Compression, Callable[[bytes], bytes]] = {
+    Compression.ZLIB: zlib.decompress,
+    Compression.LZMA: lzma.decompress,
+}
+
+
+class StoredMember(NamedTuple):
+    """
+    Where a member is stored within the library and how.
+
+    The length is the number of bytes stored in the library and `size` is the length of the member once decompressed.
+    """
+
+    offset: int
+    length: int
+    compression: Compression
+    size: int
+
+
+class Member(NamedTuple):
+    """
+    A directory entry, the position of a member within the library and the symbols it defines.
+
+    The length is the number of bytes stored in the library, for a compressed member `size` is its uncompressed length.
+    """
+
+    offset: int
+    length: int
+    symbols: list[str]
+    compression: Compression = Compression.NONE
+    size: Optional[int] = None
+
+
+def decompress_member(buffer: bytes | memoryview, compression: Compression) -> bytes:
+    """
+    Decompress a member.
+
+    :param buffer: the stored member.
+    :param compression: the compression method.
+    :return: the member contents.
+    :raises LinkError: if the member can't be decompressed.
+    """
+    try:
+        return DECOMPRESSORS[compression](buffer)
+    except (zlib.error, lzma.LZMAError) as err:
+        raise LinkError(f"failed to decompress library member: {err}") from err
+
+
+def parse_library_header(line: bytes) -> tuple[int, int]:
+    """
+    Parse the header of a library.
+
+    :param line: the first line of the library.
+    :return: the number of members and the offset of the directory.
+    :raises LinkError: if the header is invalid.
+    """
+    parts = line.split()
+    if len(parts) != 3 or parts[0] != LIBRARY_MAGIC.encode("ascii"):
+        raise LinkError("invalid library header")
+    try:
+        return int(parts[1]), int(parts[2], base=16)
+    except ValueError as err:
+        raise LinkError(f"invalid library header: {err}") from err
+
+
+def parse_library_directory(directory: bytes, size: int) -> list[Member]:
+    """
+    Parse the directory of a library.
+
+    :param directory: the directory.
+    :param size: the size of the library, the members must be within it.
+    :return: the directory entries.
+    :raises LinkError: if the directory is invalid.
+    """
+    members: list[Member] = []
+    for line in directory.decode("ascii").splitlines():
+        parts = line.split()
+        if not parts:
+            continue
+        try:
+            length, *compression = parts[1].split(":")
+            if compression:
+                method, uncompressed = compression
+                member = Member(int(parts[0]), int(length), parts[2:], Compression(method), int(uncompressed))
+            else:
+                member = Member(int(parts[0]), int(length), parts[2:])
+        except (IndexError, ValueError) as err:
+            raise LinkError(f"invalid library directory entry: {line}") from err
+        if member.offset < 0 or member.length < 0 or member.offset + member.length > size:
+            raise LinkError(f"library member out of range: {line}")
+        members.append(member)
+    return members
+
+
+def dump_directory_entry(member: Member) -> str:
+    """
+    Dump the directory entry of a member.
+
+    :param member: the directory entry.
+    :return: the line of the directory.
+    """
+    length = str(member.length)
+    if member.compression is not Compression.NONE:
+        length = f"{length}:{member.compression.value}:{member.size}"
+    return " ".join([str(member.offset), length, *member.symbols]) + "\n"
+
+
+class Dependency(NamedTuple):
+    """
+    A symbol referenced by a member and the index of the first member of the same library that defines it.
+    """
+
+    name: str
+    member: Optional[int]
+
+
+class Dependencies(NamedTuple):
+    """
+    The symbols a member defines and the symbols it references.
+    """
+
+    symbols: list[str]
+    references: list[Dependency]
+
+
+def find_trailer(mapping: mmap.mmap, end: int, magic: str, section: str) -> Optional[int]:
+    """
+    Find a section of a library from the trailer immediately before `end`.
+
+    :param mapping: the memory mapped library.
+    :param end: the offset of the end of the trailer.
+    :param magic: the magic number of the section.
+    :param section: the name of the section, for errors.
+    :return: the offset of the section, or `None` if there isn't a trailer with the magic number.
+    :raises LinkError: if the trailer is invalid.
+    """
+    start = end - len(f"{magic} {0:016x}\n")
+    if start < 0:
+        return None
+    parts = mapping[start:end].split()
+    if len(parts) != 2 or parts[0] != magic.encode("ascii"):
+        return None
+    try:
+        offset = int(parts[1], base=16)
+    except ValueError:
+        return None
+    if offset > start:
+        raise LinkError(f"invalid library {section}")
+    return offset
+
+
+def dump_dependencies(members: list[Member], references: list[list[str]], offset: int) -> str:
+    """
+    Dump the dependencies of the members of a library.
+
+    :param members: the directory entries, with the symbols each member defines.
+    :param references: the symbols referenced by each member.
+    :param offset: the offset of the dependencies within the library.
+    :return: the dependencies.
+    """
+    index: dict[str, int] = {}
+    for member_index, member in enumerate(members):
+        for name in member.symbols:
+            index.setdefault(name, member_index)
+    parts = [f"{DEPENDS_MAGIC} {len(members)}\n"]
+    for member, names in zip(members, references):
+        refs = (f"{name}={index[name]}" if name in index else name for name in names)
+        parts.append(" ".join([*member.symbols, ":", *refs]) + "\n")
+    parts.append(f"{DEPENDS_MAGIC} {offset:016x}\n")
+    return "".join(parts)
+
+
+def parse_dependencies(section: bytes, count: int) -> list[Dependencies]:
+    """
+    Parse the dependencies of the members of a library.
+
+    :param section: the dependencies, without the trailer.
+    :param count: the number of members.
+    :return: the symbols defined and referenced by each member.
+    :raises LinkError: if the dependencies are invalid.
+    """
+    header, *lines = section.decode("ascii").split("\n")
+    if header.split() != [DEPENDS_MAGIC, str(count)] or len(lines) != count + 1 or lines[-1]:
+        raise LinkError("invalid library dependencies")
+    dependencies: list[Dependencies] = []
+    for line in lines[:-1]:
+        parts = line.split()
+        if parts.count(":") != 1:
+            raise LinkError(f"invalid library dependencies: {line}")
+        separator = parts.index(":")
+        references: list[Dependency] = []
+        for part in parts[separator + 1 :]:
+            name, _, member = part.partition("=")
+            if member and not (member.isdigit() and int(member) < count):
+                raise LinkError(f"invalid library dependency: {part}")
+            references.append(Dependency(name, int(member) if member else None))
+        dependencies.append(Dependencies(parts[:separator], references))
+    return dependencies
+
+
+def symbol_hash(name: str) -> int:
+    """
+    Return the hash of a symbol name, this is part of the library format so it must not change.
+
+    :param name: the symbol name.
+    :return: the hash of the name.
+    """
+    return zlib.crc32(name.encode("ascii"))
+
+
+def dump_hash_table(members: list[Member], offset: int) -> str:
+    """
+    Dump the hash table of a library.
+
+    :param members: the directory entries.
+    :param offset: the offset of the hash table within the library.
+    :return: the hash table.
+    """
+    symbols = [(symbol_hash(name), index, name) for index, member in enumerate(members) for name in member.symbols]
+    nbuckets = max(1, len(symbols))
+    symbols.sort(key=lambda symbol: symbol[0] % nbuckets)
+    parts = [f"{HASH_MAGIC} {len(members):08x} {nbuckets:08x} {len(symbols):08x}\n"]
+    for member in members:
+        size = member.length if member.compression is Compression.NONE else member.size
+        parts.append(f"{member.offset:016x} {member.length:016x} {member.compression.value} {size:016x}\n")
+    counts = [0] * nbuckets
+    for symbol_hash_value, _, _ in symbols:
+        counts[symbol_hash_value % nbuckets] += 1
+    start = 0
+    for count in counts:
+        parts.append(f"{start:08x}\n")
+        start += count
+    parts.append(f"{start:08x}\n")
+    name_offset = 0
+    for symbol_hash_value, index, name in symbols:
+        parts.append(f"{symbol_hash_value:08x} {index:08x} {name_offset:08x} {len(name):08x}\n")
+        name_offset += len(name)
+    parts.extend(name for _, _, name in symbols)
+    parts.append(f"\n{HASH_MAGIC} {offset:016x}\n")
+    return "".join(parts)
+
+
+class HashTable:
+    """
+    The hash table of a memory mapped library.
+
+    Looking up a symbol reads a bucket, the symbols in the bucket and the matching name, so it only touches a few
+    pages however large the library is.
+    """
+
+    def __init__(self, mapping: mmap.mmap, offset: int, end: int) -> None:
+        """
+        Read the header of the hash table.
+
+        :param mapping: the memory mapped library.
+        :param offset: the offset of the hash table.
+        :param end: the offset of the end of the hash table.
+        :raises LinkError: if the hash table is invalid.
+        """
+        self.mapping = mapping
+        self.offset = offset
+        parts = mapping[offset : offset + HASH_HEADER_SIZE].split()
+        if len(parts) != 4 or parts[0] != HASH_MAGIC.encode("ascii"):
+            raise LinkError("invalid library hash table")
+        self.nmembers, self.nbuckets, self.nsymbols = (int(part, base=16) for part in parts[1:])
+        self.members = offset + HASH_HEADER_SIZE
+        self.buckets = self.members + self.nmembers * HASH_MEMBER_SIZE
+        self.symbols = self.buckets + (self.nbuckets + 1) * HASH_BUCKET_SIZE
+        self.names = self.symbols + self.nsymbols * HASH_SYMBOL_SIZE
+        if self.nbuckets == 0 or self.names > end:
+            raise LinkError("invalid library hash table")
+        self.end = end
+
+    @classmethod
+    def find(cls, mapping: mmap.mmap, directory: int) -> Optional["HashTable"]:
+        """
+        Find the hash table of a library from the trailer before the directory.
+
+        :param mapping: the memory mapped library.
+        :param directory: the offset of the directory.
+        :return: the hash table, or `None` if the library doesn't have one.
+        :raises LinkError: if the hash table is invalid.
+        """
+        offset = find_trailer(mapping, directory, HASH_MAGIC, "hash table")
+        if offset is None:
+            return None
+        return cls(mapping, offset, directory - HASH_TRAILER_SIZE)
+
+    def field(self, offset: int, width: int) -> int:
+        """
+        Read a hexadecimal field.
+
+        :param offset: the offset of the field.
+        :param width: the width of the field.
+        :return: the value of the field.
+        :raises LinkError: if the field is invalid.
+        """
+        try:
+            return int(self.mapping[offset : offset + width], base=16)
+        except ValueError as err:
+            raise LinkError(f"invalid library hash table: {err}") from err
+
+    def stored_member(self, index: int) -> StoredMember:
+        """
+        Return where and how a member is stored.
+
+        :param index: the index of the member.
+        :return: the offset, length, compression method and uncompressed length.
+        :raises LinkError: if the record is invalid.
+        """
+        record = self.members + index * HASH_MEMBER_SIZE
+        method = bytes(self.mapping[record + 34 : record + 38]).decode("ascii", errors="replace")
+        try:
+            compression = Compression(method)
+        except ValueError:
+            raise LinkError(f"invalid library hash table: unknown compression method: {method}") from None
+        return StoredMember(self.field(record, 16), self.field(record + 17, 16), compression, self.field(record + 39, 16))
+
+    def lookup(self, name: str) -> Optional[int]:
+        """
+        Look up the member defining a symbol.
+
+        :param name: the symbol name.
+        :return: the index of the member, or `None` if no member defines the symbol.
+        :raises LinkError: if the hash table is invalid.
+        """
+        key = symbol_hash(name)
+        bucket = self.buckets + (key % self.nbuckets) * HASH_BUCKET_SIZE
+        first, last = self.field(bucket, 8), self.field(bucket + HASH_BUCKET_SIZE, 8)
+        encoded = name.encode("ascii")
+        for index in range(first, min(last, self.nsymbols)):
+            record = self.symbols + index * HASH_SYMBOL_SIZE
+            if self.field(record, 8) != key:
+                continue
+            name_offset = self.names + self.field(record + 18, 8)
+            if self.mapping[name_offset : name_offset + self.field(record + 27, 8)] == encoded:
+                member = self.field(record + 9, 8)
+                if member >= self.nmembers:
+                    raise LinkError("invalid library hash table")
+                return member
+        return None
+
+
+class Library:
+    """
+    A memory mapped file format library.
+
+    Only the header is read when the library is opened, along with the directory if the library doesn't have a hash
+    table. Members are parsed directly from the mapping when they are read and their segment data is decoded when it
+    is first accessed. So only the pages of the members that are used are read from the file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """
+        Open a library.
+
+        :param path: path to the library.
+        :raises FileNotFoundError: if the path doesn't exist.
+        :raises LinkError: if the header, directory or hash table is invalid.
+        """
+        self.path = path
+        if path.stat().st_size == 0:
+            raise LinkError(f"{path}: error: invalid library header")
+        self.mapping = map_file(path)
+        self.view = memoryview(self.mapping)
+        self._members: Optional[list[Member]] = None
+        self._index: Optional[dict[str, int]] = None
+        self._dependencies: Optional[list[Dependencies]] = None
+        try:
+            self.count, self.directory = parse_library_header(self.mapping.readline())
+            if not self.mapping.tell() <= self.directory <= len(self.mapping):
+                raise LinkError("library directory out of range")
+            self.hash_table = HashTable.find(self.mapping, self.directory)
+            if self.hash_table is None:
+                self.read_directory()
+            elif self.hash_table.nmembers != self.count:
+                raise LinkError(f"library hash table has {self.hash_table.nmembers} members (expected {self.count})")
+            end = self.hash_table.offset if self.hash_table is not None else self.directory
+            self.dependencies_offset = find_trailer(self.mapping, end, DEPENDS_MAGIC, "dependencies")
+            self.dependencies_end = end - DEPENDS_TRAILER_SIZE
+        except (LinkError, UnicodeDecodeError) as err:
+            self.close()
+            raise LinkError(f"{path}: error: {err}") from err
+
+    def __enter__(self) -> "Library":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self) -> None:
+        """
+        Close the library.
+
+        The mapping is left open while the data of a member that was read still refers to it, it is closed when the
+        last reference is freed.
+        """
+        self.view.release()
+        try:
+            self.mapping.close()
+        except BufferError:
+            pass
+
+    def read_directory(self) -> list[Member]:
+        """
+        Read the directory.
+
+        :return: the directory entries.
+        :raises LinkError: if the directory is invalid.
+        """
+        if self._members is None:
+            members = parse_library_directory(self.mapping[self.directory :], self.directory)
+            if len(members) != self.count:
+                raise LinkError(f"library directory has {len(members)} members (expected {self.count})")
+            self._members = members
+        return self._members
+
+    @property
+    def members(self) -> list[Member]:
+        """
+        Return the directory entries, reading the directory if it hasn't been read.
+
+        :return: the directory entries.
+        :raises LinkError: if the directory is invalid.
+        """
+        try:
+            return self.read_directory()
+        except (LinkError, UnicodeDecodeError) as err:
+            raise LinkError(f"{self.path}: error: {err}") from err
+
+    def lookup(self, name: str) -> Optional[int]:
+        """
+        Look up the member defining a symbol.
+
+        The hash table is used if the library has one, otherwise the directory is indexed the first time a symbol is
+        looked up. If several members define the symbol the first one is returned.
+
+        :param name: the symbol name.
+        :return: the index of the member, or `None` if no member defines the symbol.
+        :raises LinkError: if the directory or hash table is invalid.
+        """
+        if self.hash_table is not None:
+            try:
+                return self.hash_table.lookup(name)
+            except LinkError as err:
+                raise LinkError(f"{self.path}: error: {err}") from err
+        if self._index is None:
+            self._index = {}
+            for index, member in enumerate(self.members):
+                for symbol in member.symbols:
+                    self._index.setdefault(symbol, index)
+        return self._index.get(name)
+
+    def stored_member(self, index: int) -> StoredMember:
+        """
+        Return where and how a member is stored, from the hash table if the library has one or else the directory.
+
+        :param index: the index of the member.
+        :return: the offset, length, compression method and uncompressed length.
+        :raises LinkError: if the member is out of range or its record is invalid.
+        """
+        if not 0 <= index < self.count:
+            raise LinkError(f"{self.path}: error: library member out of range: {index}")
+        if self.hash_table is None:
+            member = self.members[index]
+            size = member.length if member.compression is Compression.NONE else member.size
+            if size is None:
+                raise LinkError(f"{self.path}: error: library member has no uncompressed length: {index}")
+            return StoredMember(member.offset, member.length, member.compression, size)
+        try:
+            stored = self.hash_table.stored_member(index)
+        except LinkError as err:
+            raise LinkError(f"{self.path}: error: {err}") from err
+        if stored.offset + stored.length > self.directory:
+            raise LinkError(f"{self.path}: error: library member out of range: {index}")
+        return stored
+
+    def extent(self, index: int) -> tuple[int, int]:
+        """
+        Return the offset and length of a member.
+
+        :param index: the index of the member.
+        :return: the offset and length.
+        :raises LinkError: if the member is out of range.
+        """
+        stored = self.stored_member(index)
+        return stored.offset, stored.length
+
+    def member_dependencies(self, index: int) -> Optional[Dependencies]:
+        """
+        Return the symbols defined and referenced by a member, reading the dependencies the first time.
+
+        :param index: the index of the member.
+        :return: the dependencies of the member, or `None` if the library doesn't record its dependencies.
+        :raises LinkError: if the dependencies are invalid or the member is out of range.
+        """
+        if self.dependencies_offset is None:
+            return None
+        if not 0 <= index < self.count:
+            raise LinkError(f"{self.path}: error: library member out of range: {index}")
+        if self._dependencies is None:
+            try:
+                section = self.mapping[self.dependencies_offset : self.dependencies_end]
+                self._dependencies = parse_dependencies(section, self.count)
+            except (LinkError, UnicodeDecodeError) as err:
+                raise LinkError(f"{self.path}: error: {err}") from err
+        return self._dependencies[index]
+
+    def dependencies(self, index: int) -> Optional[list[Dependency]]:
+        """
+        Return the symbols referenced by a member, reading the dependencies the first time.
+
+        :param index: the index of the member.
+        :return: the references of the member, or `None` if the library doesn't record its dependencies.
+        :raises LinkError: if the dependencies are invalid or the member is out of range.
+        """
+        dependencies = self.member_dependencies(index)
+        return None if dependencies is None else dependencies.references
+
+    def prefetch(self, indices: Iterable[int]) -> None:
+        """
+        Ask the operating system to start reading members, so they are in memory by the time they are read.
+
+        :param indices: the indices of the members.
+        """
+        if not hasattr(mmap, "MADV_WILLNEED"):  # pragma: no cover
+            return
+        for index in indices:
+            offset, length = self.extent(index)
+            start = offset - offset % mmap.PAGESIZE
+            if length:
+                self.mapping.madvise(mmap.MADV_WILLNEED, start, offset + length - start)
+
+    def member_lines(self, offset: int, length: int) -> Iterator[bytes]:
+        """
+        Return an iterator over the lines of a member.
+
+        The lines are found without moving the position of the mapping, so members can be read by several threads.
+
+        :param offset: the offset of the member.
+        :param length: the length of the member.
+        :return: an iterator over the raw lines.
+        """
+        end = offset + length
+        while offset < end:
+            newline = self.mapping.find(b"\n", offset, end)
+            stop = end if newline < 0 else newline + 1
+            yield self.mapping[offset:stop]
+            offset = stop
+
+    def read_member(self, index: int) -> Object:
+        """
+        Read a member of the library.
+
+        :param index: the index of the member in the directory.
+        :return: the parsed member, named after the library and its index.
+        :raises LinkError: if there is an error parsing the member.
+        """
+        offset, length, compression, size = self.stored_member(index)
+        name = f"{self.path.stem}({index})"
+        label = Path(f"{self.path}({index})")
+        view = self.view[offset : offset + length]
+        raw_lines: Iterator[bytes]
+        if compression is Compression.NONE:
+            if size != length:
+                raise LinkError(f"{label}: error: library member is {length} bytes (expected {size})")
+            raw_lines = self.member_lines(offset, length)
+        else:
+            try:
+                contents = decompress_member(view, compression)
+                if size != len(contents):
+                    raise LinkError(f"library member is {len(contents)} bytes (expected {size})")
+            except LinkError as err:
+                raise LinkError(f"{label}: error: {err}") from err
+            view = memoryview(contents)
+            raw_lines = io.BytesIO(contents)
+        if is_binary_object(view):
+            return parse_object_file(label, partial(parse_binary_object, view, name, partial(share_data, view)))
+        lines = binary_line_iterator(raw_lines)
+        return parse_object_file(label, partial(parse_object_from_iter, lines, name, partial(defer_mapped_data, view, label)))
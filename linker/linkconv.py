@@ -0,0 +1,75 @@
+"""
+Convert object files between the text and binary formats.
+
+    python -m linker.linkconv main.lk main.lkb
+"""
+
+import sys
+from enum import Enum
+from pathlib import Path
+from typing import Optional
+from typing_extensions import Annotated
+
+import typer
+
+from .binary import is_binary_object
+from .errors import LinkError
+from .object import BINARY_MAGIC_NUMBER
+from .utils import read_object, write_object
+
+
+class Format(str, Enum):
+    """
+    Object file formats.
+    """
+
+    TEXT = "text"
+    BINARY = "binary"
+
+
+def detect_format(path: Path) -> Format:
+    """
+    Detect the format of an object file from its magic number.
+
+    :param path: path to the object file.
+    :return: the format of the object file.
+    """
+    with open(path, mode="rb") as file:
+        return Format.BINARY if is_binary_object(file.read(len(BINARY_MAGIC_NUMBER))) else Format.TEXT
+
+
+def convert(infile: Path, outfile: Path, fmt: Optional[Format] = None) -> Format:
+    """
+    Convert an object file.
+
+    :param infile: path to the input object file.
+    :param outfile: path to the output object file.
+    :param fmt: the output format, by default the opposite of the input format.
+    :return: the format of the output file.
+    """
+    if fmt is None:
+        fmt = Format.TEXT if detect_format(infile) is Format.BINARY else Format.BINARY
+    write_object(read_object(infile), outfile, binary=fmt is Format.BINARY)
+    return fmt
+
+
+def main(
+    infile: Path,
+    outfile: Path,
+    fmt: Annotated[Optional[Format], typer.Option("--format", help="output format (default: the other format)")] = None,
+) -> None:
+    """
+    Convert an object file between the text and binary formats.
+
+    :param infile: path to the input object file.
+    :param outfile: path to the output object file.
+    :param fmt: the output format.
+    """
+    try:
+        convert(infile, outfile, fmt)
+    except (LinkError, FileNotFoundError) as err:
+        sys.exit(str(err))
+
+
+if __name__ == "__main__":
+    typer.run(main)
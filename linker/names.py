@@ -0,0 +1,50 @@
+"""
+Link-wide table of interned names.
+"""
+
+import threading
+
+
+class NameTable:
+    """
+    Interns names and gives each a dense integer id.
+
+    Interning means each distinct name is stored once, however many objects reference it, and tables of symbols can be
+    indexed by id rather than hashing and comparing the names.
+
+    Names can be interned by several threads, such as when library members are parsed in parallel. Names that are
+    already interned are found without locking, new names are added under a lock so each gets exactly one id.
+    """
+
+    def __init__(self) -> None:
+        self.names: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def intern(self, name: str) -> int:
+        """
+        Intern a name.
+
+        :param name: the name to intern.
+        :return: the id of the name.
+        """
+        name_id = self.ids.get(name)
+        if name_id is not None:
+            return name_id
+        with self.lock:
+            name_id = self.ids.get(name)
+            if name_id is None:
+                # Append the name before publishing its id, so a thread that finds the id can look up the name.
+                self.names.append(name)
+                name_id = self.ids[name] = len(self.names) - 1
+            return name_id
+
+    def __getitem__(self, name_id: int) -> str:
+        return self.names[name_id]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+# Shared by every object read in the process, so symbol ids can be compared across objects.
+NAMES = NameTable()
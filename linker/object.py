@@ -2,31 +2,77 @@
 Defines the type for the object format and the various sections such as segments, symbols and relocations.
 """
 
+from array import array
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, overload
+
+from .names import NAMES
 
 MAGIC_NUMBER = "LINK"
+BINARY_MAGIC_NUMBER = b"\x7fLINKBIN"
 
+SegmentData = bytes | bytearray | memoryview
 
-@dataclass
+
+@dataclass(slots=True)
 class Segment:
     """
     Segment definition.
 
     The base is the address where the segment logically starts. The size is the length in bytes of the segment, this
-    should match the length of the `data` if "P" is in the flags.
+    should match the length of the `data` if "P" is in the flags. Loading the data can be deferred until it is first
+    accessed with `defer_data`. The data is a `memoryview` when it is shared with a memory mapped object file, and a
+    `bytearray` when it was assembled by the linker.
     """
 
     name: str
     base: int
     size: int
     flags: str
-    data: bytes = field(init=False, default=b"")
     oldbase: int = field(init=False, compare=False)
+    _data: SegmentData = field(init=False, default=b"", repr=False, compare=False)
+    _loader: Optional[Callable[[], SegmentData]] = field(init=False, default=None, repr=False, compare=False)
 
     def __post_init__(self) -> None:
         self.oldbase = self.base
 
+    def __eq__(self, other: Any) -> bool:
+        if other.__class__ is not self.__class__:
+            return NotImplemented
+        return (self.name, self.base, self.size, self.flags, self.data) == (
+            other.name,
+            other.base,
+            other.size,
+            other.flags,
+            other.data,
+        )
+
+    @property
+    def data(self) -> SegmentData:
+        """
+        Return the segment data, loading it if it was deferred.
+
+        :return: the segment data.
+        """
+        if self._loader is not None:
+            self._data = self._loader()
+            self._loader = None
+        return self._data
+
+    @data.setter
+    def data(self, value: SegmentData) -> None:
+        self._data = value
+        self._loader = None
+
+    def defer_data(self, loader: Callable[[], SegmentData]) -> None:
+        """
+        Defer loading the segment data until it is first accessed.
+
+        :param loader: a function that returns the segment data.
+        """
+        self._data = b""
+        self._loader = loader
+
     @property
     def end(self) -> int:
         """
@@ -39,13 +85,14 @@ class Segment:
         return self.base + self.size
 
 
-@dataclass
+@dataclass(slots=True)
 class Symbol:
     """
     Symbol definition.
 
     The `seg` field is the segment number relative to which the symbol is defined (0 for absolute or undefined
-    symbols).  The `type` is a string of letters that includes D for defined or U for undefined.
+    symbols).  The `type` is a string of letters that includes D for defined or U for undefined. The name is interned
+    in `NAMES` and `id` is its id.
     """
 
     name: str
@@ -53,15 +100,21 @@ class Symbol:
     seg: int
     type: str
     obj: Optional["Object"] = field(init=False, default=None, compare=False)
+    id: int = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.id = NAMES.intern(self.name)
+        self.name = NAMES[self.id]
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class Relocation:
     """
     Relocation definition.
 
     `loc` is the location to be relocated, `seg` is the segment within which the locationis found, `ref` is the segment
-    number of symbol number to be relocated there, and `type` is an architecture-dependent relocation type.
+    number of symbol number to be relocated there, and `type` is an architecture-dependent relocation type. Relocations
+    are read-only, as those read from a `RelocationTable` are copies of its rows.
     """
 
     loc: int
@@ -70,17 +123,133 @@ class Relocation:
     type: str
 
 
+class RelocationTable(Sequence[Relocation]):
+    """
+    Relocations stored as columns.
+
+    Relocations are the most numerous records in an object, so rather than a `Relocation` instance per relocation
+    each field is stored in an array and the types are interned as small integer codes. Indexing and iterating the
+    table creates read-only `Relocation` instances on demand, so the table can only be changed through its methods.
+    """
+
+    __slots__ = ("locs", "segs", "refs", "types", "type_names", "type_codes")
+
+    def __init__(self, rels: Iterable[Relocation] = ()) -> None:
+        self.locs = array("Q")
+        self.segs = array("I")
+        self.refs = array("I")
+        self.types = array("H")
+        self.type_names: list[str] = []
+        self.type_codes: dict[str, int] = {}
+        self.extend(rels)
+
+    def type_code(self, type_name: str) -> int:
+        """
+        Return the code for a relocation type, adding it if it hasn't been seen before.
+
+        :param type_name: the relocation type.
+        :return: the code for the type.
+        """
+        code = self.type_codes.get(type_name)
+        if code is None:
+            code = self.type_codes[type_name] = len(self.type_names)
+            self.type_names.append(type_name)
+        return code
+
+    def add(self, loc: int, seg: int, ref: int, type_name: str) -> None:
+        """
+        Add a relocation to the table.
+
+        :param loc: the location to be relocated.
+        :param seg: the segment containing the location.
+        :param ref: the segment or symbol number.
+        :param type_name: the relocation type.
+        :raises ValueError: if a value is negative or too large.
+        """
+        n = len(self)
+        try:
+            self.locs.append(loc)
+            self.segs.append(seg)
+            self.refs.append(ref)
+        except OverflowError as err:
+            # Keep the columns the same length.
+            del self.locs[n:]
+            del self.segs[n:]
+            del self.refs[n:]
+            raise ValueError(str(err)) from err
+        self.types.append(self.type_code(type_name))
+
+    def append(self, rel: Relocation) -> None:
+        """
+        Append a relocation to the table.
+
+        :param rel: the relocation to append.
+        """
+        self.add(rel.loc, rel.seg, rel.ref, rel.type)
+
+    def extend(self, rels: Iterable[Relocation]) -> None:
+        """
+        Append relocations to the table.
+
+        :param rels: the relocations to append.
+        """
+        for rel in rels:
+            self.append(rel)
+
+    def __len__(self) -> int:
+        return len(self.types)
+
+    @overload
+    def __getitem__(self, index: int) -> Relocation: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> "RelocationTable": ...
+
+    def __getitem__(self, index: int | slice) -> "Relocation | RelocationTable":
+        if isinstance(index, slice):
+            return RelocationTable(self[i] for i in range(*index.indices(len(self))))
+        return Relocation(self.locs[index], self.segs[index], self.refs[index], self.type_names[self.types[index]])
+
+    def __iter__(self) -> Iterator[Relocation]:
+        type_names = self.type_names
+        for loc, seg, ref, code in zip(self.locs, self.segs, self.refs, self.types):
+            yield Relocation(loc, seg, ref, type_names[code])
+
+    def __eq__(self, other: Any) -> bool:
+        if isinstance(other, RelocationTable):
+            return (
+                self.locs == other.locs
+                and self.segs == other.segs
+                and self.refs == other.refs
+                and [self.type_names[code] for code in self.types] == [other.type_names[code] for code in other.types]
+            )
+        if isinstance(other, Sequence):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __repr__(self) -> str:
+        return f"RelocationTable({list(self)!r})"
+
+
 @dataclass
 class Object:
     """
     Object definition.
+
+    The relocations are stored in a `RelocationTable`, any other sequence of relocations is converted.
     """
 
     name: str
     segs: list[Segment]
     syms: list[Symbol]
-    rels: list[Relocation]
+    rels: RelocationTable
 
-    def __post_init__(self) -> None:
+    def __init__(self, name: str, segs: list[Segment], syms: list[Symbol], rels: Iterable[Relocation]) -> None:
+        self.name = name
+        self.segs = segs
+        self.syms = syms
+        self.rels = rels if isinstance(rels, RelocationTable) else RelocationTable(rels)
         for sym in self.syms:
             sym.obj = self
@@ -3,12 +3,13 @@ LINK object format parser.
 """
 
 from dataclasses import fields, Field
-from itertools import filterfalse
+from functools import cache
+from itertools import islice
 from operator import attrgetter
-from typing import Any, Iterable, Iterator, NamedTuple, TypeVar
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, TypeVar
 
 from .errors import LinkError, ParseError
-from .object import Segment, Symbol, Relocation, Object, MAGIC_NUMBER
+from .object import Segment, Symbol, Relocation, RelocationTable, Object, MAGIC_NUMBER
 
 COMMENT_LEADER = "#"
 
@@ -18,10 +19,13 @@ T = TypeVar("T", Segment, Symbol, Relocation)
 class Line(NamedTuple):
     """
     Represents a line in an object file.
+
+    The offset is the position in bytes of the contents within the file, or -1 if it isn't known.
     """
 
     number: int
     contents: str
+    offset: int = -1
 
 
 def is_magic_number(s: str) -> bool:
@@ -46,15 +50,33 @@ def is_comment(s: str) -> bool:
 
 def line_iterator(lines: Iterable[str], start: int = 1) -> Iterator[Line]:
     """
-    Return an iterator that.
+    Return an iterator over the stripped lines that aren't comments.
+
+    :param lines: the lines to iterate over.
+    :param start: the number of the first line.
+    :return: an iterator of numbered lines.
+    """
+    for number, contents in enumerate(map(str.strip, lines), start=start):
+        if not contents.startswith(COMMENT_LEADER):
+            yield Line(number, contents)
+
+
+def binary_line_iterator(file: Iterable[bytes], start: int = 1) -> Iterator[Line]:
+    """
+    Return an iterator over the stripped lines of a binary file that aren't comments.
+
+    Unlike `line_iterator` each line records the offset of its contents within the file.
+
+    :param file: the file, or any iterable of its lines, to iterate over.
+    :param start: the number of the first line.
+    :return: an iterator of numbered lines.
     """
-    yield from map(
-        Line._make,
-        filterfalse(
-            lambda line: is_comment(line[1]),
-            enumerate(map(str.strip, lines), start=start),
-        ),
-    )
+    offset = 0
+    for number, raw in enumerate(file, start=start):
+        contents = raw.strip()
+        if not contents.startswith(COMMENT_LEADER.encode("ascii")):
+            yield Line(number, contents.decode("ascii"), offset + len(raw) - len(raw.lstrip()))
+        offset += len(raw)
 
 
 def validate_magic_number(line: Line) -> None:
@@ -157,6 +179,32 @@ def parse_item_from_str(s: str, cls: type[T]) -> T:
     return cls(*init_args)
 
 
+@cache
+def make_decoder(cls: type[T]) -> Callable[[str], list[Any]]:
+    """
+    Build a decoder that parses the values of a `cls` instance from a string.
+
+    The data class fields are inspected once, so decoding a line doesn't need to reflect over the fields. Integers are
+    parsed as hexadecimal in place and the other values are kept as strings, any extra values are ignored.
+
+    :param cls: the type of the dataclass.
+    :return: a function that parses the values to pass to `cls` from a string.
+    """
+    members = [member for member in fields(cls) if member.init]
+    count = len(members)
+    integers = tuple(i for i, member in enumerate(members) if member.type is int)
+
+    def decode(s: str) -> list[Any]:
+        parts = s.split()
+        if len(parts) < count:
+            raise ValueError(f"not enough values (expected {count}, got {len(parts)})")
+        for i in integers:
+            parts[i] = int(parts[i], 16)
+        return parts if len(parts) == count else parts[:count]
+
+    return decode
+
+
 def parse_item(line: Line, cls: type[T]) -> T:
     """
     Parse an item from the given line.
@@ -167,24 +215,67 @@ def parse_item(line: Line, cls: type[T]) -> T:
     :raises ParseError: if there was an error parsing the object.
     """
     try:
-        return parse_item_from_str(line.contents, cls)
+        return cls(*make_decoder(cls)(line.contents))
     except ValueError as err:
         raise ParseError(line.number, f"failed to parse {cls.__name__.lower()}: {err}") from err
 
 
-def parse_lines(lines: Iterator[Line], n: int, cls: type[T]) -> Iterator[T]:
+def parse_block(block: list[Line], cls: type[T]) -> list[T]:
+    """
+    Parse a block of lines containing definitions of the same type.
+
+    :param block: the lines containing the definitions.
+    :param cls: the type to be parsed.
+    :return: a list of `cls` instances, one for each line.
+    :raises ParseError: if there was an error parsing any of the lines.
+    """
+    decode = make_decoder(cls)
+    try:
+        return [cls(*decode(line.contents)) for line in block]
+    except ValueError:
+        # Find the first line that fails so the error has the correct line number.
+        for line in block:
+            parse_item(line, cls)
+        raise
+
+
+def parse_lines(lines: Iterator[Line], n: int, cls: type[T]) -> list[T]:
     """
     Try and parse a number of objects for a particular definition.
 
     :param lines: an iterator of lines containing the object definitions.
     :param n: the number of objects to parse.
     :param cls: the type to be parsed.
+    :return: the list of parsed objects.
     :raises ParseError: if there was an error parsing an object definition.
     :raises LinkError: if there was not enough lines.
     """
-    for _ in range(n):
-        line = next_line(lines, f"expected {cls.__name__.lower()} definition")
-        yield parse_item(line, cls)
+    items = parse_block(list(islice(lines, n)), cls)
+    if len(items) < n:
+        raise LinkError(f"expected {cls.__name__.lower()} definition")
+    return items
+
+
+def parse_relocations(lines: Iterator[Line], n: int) -> RelocationTable:
+    """
+    Parse a number of relocations straight into the columns of a table.
+
+    :param lines: an iterator of lines containing the relocation definitions.
+    :param n: the number of relocations to parse.
+    :return: the table of parsed relocations.
+    :raises ParseError: if there was an error parsing a relocation definition.
+    :raises LinkError: if there was not enough lines.
+    """
+    decode = make_decoder(Relocation)
+    table = RelocationTable()
+    for line in islice(lines, n):
+        try:
+            table.add(*decode(line.contents))
+        except ValueError as err:
+            raise ParseError(line.number, f"failed to parse relocation: {err}") from err
+    if len(table) < n:
+        raise LinkError("expected relocation definition")
+    return table
 
 
 def parse_data(line: Line, seg: Segment) -> None:
@@ -201,32 +292,39 @@ def parse_data(line: Line, seg: Segment) -> None:
         raise ParseError(line.number, f"failed to parse data for '{seg.name}': {err}") from err
 
 
-def parse_segment_data(lines: Iterator[Line], segs: list[Segment]) -> None:
+def parse_segment_data(
+    lines: Iterator[Line], segs: list[Segment], data_parser: Callable[[Line, Segment], None] = parse_data
+) -> None:
     """
     Parse the data for each of the segments that have the data present.
 
     :param lines: the lines containing the segment data.
     :param segs: the list of segments to check if each needs data.
+    :param data_parser: the function used to parse the data of a segment from its line.
     :raises ParseError: if there was an error parsing the segment data.
     """
     for seg in filter(lambda seg: "P" in seg.flags and seg.size > 0, segs):
-        parse_data(next_line(lines, f"expected data for '{seg.name}'"), seg)
+        data_parser(next_line(lines, f"expected data for '{seg.name}'"), seg)
 
 
-def parse_object_from_iter(lines: Iterator[Line], name: str) -> Object:
+def parse_object_from_iter(
+    lines: Iterator[Line], name: str, data_parser: Callable[[Line, Segment], None] = parse_data
+) -> Object:
     """
     Parse an object from an iterator of lines.
 
     :param lines: an iterator of lines.
     :param name: the name of the object file.
+    :param data_parser: the function used to parse the data of a segment from its line, this can be used to defer
+        decoding the data (see `linker.utils.read_object`).
     :return: the parsed object file.
     """
     validate_magic_number(next_line(lines, "expected magic number"))
     nsegs, nsyms, nrels = validate_counts(next_line(lines, "expected counts"))
-    segs = list(parse_lines(lines, nsegs, Segment))
-    syms = list(parse_lines(lines, nsyms, Symbol))
-    rels = list(parse_lines(lines, nrels, Relocation))
-    parse_segment_data(lines, segs)
+    segs = parse_lines(lines, nsegs, Segment)
+    syms = parse_lines(lines, nsyms, Symbol)
+    rels = parse_relocations(lines, nrels)
+    parse_segment_data(lines, segs, data_parser)
     return Object(name, segs, syms, rels)
 
 
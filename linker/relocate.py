@@ -0,0 +1,395 @@
+"""
+Apply relocations to the linked segment data.
+
+The relocation types are those from project 7.1, `loc` is an address within segment `seg` of the input object and
+`ref` is a segment or symbol number of the same object:
+
+    A4   four byte absolute reference to segment `ref`
+    R4   four byte reference to segment `ref`, relative to the address after `loc`
+    AS4  four byte absolute reference to symbol `ref`, plus the addend stored at `loc`
+    RS4  four byte reference to symbol `ref` relative to the address after `loc`, plus the addend stored at `loc`
+    U2   two bytes, the upper half of the address of symbol `ref`
+    L2   two bytes, the lower half of the address of symbol `ref`
+
+The relocations of an object are grouped by segment and type and each group is applied to the output data with NumPy
+when it is installed, or one relocation at a time otherwise. The values are stored in the byte order of the target, the
+codecs for each byte order are created once.
+"""
+
+from enum import Enum
+from struct import Struct
+from typing import Any, Callable, Iterable, Mapping, NamedTuple, Optional
+
+from .errors import LinkError
+from .object import Object, Segment
+from .symtab import SymbolTable
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# The arguments are the value stored at the location, the address of the segment or symbol (or for segment references,
+# how far the segment moved), how far the location moved and its new address. The functions work on integers as well
+# as NumPy arrays.
+Apply = Callable[[Any, Any, Any, Any], Any]
+
+
+class RelocationType(NamedTuple):
+    """
+    How to apply a relocation type.
+    """
+
+    width: int
+    symbolic: bool
+    apply: Apply
+
+
+RELOCATION_TYPES: dict[str, RelocationType] = {
+    "A4": RelocationType(4, False, lambda old, target, delta, addr: old + target),
+    "R4": RelocationType(4, False, lambda old, target, delta, addr: old + target - delta),
+    "AS4": RelocationType(4, True, lambda old, target, delta, addr: old + target),
+    "RS4": RelocationType(4, True, lambda old, target, delta, addr: old + target - (addr + 4)),
+    "U2": RelocationType(2, True, lambda old, target, delta, addr: target >> 16),
+    "L2": RelocationType(2, True, lambda old, target, delta, addr: target),
+}
+
+
+class Endian(str, Enum):
+    """
+    Byte order of the target.
+    """
+
+    LITTLE = "little"
+    BIG = "big"
+
+
+PREFIXES = {Endian.LITTLE: "<", Endian.BIG: ">"}
+CODECS = {endian: {2: Struct(f"{prefix}H"), 4: Struct(f"{prefix}I")} for endian, prefix in PREFIXES.items()}
+
+
+def has_numpy() -> bool:
+    """
+    Return `True` if NumPy is installed, relocations are applied in bulk with NumPy when it is.
+    """
+    return np is not None
+
+
+def output_segments(segs: Iterable[Segment]) -> dict[str, Segment]:
+    """
+    Map the segment names to the output segments.
+
+    :param segs: the output segments.
+    :return: the first output segment with each name.
+    """
+    outputs: dict[str, Segment] = {}
+    for seg in segs:
+        outputs.setdefault(seg.name, seg)
+    return outputs
+
+
+def symbol_addresses(obj: Object, symtab: SymbolTable) -> list[Optional[int]]:
+    """
+    Return the resolved address of each symbol of an object.
+
+    :param obj: the object.
+    :param symtab: the resolved symbol table.
+    :return: the address of each symbol, or `None` if the symbol is undefined.
+    """
+    addrs: list[Optional[int]] = []
+    for sym in obj.syms:
+        resolved = symtab.lookup(sym)
+        addrs.append(resolved.value if resolved is not None and "D" in resolved.type else None)
+    return addrs
+
+
+def relocation_type(name: str) -> RelocationType:
+    """
+    Return how to apply a relocation type.
+
+    :param name: the name of the relocation type.
+    :return: the relocation type.
+    :raises LinkError: if the relocation type isn't supported.
+    """
+    try:
+        return RELOCATION_TYPES[name]
+    except KeyError:
+        raise LinkError(f"unknown relocation type: {name}") from None
+
+
+class Target(NamedTuple):
+    """
+    Where the data of an input segment was placed in the output.
+    """
+
+    seg: Segment
+    buffer: bytearray
+    offset: int
+
+
+def segment_targets(obj: Object, outputs: Mapping[str, Segment]) -> list[Optional[Target]]:
+    """
+    Return where the data of each segment of an object was placed.
+
+    :param obj: the object.
+    :param outputs: the output segment of each input segment name.
+    :return: the target of each segment, or `None` if the segment has no data in the output.
+    """
+    targets: list[Optional[Target]] = []
+    for seg in obj.segs:
+        out = outputs.get(seg.name)
+        data = out.data if out is not None else None
+        if out is None or not isinstance(data, bytearray):
+            targets.append(None)
+        else:
+            targets.append(Target(seg, data, seg.base - out.base))
+    return targets
+
+
+def relocation_error(obj: Object, message: str) -> LinkError:
+    """
+    Return an error for an invalid relocation of an object.
+
+    :param obj: the object.
+    :param message: what is wrong with the relocation.
+    :return: the error, naming the object.
+    """
+    return LinkError(f"{obj.name}: {message}")
+
+
+def undefined_symbol_error(obj: Object, ref: int) -> LinkError:
+    """
+    Return an error for a relocation referencing an undefined symbol.
+
+    :param obj: the object.
+    :param ref: the number of the symbol.
+    :return: the error, naming the symbol if the object has it.
+    """
+    name = obj.syms[ref].name if ref < len(obj.syms) else str(ref)
+    return relocation_error(obj, f"undefined symbol: {name}")
+
+
+def segment_target(obj: Object, targets: list[Optional[Target]], seg_index: int) -> Target:
+    """
+    Return where the data of the segment containing a relocation was placed.
+
+    :param obj: the object.
+    :param targets: where the data of each segment was placed.
+    :param seg_index: the number of the segment.
+    :return: the target of the segment.
+    :raises LinkError: if the segment has no data in the output.
+    """
+    target = targets[seg_index] if seg_index < len(targets) else None
+    if target is None:
+        raise relocation_error(obj, f"relocation in segment without data: {seg_index}")
+    return target
+
+
+def relocate_object_python(
+    obj: Object, targets: list[Optional[Target]], addrs: list[Optional[int]], endian: Endian
+) -> None:
+    """
+    Apply the relocations of an object one at a time.
+
+    :param obj: the object.
+    :param targets: where the data of each segment was placed.
+    :param addrs: the address of each symbol.
+    :param endian: the byte order of the target.
+    :raises LinkError: if a relocation is invalid.
+    """
+    rels = obj.rels
+    kinds = [relocation_type(name) for name in rels.type_names]
+    codecs = [CODECS[endian][kind.width] for kind in kinds]
+    masks = [(1 << (8 * kind.width)) - 1 for kind in kinds]
+    deltas = [seg.base - seg.oldbase for seg in obj.segs]
+    for loc, seg_index, ref, code in zip(rels.locs, rels.segs, rels.refs, rels.types):
+        kind = kinds[code]
+        target = segment_target(obj, targets, seg_index)
+        offset = loc - target.seg.oldbase
+        if offset < 0 or offset + kind.width > target.seg.size:
+            raise relocation_error(obj, f"relocation out of range: {loc:x}")
+        if kind.symbolic:
+            value = addrs[ref] if ref < len(addrs) else None
+            if value is None:
+                raise undefined_symbol_error(obj, ref)
+        elif ref < len(deltas):
+            value = deltas[ref]
+        else:
+            raise relocation_error(obj, f"relocation references missing segment: {ref}")
+        codec = codecs[code]
+        pos = target.offset + offset
+        delta = deltas[seg_index]
+        (old,) = codec.unpack_from(target.buffer, pos)
+        codec.pack_into(target.buffer, pos, kind.apply(old, value, delta, loc + delta) & masks[code])
+
+
+def has_overlaps(locs: Any, segs: Any, types: Any, widths: Any) -> bool:
+    """
+    Return whether any relocations of an object overlap.
+
+    :param locs: the location of each relocation.
+    :param segs: the segment of each relocation.
+    :param types: the type code of each relocation.
+    :param widths: the width of each type code.
+    :return: `True` if a relocation starts before the previous one in the same segment ends.
+    """
+    by_loc = np.lexsort((locs, segs))
+    sorted_segs, sorted_locs = segs[by_loc], locs[by_loc]
+    overlaps = (sorted_segs[1:] == sorted_segs[:-1]) & (sorted_locs[1:] - sorted_locs[:-1] < widths[types[by_loc[:-1]]])
+    return bool(overlaps.any())
+
+
+def relocation_groups(segs: Any, types: Any) -> list[Any]:
+    """
+    Group the relocations of an object by segment and type.
+
+    :param segs: the segment of each relocation.
+    :param types: the type code of each relocation.
+    :return: the indices of the relocations in each group.
+    """
+    order = np.lexsort((types, segs))
+    keys = segs[order].astype(np.uint64) << np.uint64(16) | types[order]
+    return np.split(order, np.flatnonzero(np.diff(keys)) + 1)
+
+
+def check_group_range(obj: Object, target: Target, kind: RelocationType, locs: Any) -> None:
+    """
+    Check that the relocations of a group are within their segment.
+
+    :param obj: the object.
+    :param target: where the data of the segment was placed.
+    :param kind: the relocation type of the group.
+    :param locs: the locations of the relocations.
+    :raises LinkError: if a relocation is out of range.
+    """
+    oldbase = target.seg.oldbase
+    last = oldbase + target.seg.size - kind.width
+    out_of_range = (locs < oldbase) | (locs > max(last, oldbase))
+    if last < oldbase or out_of_range.any():
+        bad = locs[0] if last < oldbase else locs[out_of_range][0]
+        raise relocation_error(obj, f"relocation out of range: {int(bad):x}")
+
+
+def symbol_values(addrs: list[Optional[int]]) -> tuple[Any, Any]:
+    """
+    Return the addresses of the symbols of an object as NumPy arrays.
+
+    :param addrs: the address of each symbol, or `None` if the symbol is undefined.
+    :return: the address of each symbol modulo 2**64, and whether it is defined.
+    """
+    # Addresses are stored modulo 2**64 so the arithmetic can wrap in unsigned integers.
+    values = np.array([0 if addr is None else addr % (1 << 64) for addr in addrs], dtype=np.uint64)
+    return values, np.array([addr is not None for addr in addrs], dtype=bool)
+
+
+def group_values(obj: Object, kind: RelocationType, refs: Any, symbols: tuple[Any, Any], deltas: Any) -> Any:
+    """
+    Return the addresses of the symbols, or how far the segments moved, referenced by a group of relocations.
+
+    :param obj: the object.
+    :param kind: the relocation type of the group.
+    :param refs: the symbol or segment numbers.
+    :param symbols: the address of each symbol and whether it is defined, from `symbol_values`.
+    :param deltas: how far each segment moved, modulo 2**64.
+    :return: the value of each reference, modulo 2**64.
+    :raises LinkError: if a symbol is undefined or a segment is missing.
+    """
+    if not kind.symbolic:
+        if int(refs.max()) >= len(deltas):
+            raise relocation_error(obj, f"relocation references missing segment: {int(refs.max())}")
+        return deltas[refs]
+    values, defined = symbols
+    missing = refs >= len(values)
+    if not missing.any():
+        missing = ~defined[refs]
+    if missing.any():
+        raise undefined_symbol_error(obj, int(refs[missing][0]))
+    return values[refs]
+
+
+def apply_group(target: Target, kind: RelocationType, endian: Endian, locs: Any, values: Any) -> None:
+    """
+    Apply a group of relocations with the same segment and type to the output data.
+
+    :param target: where the data of the segment was placed.
+    :param kind: the relocation type of the group.
+    :param endian: the byte order of the target.
+    :param locs: the locations of the relocations.
+    :param values: the value of each reference.
+    """
+    dtype = np.dtype(f"{PREFIXES[endian]}u{kind.width}")
+    delta = np.uint64((target.seg.base - target.seg.oldbase) % (1 << 64))
+    data = np.frombuffer(target.buffer, dtype=np.uint8)
+    pos = (locs - np.uint64(target.seg.oldbase)).astype(np.intp) + target.offset
+    index = pos[:, None] + np.arange(kind.width)
+    old = data[index].view(dtype).reshape(-1).astype(np.uint64)
+    new = kind.apply(old, values, delta, locs + delta) & np.uint64((1 << (8 * kind.width)) - 1)
+    data[index] = new.astype(dtype).view(np.uint8).reshape(-1, kind.width)
+
+
+def relocate_object_numpy(
+    obj: Object, targets: list[Optional[Target]], addrs: list[Optional[int]], endian: Endian
+) -> None:
+    """
+    Apply the relocations of an object in groups with the same segment and type.
+
+    A group reads all its old values before writing the new ones, and the groups are applied in a different order to
+    the relocations. That only gives the same result as applying the relocations one at a time when no relocations
+    overlap, so an object with overlapping relocations is relocated with `relocate_object_python`.
+
+    :param obj: the object.
+    :param targets: where the data of each segment was placed.
+    :param addrs: the address of each symbol.
+    :param endian: the byte order of the target.
+    :raises LinkError: if a relocation is invalid.
+    """
+    kinds = [relocation_type(name) for name in obj.rels.type_names]
+    locs = np.frombuffer(obj.rels.locs, dtype=np.uint64)
+    segs = np.frombuffer(obj.rels.segs, dtype=np.uint32)
+    refs = np.frombuffer(obj.rels.refs, dtype=np.uint32)
+    types = np.frombuffer(obj.rels.types, dtype=np.uint16)
+    if has_overlaps(locs, segs, types, np.array([kind.width for kind in kinds], dtype=np.uint64)):
+        relocate_object_python(obj, targets, addrs, endian)
+        return
+    deltas = np.array([(seg.base - seg.oldbase) % (1 << 64) for seg in obj.segs], dtype=np.uint64)
+    symbols = symbol_values(addrs)
+    for group in relocation_groups(segs, types):
+        kind = kinds[int(types[group[0]])]
+        target = segment_target(obj, targets, int(segs[group[0]]))
+        group_locs = locs[group]
+        check_group_range(obj, target, kind, group_locs)
+        apply_group(target, kind, endian, group_locs, group_values(obj, kind, refs[group], symbols, deltas))
+
+
+def relocate(
+    objs: Iterable[Object],
+    segs: Iterable[Segment],
+    symtab: SymbolTable,
+    use_numpy: Optional[bool] = None,
+    endian: Endian = Endian.LITTLE,
+    outputs: Optional[Mapping[str, Segment]] = None,
+) -> None:
+    """
+    Apply the relocations of the input objects to the output segment data.
+
+    The segments must have been linked, so the input segments have their new base addresses and the output segments
+    have their data, and the symbols resolved to their addresses.
+
+    :param objs: the input objects.
+    :param segs: the output segments.
+    :param symtab: the resolved symbol table.
+    :param use_numpy: apply the relocations with NumPy, by default NumPy is used if it's installed.
+    :param endian: the byte order of the target.
+    :param outputs: the output segment of each input segment name, built from `segs` if not given.
+    :raises LinkError: if a relocation is invalid.
+    """
+    if use_numpy is None:
+        use_numpy = has_numpy()
+    if use_numpy and not has_numpy():
+        raise LinkError("NumPy isn't installed")
+    relocate_object = relocate_object_numpy if use_numpy else relocate_object_python
+    if outputs is None:
+        outputs = output_segments(segs)
+    for obj in objs:
+        if len(obj.rels):
+            relocate_object(obj, segment_targets(obj, outputs), symbol_addresses(obj, symtab), endian)
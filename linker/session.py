@@ -0,0 +1,240 @@
+"""
+State shared by a batch of links in one process.
+"""
+
+import threading
+from collections import OrderedDict
+from functools import partial
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Callable, NamedTuple, Optional, TypeVar
+
+from .library import Library
+from .object import Object, Segment, Symbol
+from .utils import read_object
+
+T = TypeVar("T")
+
+# The size and modification time of a file, a cached entry is only used while the stamp of its file is unchanged.
+Stamp = tuple[int, int]
+
+
+def file_stamp(path: Path) -> Stamp:
+    """
+    Return the stamp of a file.
+
+    :param path: path to the file.
+    :return: the size and modification time of the file.
+    :raises FileNotFoundError: if the path doesn't exist.
+    """
+    stat = path.stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def copy_object(obj: Object) -> Object:
+    """
+    Copy an object so it can be linked without changing the original.
+
+    The segments and symbols are copied as linking modifies them. The segment data of the copy is loaded from the
+    original when it is first accessed, so it is only decoded once however many copies are made, and the relocations
+    are shared as they are only read.
+
+    :param obj: the object to copy.
+    :return: the copy.
+    """
+    segs: list[Segment] = []
+    for seg in obj.segs:
+        copy = Segment(seg.name, seg.base, seg.size, seg.flags)
+        copy.defer_data(partial(getattr, seg, "data"))
+        segs.append(copy)
+    syms = [Symbol(sym.name, sym.value, sym.seg, sym.type) for sym in obj.syms]
+    return Object(obj.name, segs, syms, obj.rels)
+
+
+class CacheEntry(NamedTuple):
+    """
+    A parsed member, the stamp of the file it was read from and its estimated size.
+    """
+
+    obj: Object
+    stamp: Stamp
+    size: int
+
+
+class LinkSession:
+    """
+    Libraries, library indexes and parsed members shared by the links in a session.
+
+    Libraries and indexes are kept open and are reopened when the size or modification time of their file changes,
+    which also drops the members read from them. Parsed members are kept in a least recently used cache, the size of a
+    member is estimated from its size in the library and members are evicted when the total is larger than `max_size`
+    bytes. Reading a member returns a copy of the cached member, so the links don't affect each other.
+    """
+
+    def __init__(self, max_size: int = 256 << 20) -> None:
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.libraries: dict[Path, tuple[Stamp, Library]] = {}
+        self.indexes: dict[Path, tuple[Stamp, Any]] = {}
+        self.members: OrderedDict[tuple[Path, Optional[int]], CacheEntry] = OrderedDict()
+        self.lock = threading.Lock()
+
+    def __enter__(self) -> "LinkSession":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the libraries and drop the cached members.
+        """
+        for _, lib in self.libraries.values():
+            lib.close()
+        self.libraries.clear()
+        self.indexes.clear()
+        self.members.clear()
+        self.size = 0
+
+    def invalidate(self, path: Path) -> None:
+        """
+        Drop the cached members read from a file.
+
+        :param path: the resolved path of the file.
+        """
+        with self.lock:
+            for key in [key for key in self.members if key[0] == path]:
+                self.size -= self.members.pop(key).size
+            self.invalidations += 1
+
+    def library(self, path: Path) -> Library:
+        """
+        Open a file format library, or return the library opened by an earlier link if it hasn't changed.
+
+        :param path: path to the library.
+        :return: the library, which is closed by the session.
+        :raises FileNotFoundError: if the path doesn't exist.
+        :raises LinkError: if the library is invalid.
+        """
+        path = path.resolve()
+        stamp = file_stamp(path)
+        entry = self.libraries.get(path)
+        if entry is not None:
+            if entry[0] == stamp:
+                return entry[1]
+            entry[1].close()
+            del self.libraries[path]
+            self.invalidate(path)
+        lib = Library(path)
+        self.libraries[path] = (stamp, lib)
+        return lib
+
+    def index(self, path: Path, build: Callable[[], T]) -> T:
+        """
+        Return an index of a library built by an earlier link, or build it if the file it's built from has changed.
+
+        :param path: path to the file the index is built from.
+        :param build: the function that builds the index.
+        :return: the index.
+        :raises FileNotFoundError: if the path doesn't exist.
+        """
+        path = path.resolve()
+        stamp = file_stamp(path)
+        entry = self.indexes.get(path)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+        index = build()
+        self.indexes[path] = (stamp, index)
+        return index
+
+    def lookup(self, key: tuple[Path, Optional[int]], stamp: Stamp, size: int, load: Callable[[], Object]) -> Object:
+        """
+        Look up a member in the cache, loading it if it isn't cached or its file has changed.
+
+        :param key: the path of the file and the index of the member, or `None` for an object file.
+        :param stamp: the stamp of the file.
+        :param size: the estimated size of the member.
+        :param load: the function that reads the member.
+        :return: a copy of the member.
+        """
+        with self.lock:
+            entry = self.members.get(key)
+            if entry is not None and entry.stamp == stamp:
+                self.members.move_to_end(key)
+                self.hits += 1
+                return copy_object(entry.obj)
+            self.misses += 1
+        obj = load()
+        with self.lock:
+            old = self.members.pop(key, None)
+            if old is not None:
+                self.size -= old.size
+            self.members[key] = CacheEntry(obj, stamp, size)
+            self.size += size
+            self.evict()
+        return copy_object(obj)
+
+    def evict(self) -> None:
+        """
+        Evict the least recently used members until the cache is no larger than `max_size`.
+        """
+        while self.size > self.max_size and self.members:
+            _, entry = self.members.popitem(last=False)
+            self.size -= entry.size
+            self.evictions += 1
+
+    def read_member(self, lib: Library, index: int) -> Object:
+        """
+        Read a member of a library opened by the session.
+
+        :param lib: the library.
+        :param index: the index of the member.
+        :return: the parsed member.
+        :raises LinkError: if there is an error parsing the member.
+        """
+        entry = self.libraries.get(lib.path)
+        if entry is None or entry[1] is not lib:
+            return lib.read_member(index)
+        _, length = lib.extent(index)
+        return self.lookup((lib.path, index), entry[0], length, partial(lib.read_member, index))
+
+    def read_object(self, path: Path) -> Object:
+        """
+        Read an object file, such as a member of a directory format library, with its segment data loaded lazily.
+
+        :param path: path to the object file.
+        :return: the parsed object.
+        :raises FileNotFoundError: if the path doesn't exist.
+        :raises LinkError: if there is an error parsing the file.
+        """
+        path = path.resolve()
+        stamp = file_stamp(path)
+        return self.lookup((path, None), stamp, stamp[0], partial(read_object, path, lazy=True))
+
+    @property
+    def hit_rate(self) -> float:
+        """
+        Return the fraction of member reads found in the cache.
+        """
+        reads = self.hits + self.misses
+        return self.hits / reads if reads else 0.0
+
+    def summary(self) -> str:
+        """
+        Return a summary of the session statistics.
+
+        :return: the number of hits, misses, evictions and invalidations and the hit rate.
+        """
+        return (
+            f"session: {self.hits} hits, {self.misses} misses, {self.evictions} evictions, "
+            f"{self.invalidations} invalidations ({self.hit_rate:.0%} hit rate)"
+        )
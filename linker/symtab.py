@@ -0,0 +1,117 @@
+"""
+Symbol table indexed by interned name ids.
+"""
+
+from typing import ItemsView, Iterable, Iterator, MutableMapping, Optional, ValuesView
+
+from .errors import LinkError
+from .names import NAMES
+from .object import Symbol
+
+
+def defined_in(syms: Iterable[Symbol]) -> str:
+    """
+    Describe the objects that define a symbol, for diagnostics.
+
+    :param syms: the definitions of the symbol.
+    :return: the names of the objects defining the symbol.
+    """
+    return ", ".join(sym.obj.name if sym.obj else "<unknown>" for sym in syms)
+
+
+class SymbolItems(ItemsView[str, Symbol]):
+    """
+    The names and symbols of a symbol table, iterated without looking up each name.
+    """
+
+    _mapping: "SymbolTable"
+
+    def __iter__(self) -> Iterator[tuple[str, Symbol]]:
+        return ((NAMES[name_id], sym) for name_id, sym in self._mapping.symbols.items())
+
+
+class SymbolTable(MutableMapping[str, Symbol]):
+    """
+    A table of symbols indexed by the id of their name.
+
+    The table can be used as a mapping from names to symbols, but the symbols are keyed by id so `lookup` and `add`
+    don't need to hash the name. The ids are shared by every name interned in the process, so a table only holds the
+    ids of its own symbols and its size doesn't depend on the names seen by earlier links. Symbols are iterated in the
+    order they were added.
+    """
+
+    def __init__(self) -> None:
+        self.symbols: dict[int, Symbol] = {}
+
+    def by_id(self, name_id: int) -> Optional[Symbol]:
+        """
+        Return the symbol with the given name id.
+
+        :param name_id: the id of the name.
+        :return: the symbol, or `None` if there isn't one.
+        """
+        return self.symbols.get(name_id)
+
+    def lookup(self, sym: Symbol) -> Optional[Symbol]:
+        """
+        Return the symbol with the same name as `sym`.
+
+        :param sym: the symbol to look up.
+        :return: the symbol in the table, or `None` if there isn't one.
+        """
+        return self.by_id(sym.id)
+
+    def add(self, sym: Symbol) -> None:
+        """
+        Add a symbol, replacing any symbol with the same name.
+
+        :param sym: the symbol to add.
+        """
+        self.symbols[sym.id] = sym
+
+    def merge(self, sym: Symbol) -> None:
+        """
+        Merge a symbol into the table.
+
+        A definition replaces an undefined symbol, and of several undefined symbols the one with the largest value
+        (the size of a common block) is kept.
+
+        :param sym: the symbol to merge.
+        :raises LinkError: if the symbol is already defined.
+        """
+        existing = self.lookup(sym)
+        if existing is None:
+            self.add(sym)
+        elif "D" in sym.type:
+            if "D" in existing.type:
+                raise LinkError(f"multiply defined symbol: {sym.name} (defined in {defined_in([existing, sym])})")
+            self.add(sym)
+        elif "D" not in existing.type and sym.value > existing.value:
+            self.add(sym)
+
+    def values(self) -> ValuesView[Symbol]:
+        return self.symbols.values()
+
+    def items(self) -> ItemsView[str, Symbol]:
+        return SymbolItems(self)
+
+    def __getitem__(self, name: str) -> Symbol:
+        name_id = NAMES.ids.get(name)
+        sym = None if name_id is None else self.by_id(name_id)
+        if sym is None:
+            raise KeyError(name)
+        return sym
+
+    def __setitem__(self, name: str, sym: Symbol) -> None:
+        if sym.name != name:
+            raise ValueError(f"symbol name mismatch (expected {name}, got {sym.name})")
+        self.add(sym)
+
+    def __delitem__(self, name: str) -> None:
+        del self.symbols[self[name].id]
+
+    def __iter__(self) -> Iterator[str]:
+        return (NAMES[name_id] for name_id in self.symbols)
+
+    def __len__(self) -> int:
+        return len(self.symbols)
@@ -0,0 +1,92 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from linker import read_object, write_object
+from linker.binary import dump_binary_object, is_binary_object, parse_binary_object
+from linker.errors import LinkError
+from linker.linkconv import Format, convert
+from linker.object import Object, Relocation, Segment, Symbol
+from linker.writer import dump_object
+
+
+@pytest.fixture
+def main() -> Object:
+    segs = [
+        Segment(".text", 0, 0x4, "RP"),
+        Segment(".data", 0x1000, 0x2, "RWP"),
+        Segment(".bss", 0x1004, 0x50, "RW"),
+    ]
+    segs[0].data = b"\xde\xad\xbe\xef"
+    segs[1].data = b"\x12\x34"
+    syms = [Symbol("main", 0, 0, "D"), Symbol("data", 0x1000, 1, "D"), Symbol("printf", 0, 0, "U")]
+    rels = [Relocation(0, 0, 2, "RS4"), Relocation(1, 1, 0, "A4")]
+    return Object("main", segs, syms, rels)
+
+
+def test_is_binary_object(main: Object) -> None:
+    assert is_binary_object(dump_binary_object(main))
+    assert not is_binary_object(dump_object(main).encode("ascii"))
+
+
+def test_roundtrip(main: Object) -> None:
+    assert parse_binary_object(dump_binary_object(main), "main") == main
+
+
+def test_strings_stored_once(main: Object) -> None:
+    assert dump_binary_object(main).count(b"RP\0") == 1
+
+
+def test_truncated(main: Object) -> None:
+    with pytest.raises(LinkError, match=re.escape("truncated binary object")):
+        parse_binary_object(dump_binary_object(main)[:40], "main")
+    with pytest.raises(LinkError, match=re.escape("truncated data for '.data'")):
+        parse_binary_object(dump_binary_object(main)[:-1], "main")
+
+
+def test_value_out_of_range() -> None:
+    obj = Object("main", [Segment(".text", -1, 0, "R")], [], [])
+    with pytest.raises(LinkError, match=re.escape("value out of range for binary format")):
+        dump_binary_object(obj)
+
+
+@pytest.mark.parametrize("lazy", [False, True])
+def test_read_object(tmp_path: Path, main: Object, lazy: bool) -> None:
+    path = tmp_path / "main.lkb"
+    write_object(main, path, binary=True)
+    assert read_object(path, lazy=lazy) == main
+
+
+def test_read_object_invalid(tmp_path: Path, main: Object) -> None:
+    path = tmp_path / "main.lkb"
+    path.write_bytes(dump_binary_object(main)[:30])
+    with pytest.raises(LinkError, match=re.escape(f"{path}: error: ")):
+        read_object(path)
+
+
+def test_convert(tmp_path: Path, main: Object) -> None:
+    text, binary, copy = tmp_path / "main.lk", tmp_path / "main.lkb", tmp_path / "copy.lk"
+    write_object(main, text)
+    assert convert(text, binary) is Format.BINARY
+    assert convert(binary, copy) is Format.TEXT
+    assert copy.read_text() == text.read_text()
+
+
+def test_read_object_mapped(tmp_path: Path, main: Object) -> None:
+    path = tmp_path / "main.lkb"
+    write_object(main, path, binary=True)
+    obj = read_object(path, mapped=True)
+    assert isinstance(obj.segs[0].data, memoryview)
+    assert obj == main
+
+
+def test_read_object_mapped_copy_on_write(tmp_path: Path, main: Object) -> None:
+    path = tmp_path / "main.lkb"
+    write_object(main, path, binary=True)
+    contents = path.read_bytes()
+    obj = read_object(path, mapped=True)
+    assert isinstance(obj.segs[0].data, memoryview)
+    obj.segs[0].data[0:2] = b"\x00\x00"
+    assert obj.segs[0].data == b"\x00\x00\xbe\xef"
+    assert path.read_bytes() == contents
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+import pytest
+
+from linker import Object, Segment, read_object, read_objects, write_object
+from linker.cache import ObjectCache
+from linker.errors import LinkError
+
+
+@pytest.fixture
+def main() -> Object:
+    segs = [Segment(".text", 0, 0x4, "RP"), Segment(".bss", 0x1004, 0x10, "RW")]
+    segs[0].data = b"\xde\xad\xbe\xef"
+    return Object("main", segs, [], [])
+
+
+@pytest.fixture
+def path(tmp_path: Path, main: Object) -> Path:
+    path = tmp_path / "main.lk"
+    write_object(main, path)
+    return path
+
+
+def test_hit(tmp_path: Path, path: Path, main: Object) -> None:
+    cache = ObjectCache(tmp_path / "cache")
+    assert read_object(path, cache=cache) == main
+    assert (cache.hits, cache.misses) == (0, 1)
+    assert read_object(path, cache=cache) == main
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.summary() == "cache: 1 hits, 1 misses, 0 evictions"
+
+
+def test_changed_file_misses(tmp_path: Path, path: Path, main: Object) -> None:
+    cache = ObjectCache(tmp_path / "cache")
+    read_object(path, cache=cache)
+    main.segs[0].data = b"\x00\x00\x00\x00"
+    write_object(main, path)
+    assert read_object(path, cache=cache) == main
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_corrupt_entry_misses(tmp_path: Path, path: Path, main: Object) -> None:
+    cache = ObjectCache(tmp_path / "cache")
+    read_object(path, cache=cache)
+    cache.entry(cache.key(path)).write_bytes(b"junk")
+    assert read_object(path, cache=cache) == main
+    assert (cache.hits, cache.misses) == (0, 2)
+
+
+def test_eviction(tmp_path: Path, main: Object) -> None:
+    paths = []
+    for i in range(3):
+        paths.append(tmp_path / f"{i}.lk")
+        write_object(main, paths[-1])
+    cache = ObjectCache(tmp_path / "cache", max_size=0)
+    read_objects(paths, cache=cache)
+    assert cache.evictions == 3
+    assert not list(cache.directory.iterdir())
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_read_objects(tmp_path: Path, path: Path, main: Object, jobs: int) -> None:
+    cache = ObjectCache(tmp_path / "cache")
+    other = tmp_path / "other.lk"
+    write_object(main, other)
+    read_objects([path], cache=cache)
+    assert [obj.segs for obj in read_objects([path, other], jobs, cache=cache)] == [main.segs, main.segs]
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_lazy_objects_are_stored_on_flush(tmp_path: Path, path: Path, main: Object) -> None:
+    cache = ObjectCache(tmp_path / "cache")
+    obj = read_object(path, lazy=True, cache=cache)
+    assert not list(cache.directory.iterdir())
+    assert obj == main
+    cache.flush()
+    assert read_objects([path], lazy=True, cache=cache)[0] == main
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.pending == []
+
+
+def test_store_error(tmp_path: Path, main: Object) -> None:
+    cache = ObjectCache(tmp_path / "cache")
+    main.segs[0].base = -1
+    with pytest.raises(LinkError, match="value out of range for binary format"):
+        cache.store("key", main)
+
+
+def test_eviction_scans_once_per_batch(tmp_path: Path, main: Object, monkeypatch: pytest.MonkeyPatch) -> None:
+    paths = []
+    for i in range(4):
+        paths.append(tmp_path / f"{i}.lk")
+        write_object(main, paths[-1])
+    cache = ObjectCache(tmp_path / "cache", max_size=1)
+    scans = []
+    entries = cache.entries
+    monkeypatch.setattr(cache, "entries", lambda: scans.append(1) or entries())
+    read_objects(paths, cache=cache)
+    assert (len(scans), cache.evictions, cache.size) == (1, 4, 0)
+    cache.max_size = 1 << 20
+    read_objects(paths, cache=cache)
+    assert len(scans) == 1
@@ -0,0 +1,261 @@
+import re
+from pathlib import Path
+
+import pytest
+
+from linker import Object, Segment, Symbol
+from linker.binary import dump_binary_object
+from linker.errors import LinkError
+from linker import library
+from linker.library import (
+    COMPRESSORS,
+    Compression,
+    Dependencies,
+    Dependency,
+    Library,
+    Member,
+    dump_dependencies,
+    dump_directory_entry,
+    dump_hash_table,
+    parse_dependencies,
+    parse_library_directory,
+)
+from linker.writer import dump_object
+
+
+def compress(data: bytes, compression: Compression) -> bytes:
+    compressor = COMPRESSORS[compression]()
+    return compressor.compress(data) + compressor.flush()
+
+
+def create_library(
+    objs: list[Object], path: Path, hash_table: bool = False, compression: Compression = Compression.NONE
+) -> None:
+    contents = [(dump_object(obj) + "\n").encode("ascii") for obj in objs]
+    members: list[Member] = []
+    offset = len(b"LIBRARY %d %08x\n" % (len(objs), 0))
+    for i, (obj, member) in enumerate(zip(objs, contents)):
+        symbols = [sym.name for sym in obj.syms if "D" in sym.type]
+        if compression is Compression.NONE:
+            members.append(Member(offset, len(member), symbols))
+        else:
+            contents[i] = compress(member, compression)
+            members.append(Member(offset, len(contents[i]), symbols, compression, len(member)))
+        offset += len(contents[i])
+    table = dump_hash_table(members, offset).encode("ascii") if hash_table else b""
+    header = b"LIBRARY %d %08x\n" % (len(objs), offset + len(table))
+    directory = "".join(map(dump_directory_entry, members)).encode("ascii")
+    path.write_bytes(header + b"".join(contents) + table + directory)
+
+
+@pytest.fixture
+def objs() -> list[Object]:
+    a = Object("a", [Segment(".text", 0, 2, "RP")], [Symbol("main", 0, 0, "D"), Symbol("foo", 0, 0, "U")], [])
+    a.segs[0].data = b"hi"
+    b = Object("b", [Segment(".text", 0, 4, "RP")], [Symbol("foo", 0, 0, "D"), Symbol("bar", 2, 0, "D")], [])
+    b.segs[0].data = b"\x00\x01\x02\x03"
+    return [a, b]
+
+
+@pytest.fixture
+def path(tmp_path: Path, objs: list[Object]) -> Path:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path)
+    return path
+
+
+def test_library_directory(path: Path) -> None:
+    with Library(path) as lib:
+        assert lib.members == [Member(19, 50, ["main"]), Member(69, 53, ["foo", "bar"])]
+        assert len(lib) == 2
+
+
+def test_library_read_member(path: Path, objs: list[Object]) -> None:
+    with Library(path) as lib:
+        b = lib.read_member(1)
+        assert b.name == "ab(1)"
+        assert b.syms == objs[1].syms
+        assert b.segs == objs[1].segs
+        assert lib.read_member(0).segs == objs[0].segs
+
+
+def test_library_binary_member(tmp_path: Path, objs: list[Object]) -> None:
+    member = dump_binary_object(objs[1])
+    header = b"LIBRARY 1 %08x\n" % (19 + len(member))
+    path = tmp_path / "b.lib"
+    path.write_bytes(header + member + b"19 %d foo bar\n" % len(member))
+    with Library(path) as lib:
+        assert lib.read_member(0).segs == objs[1].segs
+
+
+def test_library_member_error(path: Path) -> None:
+    contents = path.read_bytes()
+    path.write_bytes(contents.replace(b"00010203", b"0001020x"))
+    with Library(path) as lib:
+        obj = lib.read_member(1)
+        with pytest.raises(LinkError, match=re.escape(f"{path}(1):6: error: failed to parse data for '.text'")):
+            obj.segs[0].data
+
+
+@pytest.mark.parametrize(
+    "contents,message",
+    [
+        (b"", "invalid library header"),
+        (b"LINK\n", "invalid library header"),
+        (b"LIBRARY 1 zz\n", "invalid library header"),
+        (b"LIBRARY 1 00000100\n", "library directory out of range"),
+        (b"LIBRARY 2 00000013\n", "library directory has 0 members (expected 2)"),
+        (b"LIBRARY 1 00000013\n0 100 foo\n", "library member out of range: 0 100 foo"),
+    ],
+)
+def test_library_invalid(tmp_path: Path, contents: bytes, message: str) -> None:
+    path = tmp_path / "bad.lib"
+    path.write_bytes(contents)
+    with pytest.raises(LinkError, match=re.escape(message)):
+        Library(path)
+
+
+def count_directory_reads(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    reads: list[int] = []
+
+    def parse(directory: bytes, size: int) -> list[Member]:
+        reads.append(size)
+        return parse_library_directory(directory, size)
+
+    monkeypatch.setattr(library, "parse_library_directory", parse)
+    return reads
+
+
+def test_library_hash_table(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    objs = [Object(f"m{i}", [], [Symbol(f"s{i}_{j}", 0, 0, "D") for j in range(i % 5)], []) for i in range(200)]
+    path = tmp_path / "big.lib"
+    create_library(objs, path, hash_table=True)
+    reads = count_directory_reads(monkeypatch)
+    with Library(path) as lib:
+        assert lib.hash_table is not None
+        for i, obj in enumerate(objs):
+            for sym in obj.syms:
+                assert lib.lookup(sym.name) == i
+        assert lib.lookup("missing") is None
+        assert lib.read_member(7).name == "big(7)"
+        assert len(lib) == 200
+        assert reads == []
+        # The directory is only read when it's asked for.
+        assert len(lib.members) == 200
+        assert reads == [lib.directory]
+
+
+def test_library_hash_table_matches_directory(tmp_path: Path, objs: list[Object]) -> None:
+    create_library(objs, tmp_path / "plain.lib")
+    create_library(objs, tmp_path / "hashed.lib", hash_table=True)
+    with Library(tmp_path / "plain.lib") as plain, Library(tmp_path / "hashed.lib") as hashed:
+        for name in ["main", "foo", "bar", "baz"]:
+            assert plain.lookup(name) == hashed.lookup(name)
+        assert [hashed.extent(i)[1] for i in range(2)] == [member.length for member in plain.members]
+        assert hashed.members == plain.members
+
+
+def test_library_hash_table_corrupt(tmp_path: Path, objs: list[Object]) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, hash_table=True)
+    contents = path.read_bytes()
+    path.write_bytes(contents.replace(b"HASHTAB 00000002", b"HASHTAB 00000003"))
+    with pytest.raises(LinkError, match=re.escape(f"{path}: error: invalid library hash table")):
+        Library(path)
+
+
+@pytest.mark.parametrize("compression", [Compression.ZLIB, Compression.LZMA])
+@pytest.mark.parametrize("hash_table", [False, True])
+def test_library_compressed(tmp_path: Path, objs: list[Object], compression: Compression, hash_table: bool) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, hash_table, compression)
+    with Library(path) as lib:
+        assert lib.lookup("bar") == 1
+        b = lib.read_member(1)
+        assert b.name == "ab(1)"
+        assert b.syms == objs[1].syms
+        assert b.segs == objs[1].segs
+        assert lib.read_member(0).segs[0].data == b"hi"
+        member = lib.members[1]
+        assert member.compression is compression
+        assert member.size == 53
+
+
+def test_library_compressed_directory(tmp_path: Path, objs: list[Object]) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, compression=Compression.ZLIB)
+    with Library(path) as lib:
+        directory = path.read_bytes()[lib.directory :]
+    assert directory == b"19 %d:zlib:50 main\n%d %d:zlib:53 foo bar\n" % (lib.members[0].length, *lib.members[1][:2])
+
+
+def test_library_compressed_corrupt(tmp_path: Path, objs: list[Object]) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, compression=Compression.ZLIB)
+    with Library(path) as lib:
+        offset, length = lib.extent(1)
+    contents = bytearray(path.read_bytes())
+    contents[offset + 4 : offset + length] = bytes(length - 4)
+    path.write_bytes(contents)
+    with Library(path) as lib:
+        with pytest.raises(LinkError, match=re.escape(f"{path}(1): error: failed to decompress library member")):
+            lib.read_member(1)
+
+
+def test_library_compressed_size_mismatch(tmp_path: Path, objs: list[Object]) -> None:
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, compression=Compression.LZMA)
+    path.write_bytes(path.read_bytes().replace(b":lzma:53 ", b":lzma:54 "))
+    with Library(path) as lib:
+        with pytest.raises(LinkError, match=re.escape(f"{path}(1): error: library member is 53 bytes (expected 54)")):
+            lib.read_member(1)
+
+
+@pytest.mark.parametrize(
+    "compression, method, size, message",
+    [
+        (Compression.LZMA, b"lzma", 54, "library member is 53 bytes (expected 54)"),
+        (Compression.NONE, b"none", 54, "library member is 53 bytes (expected 54)"),
+        (Compression.ZLIB, b"gzip", 53, "invalid library hash table: unknown compression method: gzip"),
+    ],
+)
+def test_library_hash_table_member_record(
+    tmp_path: Path, objs: list[Object], compression: Compression, method: bytes, size: int, message: str
+) -> None:
+    # Members read through the hash table are checked against its records, the directory isn't read.
+    path = tmp_path / "ab.lib"
+    create_library(objs, path, hash_table=True, compression=compression)
+    contents = path.read_bytes()
+    record = b" %s %016x\n" % (compression.value.encode("ascii"), 53)
+    assert contents.count(record) == 1
+    path.write_bytes(contents.replace(record, b" %s %016x\n" % (method, size)))
+    with Library(path) as lib:
+        assert lib.read_member(0).name == "ab(0)"
+        with pytest.raises(LinkError, match=re.escape(message)):
+            lib.read_member(1)
+
+
+def test_dump_dependencies() -> None:
+    members = [Member(0, 0, ["a"]), Member(0, 0, ["b", "c"]), Member(0, 0, ["c"])]
+    section = dump_dependencies(members, [["c", "printf"], [], ["a"]], 0x40)
+    assert section == "DEPENDS 3\na : c=1 printf\nb c :\nc : a=0\nDEPENDS 0000000000000040\n"
+    assert parse_dependencies(section.encode("ascii").rsplit(b"DEPENDS", 1)[0], 3) == [
+        Dependencies(["a"], [Dependency("c", 1), Dependency("printf", None)]),
+        Dependencies(["b", "c"], []),
+        Dependencies(["c"], [Dependency("a", 0)]),
+    ]
+
+
+@pytest.mark.parametrize(
+    "section",
+    [b"DEPENDS 2\n:\n", b"DEPENDS 1\n: a=1\n", b"DEPENDS 1\n: a=x\n", b"DEPENDS 1\na\n", b"DEPENDS 1\n: a :\n", b"HASHTAB 1\n:\n"],
+)
+def test_parse_dependencies_invalid(section: bytes) -> None:
+    with pytest.raises(LinkError, match="invalid library dependenc"):
+        parse_dependencies(section, 1)
+
+
+def test_library_without_dependencies(path: Path) -> None:
+    with Library(path) as lib:
+        assert lib.dependencies_offset is None
+        assert lib.dependencies(0) is None
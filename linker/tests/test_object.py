@@ -0,0 +1,56 @@
+import re
+from dataclasses import FrozenInstanceError
+
+import pytest
+
+from linker.object import Object, Relocation, RelocationTable, Segment, Symbol
+
+
+@pytest.fixture
+def rels() -> list[Relocation]:
+    return [Relocation(0x10, 0, 1, "A4"), Relocation(0x20, 1, 0, "R4"), Relocation(0x30, 0, 2, "A4")]
+
+
+def test_relocation_table(rels: list[Relocation]) -> None:
+    table = RelocationTable(rels)
+    assert len(table) == 3
+    assert table[1] == rels[1]
+    assert table[-1] == rels[-1]
+    assert list(table) == rels
+    assert table == rels
+    assert table[1:] == RelocationTable(rels[1:])
+    assert table.type_names == ["A4", "R4"]
+    assert list(table.types) == [0, 1, 0]
+
+
+def test_relocation_table_equality(rels: list[Relocation]) -> None:
+    other = RelocationTable([Relocation(0, 0, 0, "R4")] + rels)
+    assert other[1:] == RelocationTable(rels)
+    assert other != RelocationTable(rels)
+
+
+def test_relocation_table_rows_are_read_only(rels: list[Relocation]) -> None:
+    table = RelocationTable(rels)
+    with pytest.raises(FrozenInstanceError):
+        table[0].ref = 2  # type: ignore[misc]
+    with pytest.raises(FrozenInstanceError):
+        next(iter(table)).loc = 0  # type: ignore[misc]
+    assert table == rels
+
+
+def test_relocation_table_negative() -> None:
+    table = RelocationTable()
+    with pytest.raises(ValueError, match=re.escape("can't convert negative value to unsigned int")):
+        table.add(0, -1, 0, "A4")
+    assert (len(table.locs), len(table.segs), len(table.refs), len(table.types)) == (0, 0, 0, 0)
+
+
+def test_object_converts_relocations(rels: list[Relocation]) -> None:
+    obj = Object("main", [], [], rels)
+    assert isinstance(obj.rels, RelocationTable)
+    assert obj.rels == rels
+
+
+def test_slots() -> None:
+    for item in (Segment(".text", 0, 0, "R"), Symbol("main", 0, 0, "D"), Relocation(0, 0, 0, "A4")):
+        assert not hasattr(item, "__dict__")
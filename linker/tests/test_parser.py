@@ -1,13 +1,15 @@
+import io
 import re
 
 import pytest
 
 from linker.errors import ParseError, LinkError
-from linker.object import Segment, Symbol
+from linker.object import Segment, Symbol, Relocation
 from linker.parser import (
     is_magic_number,
     is_comment,
     line_iterator,
+    binary_line_iterator,
     Line,
     validate_magic_number,
     parse_counts,
@@ -15,6 +17,10 @@ from linker.parser import (
     next_line,
     parse_object_from_str,
     parse_item,
+    parse_item_from_str,
+    parse_block,
+    parse_lines,
+    parse_relocations,
     parse_data,
     parse_segment_data,
 )
@@ -78,6 +84,11 @@ def test_line_iterator(main: str) -> None:
     ]
 
 
+def test_binary_line_iterator() -> None:
+    file = io.BytesIO(b"LINK\r\n# comment\n  1 0 0\n")
+    assert list(binary_line_iterator(file)) == [Line(1, "LINK", 0), Line(3, "1 0 0", 18)]
+
+
 def test_next_line() -> None:
     lines = ["LINK"]
     it = line_iterator(lines)
@@ -130,6 +141,55 @@ def test_parse_item() -> None:
         parse_item(Line(19, ".text jeep 1017 R"), Segment)
 
 
+def test_parse_item_not_enough_values() -> None:
+    with pytest.raises(ParseError, match=re.escape("failed to parse symbol: not enough values (expected 4, got 3)")):
+        parse_item(Line(4, "main 0 1"), Symbol)
+
+
+@pytest.mark.parametrize(
+    "line,cls",
+    [
+        (".text 1017 340 RP", Segment),
+        ("main 0 1 D", Symbol),
+        ("1a 1 0 R8", Relocation),
+        ("1a 1 0 R8 extra", Relocation),
+    ],
+)
+def test_parse_item_matches_reflection(line: str, cls: type[Segment | Symbol | Relocation]) -> None:
+    assert parse_item(Line(1, line), cls) == parse_item_from_str(line, cls)
+
+
+def test_parse_block() -> None:
+    block = [Line(3, "1a 1 0 R8"), Line(5, "2b 0 1 A4")]
+    assert parse_block(block, Relocation) == [Relocation(0x1A, 1, 0, "R8"), Relocation(0x2B, 0, 1, "A4")]
+
+
+def test_parse_block_error_lineno() -> None:
+    block = [Line(3, "1a 1 0 R8"), Line(5, "2b 0 1 A4"), Line(6, "zz 0 1 A4"), Line(7, "yy 0 1 A4")]
+    with pytest.raises(ParseError) as excinfo:
+        parse_block(block, Relocation)
+    assert excinfo.value.lineno == 6
+
+
+def test_parse_lines_not_enough_lines() -> None:
+    lines = iter([Line(3, "main 0 1 D")])
+    with pytest.raises(LinkError, match=re.escape("expected symbol definition")):
+        parse_lines(lines, 2, Symbol)
+
+
+def test_parse_relocations() -> None:
+    lines = iter([Line(3, "1a 1 0 R8"), Line(5, "2b 0 1 A4")])
+    table = parse_relocations(lines, 2)
+    assert table == [Relocation(0x1A, 1, 0, "R8"), Relocation(0x2B, 0, 1, "A4")]
+
+
+def test_parse_relocations_error_lineno() -> None:
+    lines = iter([Line(3, "1a 1 0 R8"), Line(5, "-2b 0 1 A4")])
+    with pytest.raises(ParseError, match=re.escape("failed to parse relocation: ")) as excinfo:
+        parse_relocations(lines, 2)
+    assert excinfo.value.lineno == 5
+
+
 def test_parse_data() -> None:
     line = Line(8, "deadbeef")
     seg = Segment(".text", 0, 0x4, "RP")
@@ -0,0 +1,110 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from linker import Object, Segment, Symbol, write_object
+from linker.session import LinkSession, copy_object
+from linker.writer import dump_object
+
+
+def make_object(name: str, symbol: str, data: bytes = b"\xde\xad\xbe\xef") -> Object:
+    seg = Segment(".text", 0, len(data), "RP")
+    seg.data = data
+    return Object(name, [seg], [Symbol(symbol, 0, 0, "D"), Symbol("printf", 0, 0, "U")], [])
+
+
+def create_library(objs: list[Object], path: Path) -> None:
+    contents = [(dump_object(obj) + "\n").encode("ascii") for obj in objs]
+    offset = len(b"LIBRARY %d %08x\n" % (len(objs), 0))
+    directory: list[bytes] = []
+    for obj, member in zip(objs, contents):
+        directory.append(b"%d %d %s\n" % (offset, len(member), obj.syms[0].name.encode("ascii")))
+        offset += len(member)
+    path.write_bytes(b"LIBRARY %d %08x\n" % (len(objs), offset) + b"".join(contents) + b"".join(directory))
+
+
+@pytest.fixture
+def path(tmp_path: Path) -> Path:
+    path = tmp_path / "ab.lib"
+    create_library([make_object("a", "a"), make_object("b", "b")], path)
+    return path
+
+
+def test_copy_object() -> None:
+    obj = make_object("a", "a")
+    copy = copy_object(obj)
+    assert copy == obj
+    copy.segs[0].base = 0x1000
+    copy.syms[0].value = 0x1000
+    assert (obj.segs[0].base, obj.syms[0].value) == (0, 0)
+    assert copy.syms[0].obj is copy
+    assert copy.segs[0].data is obj.segs[0].data
+    assert copy.rels is obj.rels
+
+
+def test_read_member(path: Path) -> None:
+    with LinkSession() as session:
+        lib = session.library(path)
+        first = session.read_member(lib, 1)
+        second = session.read_member(session.library(path), 1)
+        assert session.library(path) is lib
+        assert first == second
+        assert first is not second
+        assert first.syms[0] is not second.syms[0]
+        assert (session.hits, session.misses) == (1, 1)
+        assert session.summary() == "session: 1 hits, 1 misses, 0 evictions, 0 invalidations (50% hit rate)"
+
+
+def test_changed_library_invalidates(path: Path) -> None:
+    with LinkSession() as session:
+        lib = session.library(path)
+        session.read_member(lib, 0)
+        create_library([make_object("a", "a", b"\x00\x01\x02\x03\x04\x05"), make_object("b", "b")], path)
+        lib = session.library(path)
+        assert session.read_member(lib, 0).segs[0].data == b"\x00\x01\x02\x03\x04\x05"
+        assert (session.hits, session.misses, session.invalidations) == (0, 2, 1)
+
+
+def test_eviction(path: Path) -> None:
+    with LinkSession(max_size=100) as session:
+        lib = session.library(path)
+        for index in [0, 1, 0]:
+            session.read_member(lib, index)
+        assert (session.hits, session.misses, session.evictions) == (0, 3, 2)
+        assert session.size <= 100
+
+
+def test_least_recently_used(path: Path) -> None:
+    with LinkSession() as session:
+        lib = session.library(path)
+        session.max_size = sum(lib.extent(index)[1] for index in range(2))
+        session.read_member(lib, 0)
+        session.read_member(lib, 1)
+        session.read_member(lib, 0)
+        session.max_size -= 1
+        session.evict()
+        assert list(session.members) == [(lib.path, 0)]
+
+
+def test_read_object(tmp_path: Path) -> None:
+    path = tmp_path / "a.lk"
+    write_object(make_object("a", "a"), path)
+    with LinkSession() as session:
+        assert session.read_object(path) == session.read_object(path)
+        assert (session.hits, session.misses) == (1, 1)
+        write_object(make_object("a", "a", b"\x01\x02"), path)
+        os.utime(path, ns=(0, 0))
+        assert session.read_object(path).segs[0].data == b"\x01\x02"
+        assert session.misses == 2
+
+
+def test_index(tmp_path: Path) -> None:
+    path = tmp_path / "MAP"
+    path.write_text("a a\n")
+    with LinkSession() as session:
+        assert session.index(path, lambda: path.read_text()) == "a a\n"
+        assert session.index(path, lambda: "unused") == "a a\n"
+        path.write_text("b b\n")
+        os.utime(path, ns=(0, 0))
+        assert session.index(path, lambda: path.read_text()) == "b b\n"
@@ -0,0 +1,102 @@
+import sys
+import threading
+
+import pytest
+
+from linker import Symbol
+from linker.names import NAMES, NameTable
+from linker.symtab import SymbolTable
+
+
+def test_name_table_intern() -> None:
+    names = NameTable()
+    assert names.intern("a") == 0
+    assert names.intern("b") == 1
+    assert names.intern("a") == 0
+    assert names[1] == "b"
+    assert len(names) == 2
+
+
+def test_symbol_names_are_interned() -> None:
+    a = Symbol("".join(["sym", "bol"]), 0, 0, "D")
+    b = Symbol("".join(["sym", "bol"]), 0, 0, "U")
+    assert a.id == b.id
+    assert a.name is b.name
+    assert NAMES[a.id] == "symbol"
+
+
+def test_symbol_table() -> None:
+    symtab = SymbolTable()
+    b = Symbol("b", 0, 0, "D")
+    a = Symbol("a", 0, 0, "U")
+    symtab.add(b)
+    symtab["a"] = a
+    assert list(symtab) == ["b", "a"]
+    assert symtab["a"] is a
+    assert symtab.lookup(Symbol("b", 0, 0, "U")) is b
+    assert symtab.get("missing") is None
+    defined = Symbol("a", 4, 1, "D")
+    symtab.add(defined)
+    assert list(symtab.values()) == [b, defined]
+    del symtab["b"]
+    assert symtab == {"a": defined}
+    with pytest.raises(KeyError):
+        symtab["b"]
+
+
+def test_symbol_table_name_mismatch() -> None:
+    with pytest.raises(ValueError, match="symbol name mismatch"):
+        SymbolTable()["a"] = Symbol("b", 0, 0, "D")
+
+
+def test_symbol_table_size_is_independent_of_interned_names() -> None:
+    for i in range(1000):
+        NAMES.intern(f"test_symbol_table_size_{i}")
+    symtab = SymbolTable()
+    symtab.add(Symbol("test_symbol_table_size_999", 0, 0, "D"))
+    assert len(symtab.symbols) == 1
+    assert symtab.by_id(NAMES.intern("test_symbol_table_size_0")) is None
+
+
+def test_name_table_intern_threads() -> None:
+    # Switch threads often so an unguarded intern would hand out duplicate ids.
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    try:
+        check_name_table_intern_threads()
+    finally:
+        sys.setswitchinterval(interval)
+
+
+def check_name_table_intern_threads() -> None:
+    names = NameTable()
+    nthreads = 4
+    for trial in range(20):
+        words = [f"name{trial}_{i}" for i in range(2000)]
+        barrier = threading.Barrier(nthreads)
+        results: list[list[int]] = [[] for _ in range(nthreads)]
+
+        def intern(result: list[int], words: list[str] = words, barrier: threading.Barrier = barrier) -> None:
+            barrier.wait()
+            result.extend(names.intern(word) for word in words)
+
+        threads = [threading.Thread(target=intern, args=(result,)) for result in results]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(result == results[0] for result in results)
+        assert [names[name_id] for name_id in results[0]] == words
+    assert len(names) == 20 * 2000
+
+
+def test_symbol_table_values_and_items_dont_look_up_names(monkeypatch: pytest.MonkeyPatch) -> None:
+    symtab = SymbolTable()
+    a = Symbol("a", 0, 0, "D")
+    b = Symbol("b", 0, 0, "U")
+    symtab.add(a)
+    symtab.add(b)
+    monkeypatch.setattr(NAMES, "ids", {})
+    assert list(symtab.values()) == [a, b]
+    assert list(symtab.items()) == [("a", a), ("b", b)]
+    assert len(symtab.items()) == 2
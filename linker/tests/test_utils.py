@@ -1,8 +1,12 @@
+import re
+from functools import partial
 from pathlib import Path
 
 import pytest
 
-from linker import roundup, read_object, write_object, Object, Segment
+from linker import roundup, read_object, read_objects, write_object, Object, Segment
+from linker.errors import LinkError
+from linker.utils import map_ordered
 from linker.writer import dump_object
 
 
@@ -40,6 +44,49 @@ def test_read_object(tmp_path: Path, main: Object) -> None:
     assert read_object(path) == main
 
 
+@pytest.fixture
+def with_data() -> Object:
+    segs = [
+        Segment(".text", 0, 0x4, "RP"),
+        Segment(".data", 0x1000, 0x2, "RWP"),
+        Segment(".bss", 0x1004, 0x10, "RW"),
+    ]
+    segs[0].data = b"\xde\xad\xbe\xef"
+    segs[1].data = b"\x12\x34"
+    return Object("main", segs, [], [])
+
+
+def test_read_object_lazy(tmp_path: Path, with_data: Object) -> None:
+    path = tmp_path / "main.lk"
+    path.write_text("# comment\n" + dump_object(with_data).replace("\n", "\r\n  "))
+    obj = read_object(path, lazy=True)
+    assert obj.segs[0]._loader is not None  # pylint: disable=protected-access
+    assert obj == with_data
+    assert obj.segs[0]._loader is None  # pylint: disable=protected-access
+
+
+def test_read_object_mapped(tmp_path: Path, with_data: Object) -> None:
+    path = tmp_path / "main.lk"
+    path.write_text("# comment\n" + dump_object(with_data))
+    assert read_object(path, mapped=True) == with_data
+
+
+def test_read_object_mapped_empty(tmp_path: Path) -> None:
+    path = tmp_path / "main.lk"
+    path.touch()
+    with pytest.raises(LinkError, match=re.escape(f"{path}: error: expected magic number")):
+        read_object(path, mapped=True)
+
+
+def test_read_object_lazy_invalid_data(tmp_path: Path, with_data: Object) -> None:
+    path = tmp_path / "main.lk"
+    path.write_text(dump_object(with_data).replace("1234", "12zz"))
+    obj = read_object(path, lazy=True)
+    assert obj.segs[0].data == b"\xde\xad\xbe\xef"
+    with pytest.raises(LinkError, match=re.escape(f"{path}:7: error: failed to parse data for '.data': ")):
+        _ = obj.segs[1].data
+
+
 def test_write_object(tmp_path: Path, main: Object) -> None:
     path = (tmp_path / main.name).with_suffix(".lk")
     write_object(main, path)
@@ -51,3 +98,34 @@ def test_write_object(tmp_path: Path, main: Object) -> None:
 .data 2000 320 RW
 .bss 2320 100 RW"""
     )
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_read_objects(tmp_path: Path, main: Object, with_data: Object, jobs: int) -> None:
+    paths = []
+    for i, obj in enumerate([main, with_data, main]):
+        paths.append(tmp_path / f"{i}.lk")
+        write_object(obj, paths[-1])
+    objs = read_objects(paths, jobs=jobs)
+    assert [obj.name for obj in objs] == ["0", "1", "2"]
+    assert [obj.segs for obj in objs] == [main.segs, with_data.segs, main.segs]
+
+
+def test_read_objects_error(tmp_path: Path, main: Object) -> None:
+    good, bad = tmp_path / "good.lk", tmp_path / "bad.lk"
+    write_object(main, good)
+    bad.write_text("LINK\n1 0 0\n.text zz 0 R")
+    with pytest.raises(LinkError, match=re.escape(f"{bad}:3: error: failed to parse segment: ")):
+        read_objects([good, bad], jobs=2)
+
+
+@pytest.mark.parametrize("jobs,window", [(1, None), (2, None), (3, 1)])
+def test_map_ordered(jobs: int, window: int) -> None:
+    assert list(map_ordered(partial(pow, 2), range(20), jobs, window)) == [2**i for i in range(20)]
+
+
+def test_map_ordered_error() -> None:
+    results = map_ordered(partial(int, base=10), ["1", "x", "3"], jobs=2)
+    assert next(results) == 1
+    with pytest.raises(ValueError):
+        next(results)
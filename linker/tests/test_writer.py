@@ -1,7 +1,9 @@
+import io
+
 import pytest
 
 from linker.object import Segment, Symbol, Relocation, Object
-from linker.writer import dump_item, dump_object, dump_segment_data
+from linker.writer import dump_item, dump_object, dump_segment_data, write_object_to, DATA_CHUNK_SIZE, LINES_CHUNK_SIZE
 
 
 def test_dump_segment() -> None:
@@ -48,3 +50,19 @@ def test_dump_object(main: Object) -> None:
 main 0 1 D
 wiggleroom 100 0 U"""
     )
+
+
+def test_write_object_to(main: Object) -> None:
+    fh = io.StringIO()
+    assert write_object_to(fh, main) == len(dump_object(main))
+    assert fh.getvalue() == dump_object(main)
+
+
+def test_write_object_to_chunked() -> None:
+    segs = [Segment(".text", 0, 3 * DATA_CHUNK_SIZE + 1, "RP"), Segment(".data", 0, 0, "RWP")]
+    segs[0].data = bytes(range(256)) * (3 * DATA_CHUNK_SIZE // 256) + b"\xff"
+    syms = [Symbol(f"sym{i}", i, 0, "D") for i in range(2 * LINES_CHUNK_SIZE + 1)]
+    obj = Object("big", segs, syms, [])
+    fh = io.StringIO()
+    write_object_to(fh, obj)
+    assert fh.getvalue() == dump_object(obj)
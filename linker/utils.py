@@ -2,13 +2,20 @@
 Some helper functions.
 """
 
+import io
+import mmap
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
 from pathlib import Path
-from typing import TypedDict
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, TypedDict, TypeVar
 
+from .binary import dump_binary_object, is_binary_object, parse_binary_object, read_binary_tables, share_data
+from .cache import ObjectCache
 from .errors import LinkError, ParseError
-from .object import Object
-from .parser import parse_object_from_lines
-from .writer import dump_object
+from .object import Object, Segment, SegmentData, BINARY_MAGIC_NUMBER
+from .parser import Line, binary_line_iterator, line_iterator, parse_object_from_iter
+from .writer import write_object_to
 
 
 def roundup(val: int, multiple: int) -> int:
@@ -25,33 +32,283 @@ def roundup(val: int, multiple: int) -> int:
     return val
 
 
-def read_object(path: Path) -> Object:
+def load_segment_data(path: Path, name: str, lineno: int, offset: int, length: int) -> bytes:
+    """
+    Load the hex encoded segment data from a file.
+
+    :param path: path to the object file.
+    :param name: the name of the segment.
+    :param lineno: the line number of the data.
+    :param offset: the offset of the data within the file.
+    :param length: the length of the hex encoded data.
+    :return: the decoded segment data.
+    :raises LinkError: if the data can't be decoded.
+    """
+    with open(path, mode="rb") as file:
+        file.seek(offset)
+        return decode_segment_data(file.read(length), path, name, lineno)
+
+
+def decode_segment_data(contents: SegmentData, path: Path, name: str, lineno: int) -> bytes:
+    """
+    Decode hex encoded segment data.
+
+    :param contents: the hex encoded data.
+    :param path: path to the object file.
+    :param name: the name of the segment.
+    :param lineno: the line number of the data.
+    :return: the decoded segment data.
+    :raises LinkError: if the data can't be decoded.
+    """
+    try:
+        return bytes.fromhex(str(contents, encoding="ascii"))
+    except ValueError as err:
+        raise LinkError(f"{path}:{lineno}: error: failed to parse data for '{name}': {err}") from err
+
+
+def defer_segment_data(path: Path, line: Line, seg: Segment) -> None:
+    """
+    Defer loading the segment data until it is first accessed.
+
+    Only the position of the data is kept, so the line can be freed.
+
+    :param path: path to the object file.
+    :param line: the line containing the segment data.
+    :param seg: the segment.
+    """
+    seg.defer_data(partial(load_segment_data, path, seg.name, line.number, line.offset, len(line.contents)))
+
+
+def defer_mapped_data(view: memoryview, path: Path, line: Line, seg: Segment) -> None:
+    """
+    Defer decoding the segment data of a memory mapped object until it is first accessed.
+
+    :param view: the memory mapped object file.
+    :param path: path to the object file.
+    :param line: the line containing the segment data.
+    :param seg: the segment.
+    """
+    contents = view[line.offset : line.offset + len(line.contents)]
+    seg.defer_data(partial(decode_segment_data, contents, path, seg.name, line.number))
+
+
+def load_binary_data(path: Path, name: str, offset: int, length: int) -> bytes:
+    """
+    Load the raw segment data from a binary object file.
+
+    :param path: path to the object file.
+    :param name: the name of the segment.
+    :param offset: the offset of the data within the file.
+    :param length: the length of the data.
+    :return: the segment data.
+    :raises LinkError: if the file is truncated.
+    """
+    with open(path, mode="rb") as file:
+        file.seek(offset)
+        data = file.read(length)
+    if len(data) != length:
+        raise LinkError(f"{path}: error: truncated data for '{name}'")
+    return data
+
+
+def defer_binary_data(path: Path, seg: Segment, offset: int, length: int) -> None:
+    """
+    Defer loading the segment data of a binary object until it is first accessed.
+
+    :param path: path to the object file.
+    :param seg: the segment.
+    :param offset: the offset of the data within the file.
+    :param length: the length of the data.
+    """
+    seg.defer_data(partial(load_binary_data, path, seg.name, offset, length))
+
+
+def parse_object_file(path: Path, parse: Callable[[], Object]) -> Object:
+    """
+    Parse an object file, adding the path to any errors.
+
+    :param path: path to the object file.
+    :param parse: the function that parses the object.
+    :return: the parsed object file.
+    :raises LinkError: if there is an error parsing the file.
+    """
+    try:
+        return parse()
+    except ParseError as err:
+        raise LinkError(f"{path}:{err.lineno}: error: {err}") from err
+    except LinkError as err:
+        raise LinkError(f"{path}: error: {err}") from err
+
+
+def read_binary_object(path: Path, file: BinaryIO, lazy: bool) -> Object:
+    """
+    Read an object in the binary format.
+
+    :param path: path to the object file.
+    :param file: the object file opened in binary mode.
+    :param lazy: defer loading the segment data.
+    :return: the parsed object file.
+    :raises LinkError: if there is an error parsing the file.
+    """
+    if lazy:
+        tables = parse_object_file(path, partial(read_binary_tables, file))
+        return parse_object_file(path, partial(parse_binary_object, tables, path.stem, partial(defer_binary_data, path)))
+    return parse_object_file(path, partial(parse_binary_object, file.read(), path.stem))
+
+
+def map_file(path: Path) -> mmap.mmap:
+    """
+    Memory map a file.
+
+    The mapping is copy-on-write, so modifying it only copies the pages that are written to and never changes the file.
+
+    :param path: path to the file.
+    :return: the memory mapped file.
+    :raises FileNotFoundError: if the path doesn't exist.
+    """
+    with open(path, mode="rb") as file:
+        return mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_COPY)
+
+
+def read_mapped_object(path: Path) -> Object:
+    """
+    Read a memory mapped object file.
+
+    The segment data of binary objects is a `memoryview` of the mapping so it isn't copied, the segment data of text
+    objects is decoded from the mapping when it is first accessed.
+
+    :param path: path to the object file.
+    :return: the parsed object file.
+    :raises FileNotFoundError: if the path doesn't exist.
+    :raises LinkError: if there is an error parsing the file.
+    """
+    mapping = map_file(path)
+    view = memoryview(mapping)
+    if is_binary_object(mapping[: len(BINARY_MAGIC_NUMBER)]):
+        return parse_object_file(path, partial(parse_binary_object, view, path.stem, partial(share_data, view)))
+    lines = binary_line_iterator(iter(mapping.readline, b""))
+    return parse_object_file(path, partial(parse_object_from_iter, lines, path.stem, partial(defer_mapped_data, view, path)))
+
+
+def read_object(path: Path, lazy: bool = False, mapped: bool = False, cache: Optional[ObjectCache] = None) -> Object:
     """
     Read object from file.
 
+    The format of the object, text or binary, is detected from the magic number. In lazy mode the segment data isn't
+    loaded until it is first accessed, which is useful when only the symbols are needed. Errors in the segment data
+    are then reported when it is accessed. In mapped mode the file is memory mapped (see `read_mapped_object`), which
+    implies lazy. Objects found in the cache are loaded from it instead of parsing the file, objects read lazily are
+    added to the cache by `ObjectCache.flush`.
+
     :param path: path to the object file.
+    :param lazy: defer loading the segment data.
+    :param mapped: memory map the object file.
+    :param cache: the cache of parsed objects.
     :return: the parsed object file.
     :raises FileNotFoundError: if the path doesn't exist.
     :raises LinkError: if there is an error parsing the file.
     """
-    with open(path, mode="r", encoding="ascii") as file:
-        try:
-            return parse_object_from_lines(file, path.stem)
-        except ParseError as err:
-            raise LinkError(f"{path}:{err.lineno}: error: {err}") from err
-        except LinkError as err:
-            raise LinkError(f"{path}: error: {err}") from err
+    if cache is not None:
+        objs = cache.read_all([path], lambda paths: [read_object(p, lazy, mapped) for p in paths], lazy=lazy or mapped)
+        return objs[0]
+    if mapped and path.stat().st_size > 0:
+        return read_mapped_object(path)
+    with open(path, mode="rb") as file:
+        binary = is_binary_object(file.read(len(BINARY_MAGIC_NUMBER)))
+        file.seek(0)
+        if binary:
+            return read_binary_object(path, file, lazy)
+        if lazy:
+            lines = binary_line_iterator(file)
+            return parse_object_file(path, partial(parse_object_from_iter, lines, path.stem, partial(defer_segment_data, path)))
+        lines = line_iterator(io.TextIOWrapper(file, encoding="ascii"))
+        return parse_object_file(path, partial(parse_object_from_iter, lines, path.stem))
+
+
+def read_object_for_transfer(path: Path) -> bytes:
+    """
+    Read an object file in a worker process.
+
+    The object is returned in the binary format, which is much cheaper to send back to the parent and parse than
+    pickling the object.
+
+    :param path: path to the object file.
+    :return: the object in the binary format.
+    """
+    return dump_binary_object(read_object(path))
+
+
+def read_objects(
+    paths: Iterable[Path], jobs: int = 1, lazy: bool = False, cache: Optional[ObjectCache] = None
+) -> list[Object]:
+    """
+    Read object files, in parallel if there is more than one job.
+
+    :param paths: paths to the object files.
+    :param jobs: the number of processes used to parse the files.
+    :param lazy: defer loading the segment data, only used when the files are read in this process.
+    :param cache: the cache of parsed objects, only the files that aren't cached are parsed. Objects read lazily are
+        added to the cache by `ObjectCache.flush`.
+    :return: the parsed object files in the same order as `paths`.
+    :raises FileNotFoundError: if a path doesn't exist.
+    :raises LinkError: if there is an error parsing a file.
+    """
+    paths = list(paths)
+    if cache is not None:
+        return cache.read_all(paths, partial(read_objects, jobs=jobs, lazy=lazy), lazy=lazy)
+    if jobs <= 1 or len(paths) <= 1:
+        return [read_object(path, lazy) for path in paths]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(paths))) as executor:
+        chunksize = max(1, len(paths) // (jobs * 4))
+        buffers = executor.map(read_object_for_transfer, paths, chunksize=chunksize)
+        return [parse_binary_object(buffer, path.stem) for path, buffer in zip(paths, buffers)]
+
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def map_ordered(func: Callable[[T], R], items: Iterable[T], jobs: int = 1, window: Optional[int] = None) -> Iterator[R]:
+    """
+    Apply a function to items in worker processes, returning the results in the order of the items.
+
+    At most `window` items, by default twice the number of jobs, are submitted ahead of the result being returned, so
+    the results can be consumed as they are produced and only a bounded number are held in memory.
+
+    :param func: the function to apply, it must be picklable.
+    :param items: the items.
+    :param jobs: the number of processes, the function is applied in this process if there is only one.
+    :param window: the maximum number of items in flight.
+    :return: an iterator over the results.
+    """
+    if jobs <= 1:
+        yield from map(func, items)
+        return
+    window = window or 2 * jobs
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        pending: deque[Future[R]] = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
-def write_object(obj: Object, path: Path) -> None:
+def write_object(obj: Object, path: Path, binary: bool = False) -> None:
     """
     Write object to file.
 
     :param obj: the object to write.
     :param path: the output path.
+    :param binary: write the object in the binary format.
     """
+    if binary:
+        with open(path, mode="wb") as binary_file:
+            binary_file.write(dump_binary_object(obj))
+        return
     with open(path, mode="w", encoding="ascii") as file:
-        file.write(dump_object(obj))
+        write_object_to(file, obj)
 
 
 class SegmentGroup(TypedDict):
@@ -3,13 +3,18 @@ Functions for dumping an object file to an ascii string.
 """
 
 from dataclasses import fields, Field
+from itertools import islice
 from operator import attrgetter
-from typing import cast, Iterable, Iterator, TypeVar
+from typing import cast, Iterable, Iterator, TextIO, TypeVar
 
 from .object import Object, Segment, Symbol, Relocation, MAGIC_NUMBER
 
 T = TypeVar("T", Segment, Symbol, Relocation)
 
+# The number of table lines, and bytes of segment data, converted to a string at a time when streaming an object.
+LINES_CHUNK_SIZE = 1024
+DATA_CHUNK_SIZE = 1 << 16
+
 
 def dump_member(item: T, member: Field[int | str]) -> str:
     """
@@ -66,3 +71,60 @@ def dump_object(obj: Object) -> str:
     lines.extend(map(dump_item, obj.rels))
     lines.extend(dump_segment_data(obj.segs))
     return "\n".join(lines)
+
+
+def dump_items_chunked(items: Iterable[T]) -> Iterator[str]:
+    """
+    Dump items in chunks of lines, each line is preceded by a newline.
+
+    :param items: the items to dump.
+    :return: an iterator of strings containing up to `LINES_CHUNK_SIZE` lines.
+    """
+    it = iter(items)
+    while chunk := list(islice(it, LINES_CHUNK_SIZE)):
+        yield "\n" + "\n".join(map(dump_item, chunk))
+
+
+def dump_segment_data_chunked(segs: Iterable[Segment]) -> Iterator[str]:
+    """
+    Dump the segment data in chunks, the data of each segment is preceded by a newline.
+
+    :param segs: the segments to scan.
+    :return: an iterator of hex strings for up to `DATA_CHUNK_SIZE` bytes of data.
+    """
+    for seg in segs:
+        if "P" in seg.flags and seg.data:
+            yield "\n"
+            data = memoryview(seg.data)
+            for start in range(0, len(data), DATA_CHUNK_SIZE):
+                yield data[start : start + DATA_CHUNK_SIZE].hex()
+
+
+def dump_object_chunked(obj: Object) -> Iterator[str]:
+    """
+    Dump an object in chunks.
+
+    Joining the chunks gives the same string as `dump_object`.
+
+    :param obj: the object to dump.
+    :return: an iterator of strings.
+    """
+    yield MAGIC_NUMBER
+    yield f"\n{len(obj.segs)} {len(obj.syms)} {len(obj.rels)}"
+    yield from dump_items_chunked(obj.segs)
+    yield from dump_items_chunked(obj.syms)
+    yield from dump_items_chunked(obj.rels)
+    yield from dump_segment_data_chunked(obj.segs)
+
+
+def write_object_to(fh: TextIO, obj: Object) -> int:
+    """
+    Write an object to a file handle.
+
+    The object is written in chunks, so the whole object is never held in memory as a single string.
+
+    :param fh: the file handle to write to.
+    :param obj: the object to write.
+    :return: the number of characters written.
+    """
+    return sum(map(fh.write, dump_object_chunked(obj)))